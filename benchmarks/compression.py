@@ -0,0 +1,126 @@
+"""Measure the bytes saved and CPU spent by the response compression middleware.
+
+Payloads are real responses from the app (pages, a `NutritionCard` fragment, the weight
+series JSON over three years of daily weigh-ins, and a streamed SSE response), replayed
+through `CompressionMiddleware` in front of a trivial ASGI app so that only the
+compression cost is measured. Run with:
+
+    python benchmarks/compression.py [--requests N]
+"""
+import argparse
+import asyncio
+import math
+import os
+import statistics
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+os.environ.setdefault("FIT_LLM_WARMUP", "0")
+os.chdir(tempfile.mkdtemp(prefix="fit-bench-"))  # the app keeps its data under ./data
+
+import fasthtml.common as fh
+from starlette.testclient import TestClient
+
+from fit.nutrition.data import NutritionalInfo
+from fit.web import common, food
+from fit.web.app import app
+from fit.web.compression import CompressionMiddleware, brotli
+from fit.web.database import insert_measurement
+
+
+def _seed_measurements(days: int = 3 * 365) -> None:
+    start = datetime(2022, 1, 1)
+    db = common.get_db()
+    db.execute("BEGIN")
+    for day in range(days):
+        weight = 200 - day * 0.02 + 1.5 * math.sin(day / 7)
+        insert_measurement(db, 70, round(weight, 1), start + timedelta(days=day))
+    db.execute("COMMIT")
+
+
+def _payloads() -> dict[str, tuple[str, list[bytes]]]:
+    """Return name -> (content type, body chunks) for each benchmarked response."""
+    client = TestClient(app)
+    identity = {"Accept-Encoding": "identity"}
+    info = NutritionalInfo.model_validate({
+        name: ("Grilled chicken with rice and broccoli" if name == "summary" else 42.5)
+        for name in NutritionalInfo.model_fields
+    })
+    recommendations = (
+        "1. Grilled salmon with quinoa and roasted vegetables (650 kcal, 45g protein)\n"
+        "2. Turkey and avocado wrap with a side of Greek yogurt (550 kcal, 40g protein)\n"
+        "3. Tofu stir-fry with brown rice and mixed greens (600 kcal, 30g protein)\n"
+    ) * 4
+    words = recommendations.split(" ")
+    return {
+        "food page": ("text/html", [client.get("/food", headers=identity).content]),
+        "progress page": ("text/html", [client.get("/progress", headers=identity).content]),
+        "NutritionCard": ("text/html", [fh.to_xml(food.NutritionCard(info)).encode()]),
+        "weight JSON": (
+            "application/json",
+            [client.get("/api/progress/weight?points=5000", headers=identity).content],
+        ),
+        "SSE stream": (
+            "text/event-stream",
+            [f"data: {word} \n\n".encode() for word in words],
+        ),
+    }
+
+
+def _replay_app(content_type: str, chunks: list[bytes]):
+    async def replay(scope, receive, send):
+        headers = [(b"content-type", content_type.encode())]
+        if len(chunks) == 1:
+            headers.append((b"content-length", str(len(chunks[0])).encode()))
+        await send({"type": "http.response.start", "status": 200, "headers": headers})
+        for i, chunk in enumerate(chunks):
+            await send({"type": "http.response.body", "body": chunk, "more_body": i < len(chunks) - 1})
+    return replay
+
+
+async def _measure(content_type: str, chunks: list[bytes], encoding: str, requests: int) -> tuple[int, float]:
+    """Return (bytes sent, median CPU seconds per request) for one encoding."""
+    middleware = CompressionMiddleware(_replay_app(content_type, chunks))
+    scope = {"type": "http", "headers": [(b"accept-encoding", encoding.encode())]}
+    sent = 0
+
+    async def send(message):
+        nonlocal sent
+        sent += len(message.get("body", b""))
+
+    timings = []
+    for _ in range(requests):
+        sent = 0
+        start = time.process_time()
+        await middleware(scope, None, send)
+        timings.append(time.process_time() - start)
+    return sent, statistics.median(timings)
+
+
+async def run(requests: int) -> None:
+    encodings = ["identity", "gzip"] + (["br"] if brotli is not None else [])
+    print(f"{'payload':<16}{'encoding':<10}{'bytes':>10}{'saved':>9}{'CPU/req':>12}{'extra CPU':>12}")
+    for name, (content_type, chunks) in _payloads().items():
+        baseline_bytes, baseline_cpu = await _measure(content_type, chunks, "identity", requests)
+        for encoding in encodings:
+            sent, cpu = await _measure(content_type, chunks, encoding, requests)
+            saved = 1 - sent / baseline_bytes
+            print(
+                f"{name:<16}{encoding:<10}{sent:>10}{saved:>9.1%}"
+                f"{cpu * 1e6:>10.1f}us{(cpu - baseline_cpu) * 1e6:>10.1f}us"
+            )
+    if brotli is None:
+        print("(install `brotli` to include br)")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--requests", type=int, default=200, help="Requests per measurement")
+    args = parser.parse_args()
+    _seed_measurements()
+    asyncio.run(run(args.requests))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,308 @@
+"""A local stand-in for the WHOOP API, with configurable latency and failures.
+
+Implements the endpoints the tracker clients use: the password and refresh-token grants
+on `/oauth/token`, the paginated `v1/cycle` and `v1/recovery` collections and
+`v1/cycle/{id}/recovery`. Data is a deterministic daily history ending now. Every API
+request can be delayed, and a fraction of them answered with `503` or with `429` and a
+`Retry-After`, to exercise the client's retry and rate limit handling. Use it from
+Python:
+
+    with FakeWhoopServer(cycles=365, latency=0.02) as server:
+        whoop = server.client(Whoop)(username="a", password="b")
+
+or run it on its own for manual testing:
+
+    python benchmarks/fake_whoop.py --port 8765 [--latency S] [--error-rate P] [--throttle-rate P]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import random
+import secrets
+import threading
+import time
+from urllib.parse import parse_qsl, urlsplit
+
+USER_ID = 10129
+TOKEN_TTL = 3600
+
+
+def _iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def _parse_iso(value: str) -> datetime:
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def make_history(days: int, now: datetime | None = None) -> tuple[list[dict], dict[int, dict]]:
+    """Return (cycles newest first, recovery by cycle id) for `days` daily cycles.
+
+    The most recent cycle is the current one: it has no end yet.
+    """
+    now = now or datetime.now(timezone.utc)
+    rng = random.Random(days)
+    first_start = (now - timedelta(days=days - 1)).replace(hour=6, minute=30, second=0, microsecond=0)
+    cycles, recoveries = [], {}
+    for day in range(days):
+        start = first_start + timedelta(days=day)
+        end = start + timedelta(days=1)
+        cycle_id = 93845 + day
+        cycles.append({
+            "id": cycle_id,
+            "user_id": USER_ID,
+            "created_at": _iso(start),
+            "updated_at": _iso(min(end, now)),
+            "start": _iso(start),
+            "end": _iso(end) if end <= now else None,
+            "timezone_offset": "+00:00",
+            "score_state": "SCORED",
+            "score": {
+                "strain": round(rng.uniform(4, 18), 4),
+                "kilojoule": round(rng.uniform(7000, 12000), 1),
+                "average_heart_rate": rng.randint(60, 80),
+                "max_heart_rate": rng.randint(140, 190),
+            },
+        })
+        recoveries[cycle_id] = {
+            "cycle_id": cycle_id,
+            "sleep_id": 10235 + day,
+            "user_id": USER_ID,
+            "created_at": _iso(start),
+            "updated_at": _iso(start + timedelta(minutes=5)),
+            "score_state": "SCORED",
+            "score": {
+                "user_calibrating": False,
+                "recovery_score": rng.randint(20, 99),
+                "resting_heart_rate": rng.randint(45, 65),
+                "hrv_rmssd_milli": round(rng.uniform(30, 90), 3),
+                "spo2_percentage": round(rng.uniform(94, 99), 3),
+                "skin_temp_celsius": round(rng.uniform(33, 35), 3),
+            },
+        }
+    cycles.reverse()
+    return cycles, recoveries
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    server: "_Server"
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        url = urlsplit(self.path)
+        if url.path != "/oauth/token":
+            return self._send(404, {"error": "not_found"})
+        length = int(self.headers.get("Content-Length", 0))
+        raw = self.rfile.read(length).decode()
+        try:
+            body = json.loads(raw or "{}")
+        except json.JSONDecodeError:
+            body = dict(parse_qsl(raw))
+
+        fake = self.server.fake
+        fake.delay()
+        with fake.lock:
+            fake.token_requests += 1
+            grant = body.get("grant_type")
+            if grant == "password":
+                valid = bool(body.get("username")) and bool(body.get("password"))
+            elif grant == "refresh_token":
+                valid = body.get("refresh_token") in fake.refresh_tokens
+            else:
+                valid = False
+            if not valid:
+                return self._send(401, {"error": "invalid_grant"})
+            access, refresh = secrets.token_hex(16), secrets.token_hex(16)
+            fake.access_tokens[access] = time.time() + fake.token_ttl
+            fake.refresh_tokens.add(refresh)
+        self._send(200, {
+            "access_token": access,
+            "refresh_token": refresh,
+            "expires_in": fake.token_ttl,
+            "token_type": "bearer",
+            "scope": "offline",
+            "user": {"id": USER_ID},
+        })
+
+    def do_GET(self):
+        url = urlsplit(self.path)
+        fake = self.server.fake
+        fake.delay()
+
+        token = self.headers.get("Authorization", "").removeprefix("Bearer ")
+        with fake.lock:
+            fake.requests += 1
+            authorized = fake.access_tokens.get(token, 0) > time.time()
+            roll = fake.rng.random()
+        if not authorized:
+            return self._send(401, {"error": "unauthorized"})
+        if roll < fake.throttle_rate:
+            with fake.lock:
+                fake.throttled += 1
+            return self._send(429, {"error": "rate_limited"}, {"Retry-After": str(fake.retry_after)})
+        if roll < fake.throttle_rate + fake.error_rate:
+            with fake.lock:
+                fake.errors += 1
+            return self._send(503, {"error": "unavailable"})
+
+        parts = url.path.removeprefix("/developer/").split("/")
+        params = dict(parse_qsl(url.query))
+        if parts == ["v1", "cycle"]:
+            return self._send(200, self._page(fake.cycles, params, lambda c: c))
+        if parts == ["v1", "recovery"]:
+            return self._send(
+                200, self._page(fake.cycles, params, lambda c: fake.recoveries[c["id"]])
+            )
+        if len(parts) == 4 and parts[:2] == ["v1", "cycle"] and parts[3] == "recovery":
+            recovery = fake.recoveries.get(int(parts[2])) if parts[2].isdigit() else None
+            if recovery is not None:
+                return self._send(200, recovery)
+        self._send(404, {"error": "not_found"})
+
+    @staticmethod
+    def _page(cycles: list[dict], params: dict[str, str], record) -> dict:
+        """One page of a collection, filtered on cycle start like the real API."""
+        start = _parse_iso(params["start"]) if "start" in params else None
+        end = _parse_iso(params["end"]) if "end" in params else None
+        matching = [
+            cycle for cycle in cycles
+            if (start is None or _parse_iso(cycle["start"]) >= start)
+            and (end is None or _parse_iso(cycle["start"]) < end)
+        ]
+        limit = min(int(params.get("limit", 10)), 25)
+        offset = int(params.get("nextToken", 0))
+        page = matching[offset:offset + limit]
+        more = offset + limit < len(matching)
+        return {
+            "records": [record(cycle) for cycle in page],
+            "next_token": str(offset + limit) if more else None,
+        }
+
+    def _send(self, status: int, payload: dict, headers: dict[str, str] | None = None) -> None:
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+
+class _Server(ThreadingHTTPServer):
+    daemon_threads = True
+    fake: "FakeWhoopServer"
+
+
+class FakeWhoopServer:
+    """Runs the fake API on a background thread. Use as a context manager.
+
+    Attributes:
+        auth_url (str): Value for the client's `AUTH_URL`.
+        request_url (str): Value for the client's `REQUEST_URL`.
+        latency (float): Seconds added to every request.
+        error_rate (float): Fraction of API requests answered with `503`.
+        throttle_rate (float): Fraction of API requests answered with `429`.
+        retry_after (float): `Retry-After` seconds sent with each `429`.
+        token_ttl (int): Lifetime of issued access tokens, in seconds.
+        requests (int): API requests received (excluding token requests).
+        token_requests (int): Token requests received.
+        throttled (int): `429` responses sent.
+        errors (int): `503` responses sent.
+    """
+    def __init__(
+            self,
+            cycles: int = 365,
+            latency: float = 0.0,
+            error_rate: float = 0.0,
+            throttle_rate: float = 0.0,
+            retry_after: float = 0,
+            token_ttl: int = TOKEN_TTL,
+            seed: int = 0,
+            host: str = "127.0.0.1",
+            port: int = 0,
+        ):
+        """
+        Args:
+            cycles: Days of history to serve.
+            latency: Seconds added to every request.
+            error_rate: Fraction of API requests answered with `503`.
+            throttle_rate: Fraction of API requests answered with `429`.
+            retry_after: `Retry-After` seconds sent with each `429`.
+            token_ttl: Lifetime of issued access tokens, in seconds.
+            seed: Seed for the failure injection.
+            host: Interface to listen on.
+            port: Port to listen on; 0 picks a free one.
+        """
+        self.cycles, self.recoveries = make_history(cycles)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.token_ttl = token_ttl
+        self.requests = 0
+        self.token_requests = 0
+        self.throttled = 0
+        self.errors = 0
+        self.lock = threading.Lock()
+        self.rng = random.Random(seed)
+        self.access_tokens: dict[str, float] = {}
+        self.refresh_tokens: set[str] = set()
+
+        self._server = _Server((host, port), _Handler)
+        self._server.fake = self
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.auth_url = f"http://{host}:{self._server.server_address[1]}"
+        self.request_url = f"{self.auth_url}/developer"
+
+    def delay(self) -> None:
+        if self.latency:
+            time.sleep(self.latency)
+
+    def client(self, cls: type) -> type:
+        """Return a subclass of a WHOOP client class that talks to this server."""
+        return type(f"Local{cls.__name__}", (cls,), {
+            "AUTH_URL": self.auth_url, "REQUEST_URL": self.request_url,
+        })
+
+    def reset_counters(self) -> None:
+        with self.lock:
+            self.requests = self.token_requests = self.throttled = self.errors = 0
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--cycles", type=int, default=365, help="Days of history")
+    parser.add_argument("--latency", type=float, default=0.0, help="Seconds per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429s")
+    args = parser.parse_args()
+
+    with FakeWhoopServer(
+        cycles=args.cycles, latency=args.latency, error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate, port=args.port,
+    ) as server:
+        print(f"AUTH_URL={server.auth_url} REQUEST_URL={server.request_url}")
+        try:
+            threading.Event().wait()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
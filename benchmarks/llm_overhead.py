@@ -0,0 +1,93 @@
+"""Measure the per-call framework overhead of the nutrition assistants.
+
+Calls go to a local stub of the OpenAI API, so the network and the model are out of the
+picture. The raw `openai` client call to the same stub is the baseline; the difference is
+what our code and ell add per call. Run with:
+
+    python benchmarks/llm_overhead.py [--calls N]
+"""
+import argparse
+import statistics
+import time
+
+import openai
+
+from fit.nutrition.assistants import FoodAssistant, NutritionLogger
+from fit.nutrition.data import Goals, NutritionalInfo
+
+from stub_openai import StubOpenAIServer
+
+MODEL = "gpt-4o-2024-08-06"
+
+
+def _time_calls(fn, calls: int) -> list[float]:
+    fn()  # exclude one-time setup from the measurement
+    timings = []
+    for _ in range(calls):
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def _report(name: str, timings: list[float], baseline: float | None = None) -> None:
+    median = statistics.median(timings)
+    line = f"{name:<28} median {median * 1e3:8.3f} ms   p95 {sorted(timings)[int(len(timings) * 0.95)] * 1e3:8.3f} ms"
+    if baseline is not None:
+        line += f"   overhead {(median - baseline) * 1e3:8.3f} ms"
+    print(line)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=200, help="Calls per measurement")
+    args = parser.parse_args()
+
+    with StubOpenAIServer() as server:
+        client = openai.OpenAI(base_url=server.base_url, api_key="stub")
+        logger = NutritionLogger(model=MODEL, client=client)
+        assistant = FoodAssistant(model=MODEL, client=client)
+        logger.warm_up()
+        assistant.warm_up()
+
+        intake = NutritionalInfo.model_validate({
+            name: ("breakfast" if name == "summary" else 10.0)
+            for name in NutritionalInfo.model_fields
+        })
+
+        raw_parse = _time_calls(
+            lambda: client.beta.chat.completions.parse(
+                model=MODEL,
+                messages=[{"role": "user", "content": "2 eggs and toast"}],
+                response_format=NutritionalInfo,
+            ),
+            args.calls,
+        )
+        _report("raw structured call", raw_parse)
+        _report(
+            "natural_language_macros",
+            _time_calls(lambda: logger.natural_language_macros("2 eggs and toast"), args.calls),
+            statistics.median(raw_parse),
+        )
+
+        def raw_stream():
+            for _ in client.chat.completions.create(
+                model=MODEL,
+                messages=[{"role": "user", "content": "meal ideas"}],
+                stream=True,
+                stream_options={"include_usage": True},
+            ):
+                pass
+
+        raw_text = _time_calls(raw_stream, args.calls)
+        _report("raw text call", raw_text)
+        _report(
+            "make_recommendations",
+            _time_calls(
+                lambda: assistant.make_recommendations(2500, Goals.GAIN_MUSCLE, intake), args.calls
+            ),
+            statistics.median(raw_text),
+        )
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+"""Measure web app start-up: cold import time and time to first response.
+
+Each sample runs in a fresh interpreter in an empty working directory, so nothing is
+cached in-process and the database is created from scratch. Reported per sample:
+
+- import: `import fit.web.app` (which builds the app with `create_app()`)
+- startup: the app's startup hooks (resource warm-up)
+- first /food, first /progress: the first request to a static page and to a page that
+  reads the database
+
+Run with:
+
+    python benchmarks/startup.py [--runs N] [--warmup]
+
+`--warmup` includes the LLM client warm-up in the startup hooks (FIT_LLM_WARMUP=1).
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+
+SAMPLE = r"""
+import json, time
+start = time.perf_counter()
+import fit.web.app
+imported = time.perf_counter()
+
+from starlette.testclient import TestClient
+with TestClient(fit.web.app.app) as client:
+    started = time.perf_counter()
+    assert client.get("/food").status_code == 200
+    food = time.perf_counter()
+    assert client.get("/progress").status_code == 200
+    progress = time.perf_counter()
+
+print(json.dumps({
+    "import": imported - start,
+    "startup": started - imported,
+    "first /food": food - started,
+    "first /progress": progress - food,
+    "total": progress - start,
+}))
+"""
+
+
+def _sample(warmup: bool) -> dict[str, float]:
+    src = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "src")
+    env = {
+        **os.environ,
+        "PYTHONPATH": os.pathsep.join(filter(None, [src, os.environ.get("PYTHONPATH")])),
+        "FIT_LLM_WARMUP": "1" if warmup else "0",
+    }
+    with tempfile.TemporaryDirectory(prefix="fit-bench-") as cwd:
+        result = subprocess.run(
+            [sys.executable, "-c", SAMPLE], cwd=cwd, env=env,
+            capture_output=True, text=True, check=True,
+        )
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--runs", type=int, default=5, help="Fresh processes to sample")
+    parser.add_argument("--warmup", action="store_true", help="Include the LLM client warm-up")
+    args = parser.parse_args()
+
+    _sample(args.warmup)  # populate the bytecode cache, as on a deployed server
+    samples = [_sample(args.warmup) for _ in range(args.runs)]
+    for name in samples[0]:
+        values = [sample[name] for sample in samples]
+        print(f"{name:<18} median {statistics.median(values) * 1e3:8.1f} ms   max {max(values) * 1e3:8.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,109 @@
+"""A local stand-in for the OpenAI chat completions API.
+
+Answers every request instantly with a canned completion, so benchmarks measure only the
+client-side cost of a model call. Structured-output requests (with a `response_format`)
+get a zeroed `NutritionalInfo`-shaped object; plain requests get a short text reply,
+streamed as server-sent events when the request asks for `stream`.
+"""
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import json
+import threading
+import time
+
+from fit.nutrition.data import NutritionalInfo, NutritionalInfoBatch
+
+TEXT_REPLY = "1. Grilled chicken with rice\n2. Greek yogurt with berries\n3. Lentil soup"
+
+
+def _zero_info() -> dict:
+    return {
+        name: ("stub meal" if name == "summary" else 0.0)
+        for name in NutritionalInfo.model_fields
+    }
+
+
+def _structured_reply(response_format: dict) -> str:
+    schema_name = response_format.get("json_schema", {}).get("name", "")
+    if schema_name == NutritionalInfoBatch.__name__:
+        return json.dumps({"items": [_zero_info()]})
+    return json.dumps(_zero_info())
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+
+    def log_message(self, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length", 0))
+        request = json.loads(self.rfile.read(length) or b"{}")
+        created = int(time.time())
+        base = {"id": "chatcmpl-stub", "created": created, "model": request.get("model", "stub")}
+        usage = {"prompt_tokens": 1, "completion_tokens": 1, "total_tokens": 2}
+
+        if request.get("stream"):
+            self.send_response(200)
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Transfer-Encoding", "chunked")
+            self.end_headers()
+            tokens = TEXT_REPLY.split(" ")
+            for i, token in enumerate(tokens):
+                delta = {"content": token + (" " if i < len(tokens) - 1 else "")}
+                if i == 0:
+                    delta["role"] = "assistant"
+                chunk = {**base, "object": "chat.completion.chunk",
+                         "choices": [{"index": 0, "delta": delta, "finish_reason": None}]}
+                self._write_chunk(f"data: {json.dumps(chunk)}\n\n")
+            final = {**base, "object": "chat.completion.chunk",
+                     "choices": [{"index": 0, "delta": {}, "finish_reason": "stop"}], "usage": usage}
+            self._write_chunk(f"data: {json.dumps(final)}\n\n")
+            self._write_chunk("data: [DONE]\n\n")
+            self._write_chunk("")
+            return
+
+        if request.get("response_format"):
+            content = _structured_reply(request["response_format"])
+        else:
+            content = TEXT_REPLY
+        body = json.dumps({
+            **base,
+            "object": "chat.completion",
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content, "refusal": None},
+                "finish_reason": "stop",
+            }],
+            "usage": usage,
+        }).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _write_chunk(self, text: str) -> None:
+        data = text.encode()
+        self.wfile.write(f"{len(data):x}\r\n".encode() + data + b"\r\n")
+        self.wfile.flush()
+
+
+class StubOpenAIServer:
+    """Runs the stub API on a background thread. Use as a context manager.
+
+    Attributes:
+        base_url (str): URL to pass as `base_url` to an `openai.OpenAI` client.
+    """
+    def __init__(self, host: str = "127.0.0.1", port: int = 0):
+        self._server = ThreadingHTTPServer((host, port), _Handler)
+        self._thread = threading.Thread(target=self._server.serve_forever, daemon=True)
+        self.base_url = f"http://{host}:{self._server.server_address[1]}/v1"
+
+    def __enter__(self):
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc_info):
+        self._server.shutdown()
+        self._server.server_close()
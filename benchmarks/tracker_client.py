@@ -0,0 +1,135 @@
+"""Measure the WHOOP tracker clients against a local fake of the WHOOP API.
+
+Requests go to `fake_whoop.py` on localhost, so results depend only on the client code
+and the injected server behaviour. Reported:
+
+- auth: first authentication with the password grant, and with a token already in the
+  token store (a new process reusing a stored token)
+- single metric: `resting_heart_rate` and `calories_burned` with a cold response cache,
+  and with a warm one
+- backfill: `iter_cycles` and `iter_recoveries` over the whole history, in records/sec,
+  plus the retries and 429s seen when failures are injected
+
+Run with:
+
+    python benchmarks/tracker_client.py [--calls N] [--cycles N] [--latency S]
+        [--error-rate P] [--throttle-rate P]
+
+Client-side rate limiting is disabled so that the client itself is measured; 429s and
+503s injected by the server are still retried by the transport.
+"""
+import argparse
+import os
+import statistics
+import tempfile
+import time
+
+os.environ.setdefault("AUTHLIB_INSECURE_TRANSPORT", "1")  # the fake server is plain http
+
+from fit.trackers.implementations.whoop import Whoop
+from fit.trackers.tokens import TokenStore
+from fit.trackers.transport import RateLimitedTransport
+
+from fake_whoop import FakeWhoopServer
+
+
+def _transport() -> RateLimitedTransport:
+    """No client-side limits, quick backoff: injected failures are still retried."""
+    return RateLimitedTransport(
+        [], backoff_base=0.01, backoff_max=0.1,
+        retry_exceptions=Whoop.default_transport().retry_exceptions,
+    )
+
+
+def _report(name: str, timings: list[float]) -> None:
+    median = statistics.median(timings)
+    p95 = sorted(timings)[int(len(timings) * 0.95)]
+    print(f"{name:<34} median {median * 1e3:8.3f} ms   p95 {p95 * 1e3:8.3f} ms")
+
+
+def _time(fn, calls: int, setup=None) -> list[float]:
+    timings = []
+    for _ in range(calls):
+        if setup is not None:
+            setup()
+        start = time.perf_counter()
+        fn()
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def bench_auth(server: FakeWhoopServer, calls: int, tmp: str) -> None:
+    LocalWhoop = server.client(Whoop)
+
+    def fresh_password():
+        path = os.path.join(tmp, f"tokens-{time.perf_counter_ns()}.json")
+        return LocalWhoop("user@example.com", "pw", token_store=TokenStore(path), transport=_transport())
+
+    clients = []
+    _report("auth: password grant", _time(
+        lambda: clients[-1]._ensure_authenticated(), calls, lambda: clients.append(fresh_password())
+    ))
+
+    stored = TokenStore(os.path.join(tmp, "tokens.json"))
+    LocalWhoop("user@example.com", "pw", token_store=stored, transport=_transport())._ensure_authenticated()
+    _report("auth: stored token", _time(
+        lambda: clients[-1]._ensure_authenticated(), calls,
+        lambda: clients.append(
+            LocalWhoop("user@example.com", "pw", token_store=stored, transport=_transport())
+        ),
+    ))
+
+
+def bench_single_metric(server: FakeWhoopServer, calls: int, tmp: str) -> None:
+    store = TokenStore(os.path.join(tmp, "tokens.json"))
+    whoop = server.client(Whoop)("user@example.com", "pw", token_store=store, transport=_transport())
+    whoop.resting_heart_rate()
+
+    _report("resting_heart_rate (cold cache)", _time(
+        whoop.resting_heart_rate, calls, whoop.invalidate_cache
+    ))
+    _report("calories_burned (cold cache)", _time(
+        whoop.calories_burned, calls, whoop.invalidate_cache
+    ))
+    _report("resting_heart_rate (warm cache)", _time(whoop.resting_heart_rate, calls))
+
+
+def bench_backfill(server: FakeWhoopServer, tmp: str) -> None:
+    store = TokenStore(os.path.join(tmp, "tokens.json"))
+    transport = _transport()
+    whoop = server.client(Whoop)("user@example.com", "pw", token_store=store, transport=transport)
+    whoop.calories_burned()
+
+    for name, fetch in (("iter_cycles", whoop.iter_cycles), ("iter_recoveries", whoop.iter_recoveries)):
+        server.reset_counters()
+        retried = transport.retried
+        start = time.perf_counter()
+        records = sum(1 for _ in fetch())
+        elapsed = time.perf_counter() - start
+        print(
+            f"backfill {name:<25} {records / elapsed:10.0f} records/s"
+            f"   ({records} records, {server.requests} requests,"
+            f" {transport.retried - retried} retried, {server.throttled} throttled)"
+        )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--calls", type=int, default=100, help="Calls per measurement")
+    parser.add_argument("--cycles", type=int, default=3 * 365, help="Days of history served")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server latency in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of 503s")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Fraction of 429s")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="fit-bench-") as tmp, FakeWhoopServer(
+        cycles=args.cycles, latency=args.latency,
+        error_rate=args.error_rate, throttle_rate=args.throttle_rate,
+    ) as server:
+        bench_auth(server, args.calls, tmp)
+        bench_single_metric(server, args.calls, tmp)
+        bench_backfill(server, tmp)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,56 +1,282 @@
+from collections import Counter
+import functools
+from types import SimpleNamespace
+from typing import Any, Iterator
+
 import ell 
-from fit.nutrition.data import NutritionalInfo, Goals
+from ell.types import ImageContent
+from fit.nutrition.cache import MacroCache
+from fit.nutrition.data import NutritionalInfo, NutritionalInfoBatch, Goals
+from fit.nutrition.food_db import FoodDatabase
+from fit.nutrition.images import prepare_image
+
+# Limits for one batched request: enough items to amortize the per-request overhead,
+# while keeping the structured response (~150 output tokens per item) well inside the
+# model's output limit.
+MAX_BATCH_ITEMS = 20
+MAX_BATCH_INPUT_TOKENS = 2000
+
+
+def _estimate_tokens(text: str) -> int:
+    """Rough token count for English text (about 4 characters per token)."""
+    return len(text) // 4 + 1
+
+
+def _chunk_by_token_budget(
+        texts: list[str], max_items: int, max_tokens: int
+    ) -> list[list[int]]:
+    """Split `texts` into chunks of indices that each fit the item and token budgets."""
+    chunks, chunk, chunk_tokens = [], [], 0
+    for i, text in enumerate(texts):
+        tokens = _estimate_tokens(text) + 4  # list numbering and newline
+        if chunk and (len(chunk) == max_items or chunk_tokens + tokens > max_tokens):
+            chunks.append(chunk)
+            chunk, chunk_tokens = [], 0
+        chunk.append(i)
+        chunk_tokens += tokens
+    if chunk:
+        chunks.append(chunk)
+    return chunks
+
+
+IMAGE_MACROS_PROMPT = """given an image of what the user ate, return the macro nutrients in grams.
+If the image is not food, return 0 for all macros.
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def _nutrition_programs(model: str, client: Any = None) -> SimpleNamespace:
+    """Build the nutrition language model programs for `model` once and share them."""
+    @ell.complex(model=model, client=client, response_format=NutritionalInfo)
+    def _natural_language_macros(food: str) -> NutritionalInfo:
+        """given what the user ate, return the macro nutrients in grams.
+        If the user query is not food, return 0 for all macros.
+        """
+        return food
+
+    @ell.complex(model=model, client=client, response_format=NutritionalInfoBatch)
+    def _natural_language_macros_batch(food_list: str) -> NutritionalInfoBatch:
+        """given a numbered list of what the user ate, return the macro nutrients in grams
+        for each item. Return exactly one entry per numbered item, in the same order.
+        If an item is not food, return 0 for all of its macros.
+        """
+        return food_list
+
+    @ell.complex(model=model, client=client, response_format=NutritionalInfo)
+    def _image_macros(image_url: str) -> NutritionalInfo:
+        # ell only uses the docstring as the system prompt when the LMP returns a string.
+        return [
+            ell.system(IMAGE_MACROS_PROMPT),
+            ell.user([ImageContent(url=image_url)]),
+        ]
+
+    return SimpleNamespace(
+        natural_language_macros=_natural_language_macros,
+        natural_language_macros_batch=_natural_language_macros_batch,
+        image_macros=_image_macros,
+    )
+
+
+RECOMMENDATIONS_PROMPT = """given the user's caloric burn and weight goals, provide the user with 3 meal options.
+Ensure that your response is concise and easy to understand.
+"""
+
+
+def _recommendations_input(caloric_burn: float, goal: Goals, prior_intake: NutritionalInfo) -> str:
+    return f"""
+    The user's caloric burn for the day is {caloric_burn} calories. 
+    The user's goal is to {goal.value}. 
+    The user's prior intake for the day is {prior_intake.protein}g protein, 
+    {prior_intake.carbs}g carbs, and {prior_intake.fat}g fat.
+    """
+
+
+@functools.lru_cache(maxsize=None)
+def _recommendation_programs(model: str, client: Any = None) -> SimpleNamespace:
+    """Build the recommendation language model programs for `model` once and share them."""
+    @ell.simple(model=model, client=client)
+    def _make_recommendations(
+            caloric_burn: float, goal: Goals, prior_intake: NutritionalInfo
+        ) -> str:
+        return [
+            ell.system(RECOMMENDATIONS_PROMPT),
+            ell.user(_recommendations_input(caloric_burn, goal, prior_intake)),
+        ]
+
+    return SimpleNamespace(make_recommendations=_make_recommendations)
+
+
+def _warm_up_client(model: str, client: Any) -> None:
+    """Resolve the provider client for `model` so the first request does not pay for it."""
+    if client is None:
+        ell.config.get_client_for(model)
 
 
 class NutritionLogger:
-    """A class that uses LLMs to help with nutrition tracking."""
-    def __init__(self, model: str = "gpt-4o-2024-08-06"):
+    """A class that uses LLMs to help with nutrition tracking.
+
+    The language model programs are built once per model and shared between instances,
+    rather than being redefined on every call.
+    """
+    def __init__(
+            self,
+            model: str = "gpt-4o-2024-08-06",
+            cache: MacroCache | None = None,
+            client: Any = None,
+            food_db: FoodDatabase | None = None,
+        ):
         """
         Args:
             model: The LLM to use.
+            cache: Optional persistent cache of text results. Entries are keyed by model,
+                so changing `model` never serves results from the previous one.
+            client: Optional provider client (e.g. an `openai.OpenAI`) to call the model
+                through. Defaults to the client ell resolves for `model`.
+            food_db: Optional local food table. Simple single-food descriptions it
+                matches confidently are answered without the cache or the model.
         """
+        self.client = client
         self.model = model
+        self.cache = cache
+        self.food_db = food_db
+        self.source_counts: Counter[str] = Counter()
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @model.setter
+    def model(self, model: str) -> None:
+        self._model = model
+        self._programs = _nutrition_programs(model, self.client)
+
+    def warm_up(self) -> None:
+        """Do the one-time setup of the model call path ahead of the first request."""
+        _warm_up_client(self.model, self.client)
+        NutritionalInfo.model_json_schema()
+        NutritionalInfoBatch.model_json_schema()
 
     def natural_language_macros(self, food: str) -> NutritionalInfo:
         """Returns the macro nutrients in grams and kilocalories for food described in plain text.
         Args:
             food: The food to get the macro nutrients for.
         """
-        @ell.complex(model=self.model, response_format=NutritionalInfo)
-        def _natural_language_macros(food: str) -> NutritionalInfo:
-            """given what the user ate, return the macro nutrients in grams.
-            If the user query is not food, return 0 for all macros.
-            """
-            return food
-        
-        message = _natural_language_macros(food)
-        return message.content[0].parsed
+        local = self._local_macros(food)
+        if local is not None:
+            return local
+
+        if self.cache is not None:
+            cached = self.cache.get(food, self.model)
+            if cached is not None:
+                self.source_counts["cache"] += 1
+                return cached
+
+        message = self._programs.natural_language_macros(food)
+        nutrition_info = message.content[0].parsed
+        self.source_counts["llm"] += 1
+        if self.cache is not None:
+            self.cache.set(food, self.model, nutrition_info)
+        return nutrition_info
+
+    def _local_macros(self, food: str) -> NutritionalInfo | None:
+        """Answer `food` from the local food table, if it has a confident match."""
+        if self.food_db is None:
+            return None
+        match = self.food_db.match(food)
+        if match is None:
+            return None
+        self.source_counts["local"] += 1
+        return match.nutritional_info(food)
     
     
-    def image_macros(self, image: str) -> NutritionalInfo:
+    def natural_language_macros_batch(self, foods: list[str]) -> list[NutritionalInfo]:
+        """Returns the macro nutrients for many foods described in plain text, in input order.
+
+        Foods in the local food table or the cache are answered directly; the rest are packed into as few model
+        requests as the batch limits allow. If the model returns the wrong number of items
+        for a chunk, that chunk falls back to one request per food.
+        Args:
+            foods: The foods to get the macro nutrients for.
+        """
+        results: list[NutritionalInfo | None] = [None] * len(foods)
+        pending = []
+        for i, food in enumerate(foods):
+            results[i] = self._local_macros(food)
+            if results[i] is None and self.cache is not None:
+                results[i] = self.cache.get(food, self.model)
+                if results[i] is not None:
+                    self.source_counts["cache"] += 1
+            if results[i] is None:
+                pending.append(i)
+
+        pending_foods = [" ".join(foods[i].split()) for i in pending]
+        for chunk in _chunk_by_token_budget(pending_foods, MAX_BATCH_ITEMS, MAX_BATCH_INPUT_TOKENS):
+            food_list = "\n".join(f"{n}. {pending_foods[j]}" for n, j in enumerate(chunk, 1))
+            message = self._programs.natural_language_macros_batch(food_list)
+            items = message.content[0].parsed.items
+
+            if len(items) != len(chunk):
+                items = [self.natural_language_macros(foods[pending[j]]) for j in chunk]
+            else:
+                self.source_counts["llm"] += len(chunk)
+            for j, nutrition_info in zip(chunk, items):
+                results[pending[j]] = nutrition_info
+                if self.cache is not None:
+                    self.cache.set(foods[pending[j]], self.model, nutrition_info)
+        return results
+
+    def image_macros(self, image: bytes | str) -> NutritionalInfo:
         """Returns the macro nutrients in grams and kilocalories for food described in an image.
+
+        The image is stripped of metadata and downscaled to the resolution the model
+        actually uses before it is sent. Near-duplicates of previously analysed images are
+        served from the cache.
         Args:
-            image: The image to get the macro nutrients for.
+            image: The raw image file contents, or a path to the image.
         """
-        @ell.complex(model=self.model, response_format=NutritionalInfo)
-        def _image_macros(image: str) -> NutritionalInfo:
-            """given an image of what the user ate, return the macro nutrients in grams.
-            If the image is not food, return 0 for all macros.
-            """
-            return image
-        
-        message = _image_macros(image)
-        return message.content[0].parsed
+        if isinstance(image, str):
+            with open(image, "rb") as f:
+                image = f.read()
+        prepared = prepare_image(image)
+        # A zero hash means the image has no brightness gradients at all (e.g. a blank
+        # frame), so it says nothing about the meal and must not match other images.
+        use_cache = self.cache is not None and prepared.phash != 0
+
+        if use_cache:
+            cached = self.cache.get_image(prepared.phash, self.model)
+            if cached is not None:
+                return cached
+
+        message = self._programs.image_macros(prepared.data_url)
+        nutrition_info = message.content[0].parsed
+        if use_cache:
+            self.cache.set_image(prepared.phash, self.model, nutrition_info)
+        return nutrition_info
 
 
 class FoodAssistant:
     """A class that uses LLMs recommend foods. Based on the user's caloric burn and macro goals."""
-    def __init__(self, model: str = "gpt-4o-2024-08-06"):
+    def __init__(self, model: str = "gpt-4o-2024-08-06", client: Any = None):
         """
         Args:
             model: The LLM to use.
+            client: Optional provider client to call the model through.
         """
+        self.client = client
         self.model = model
+
+    @property
+    def model(self) -> str:
+        return self._model
+
+    @model.setter
+    def model(self, model: str) -> None:
+        self._model = model
+        self._programs = _recommendation_programs(model, self.client)
+
+    def warm_up(self) -> None:
+        """Do the one-time setup of the model call path ahead of the first request."""
+        _warm_up_client(self.model, self.client)
     
     def make_recommendations(
             self, caloric_burn: float, goal: Goals, prior_intake: NutritionalInfo
@@ -61,19 +287,29 @@ class FoodAssistant:
             goal: The user's weight goals.
             prior_intake: The user's prior intake for the day.
         """
-        @ell.simple(model=self.model)
-        def _make_recommendations(
-                caloric_burn: float, goal: Goals, prior_intake: NutritionalInfo
-            ) -> str:
-            """given the user's caloric burn and weight goals, provide the user with 3 meal options.
-            Ensure that your response is concise and easy to understand.
-            """
-            user_input = f"""
-            The user's caloric burn for the day is {caloric_burn} calories. 
-            The user's goal is to {goal.value}. 
-            The user's prior intake for the day is {prior_intake.protein}g protein, 
-            {prior_intake.carbs}g carbs, and {prior_intake.fat}g fat.
-            """
-            return user_input
-        
-        return _make_recommendations(caloric_burn, goal, prior_intake)
+        return self._programs.make_recommendations(caloric_burn, goal, prior_intake)
+
+    def stream_recommendations(
+            self, caloric_burn: float, goal: Goals, prior_intake: NutritionalInfo
+        ) -> Iterator[str]:
+        """Like `make_recommendations`, but yields the response text as it is generated.
+
+        ell returns only complete responses, so this calls the provider's streaming API
+        directly with the same prompt.
+        Args:
+            caloric_burn: The user's caloric burn for the day.
+            goal: The user's weight goals.
+            prior_intake: The user's prior intake for the day.
+        """
+        client = self.client or ell.config.get_client_for(self.model)[0]
+        stream = client.chat.completions.create(
+            model=self.model,
+            messages=[
+                {"role": "system", "content": RECOMMENDATIONS_PROMPT},
+                {"role": "user", "content": _recommendations_input(caloric_burn, goal, prior_intake)},
+            ],
+            stream=True,
+        )
+        for chunk in stream:
+            if chunk.choices and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
@@ -0,0 +1,242 @@
+import hashlib
+import json
+import os
+from pathlib import Path
+import re
+import sqlite3
+import threading
+import time
+import unicodedata
+
+from fit.nutrition.data import NutritionalInfo
+from fit.nutrition.images import hamming_distance
+
+CACHE_PATH = "data/llm_cache.db"
+
+_NUMBER_WORDS = {
+    "one": 1, "two": 2, "three": 3, "four": 4, "five": 5, "six": 6, "seven": 7,
+    "eight": 8, "nine": 9, "ten": 10, "eleven": 11, "twelve": 12, "dozen": 12,
+    "half": 0.5, "quarter": 0.25,
+}
+
+
+def _format_number(value: float) -> str:
+    return f"{value:.3f}".rstrip("0").rstrip(".")
+
+
+def normalize_food_text(text: str) -> str:
+    """Normalize a meal description so trivially different phrasings share a cache key.
+
+    Lowercases, folds unicode, drops punctuation, collapses whitespace and writes every
+    quantity the same way ("Two eggs", "2 eggs!", "2.0 eggs" and "2x eggs" all become
+    "2 eggs"; "1 1/2 cups" and "1.5 cups" both become "1.5 cups").
+    """
+    text = unicodedata.normalize("NFKC", text).lower().replace("⁄", "/").replace("&", " and ")
+    text = re.sub(r"(\d),(\d{3})\b", r"\1\2", text)
+    text = re.sub(
+        r"(\d+)\s+(\d+)\s*/\s*(\d+)",
+        lambda m: _format_number(int(m[1]) + int(m[2]) / int(m[3])) if int(m[3]) else m[0],
+        text,
+    )
+    text = re.sub(
+        r"(\d+)\s*/\s*(\d+)",
+        lambda m: _format_number(int(m[1]) / int(m[2])) if int(m[2]) else m[0],
+        text,
+    )
+    text = re.sub(r"(\d)([^\W\d])", r"\1 \2", text)
+    text = re.sub(r"([^\W\d])(\d)", r"\1 \2", text)
+    text = re.sub(r"[^\w\s.]|(?<!\d)\.|\.(?!\d)", " ", text)
+
+    tokens = []
+    for token in text.split():
+        if token in _NUMBER_WORDS:
+            token = _format_number(_NUMBER_WORDS[token])
+        elif re.fullmatch(r"\d+(\.\d+)?|\.\d+", token):
+            token = _format_number(float(token))
+        elif token == "x" and tokens and re.fullmatch(r"[\d.]+", tokens[-1]):
+            continue
+        tokens.append(token)
+    return " ".join(tokens)
+
+
+class MacroCache:
+    """A persistent SQLite cache of parsed LLM nutrition results.
+
+    Text entries are keyed on the normalized food description plus the model name, so
+    switching models never returns another model's answer. Image entries are keyed on
+    a perceptual hash plus the model name, and a lookup matches any stored image within
+    `max_image_distance` bits, so re-uploads and recompressed copies of a photo hit. The
+    cache is bounded by least-recently-used eviction and entries expire after a TTL.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+        max_entries (int): Maximum number of entries kept, per kind (text or image).
+        ttl (float): Seconds an entry stays valid.
+        max_image_distance (int): Largest hash distance at which two images are
+            considered the same meal.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that were absent or expired.
+    """
+    def __init__(
+            self,
+            path: str = CACHE_PATH,
+            max_entries: int = 10_000,
+            ttl: float = 30 * 24 * 60 * 60,
+            max_image_distance: int = 4,
+        ):
+        """
+        Args:
+            path: Path of the SQLite database. Created if it does not exist.
+            max_entries: Maximum number of entries kept, per kind (text or image).
+            ttl: Seconds an entry stays valid.
+            max_image_distance: Largest hash distance at which two images match.
+        """
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self.max_image_distance = max_image_distance
+        self.hits = 0
+        self.misses = 0
+
+        Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS text_macros (
+                key TEXT PRIMARY KEY,
+                model TEXT NOT NULL,
+                normalized TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_text_macros_accessed_at ON text_macros(accessed_at);
+            CREATE TABLE IF NOT EXISTS image_macros (
+                id INTEGER PRIMARY KEY,
+                model TEXT NOT NULL,
+                phash TEXT NOT NULL,
+                payload TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                accessed_at REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS idx_image_macros_model ON image_macros(model);
+            CREATE INDEX IF NOT EXISTS idx_image_macros_accessed_at ON image_macros(accessed_at);
+            """
+        )
+
+    @staticmethod
+    def key(food: str, model: str) -> str:
+        """Return the cache key for a food description and model."""
+        normalized = normalize_food_text(food)
+        return hashlib.sha256(f"{model}\0{normalized}".encode()).hexdigest()
+
+    def get(self, food: str, model: str) -> NutritionalInfo | None:
+        """Return the cached result for `food` under `model`, if present and not expired."""
+        key = self.key(food, model)
+        now = time.time()
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT payload, created_at FROM text_macros WHERE key = ?", (key,)
+            ).fetchone()
+            if row is None or row[1] + self.ttl <= now:
+                if row is not None:
+                    self._conn.execute("DELETE FROM text_macros WHERE key = ?", (key,))
+                    self._conn.commit()
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE text_macros SET accessed_at = ? WHERE key = ?", (now, key)
+            )
+            self._conn.commit()
+            self.hits += 1
+        return NutritionalInfo.model_validate(json.loads(row[0]))
+
+    def set(self, food: str, model: str, info: NutritionalInfo) -> None:
+        """Store the result for `food` under `model`, evicting the least recently used entries."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT OR REPLACE INTO text_macros
+                    (key, model, normalized, payload, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                """,
+                (
+                    self.key(food, model), model, normalize_food_text(food),
+                    info.model_dump_json(), now, now,
+                ),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM text_macros WHERE key IN (
+                    SELECT key FROM text_macros ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def get_image(self, phash: int, model: str) -> NutritionalInfo | None:
+        """Return the cached result for the closest image to `phash` under `model`, if any."""
+        now = time.time()
+        with self._lock:
+            best = None
+            rows = self._conn.execute(
+                "SELECT id, phash, payload FROM image_macros WHERE model = ? AND created_at > ?",
+                (model, now - self.ttl),
+            )
+            for row_id, stored_hash, payload in rows:
+                distance = hamming_distance(phash, int(stored_hash, 16))
+                if distance <= self.max_image_distance and (best is None or distance < best[0]):
+                    best = (distance, row_id, payload)
+
+            if best is None:
+                self.misses += 1
+                return None
+
+            self._conn.execute(
+                "UPDATE image_macros SET accessed_at = ? WHERE id = ?", (now, best[1])
+            )
+            self._conn.commit()
+            self.hits += 1
+        return NutritionalInfo.model_validate(json.loads(best[2]))
+
+    def set_image(self, phash: int, model: str, info: NutritionalInfo) -> None:
+        """Store the result for an image with hash `phash` under `model`."""
+        now = time.time()
+        with self._lock:
+            self._conn.execute(
+                """
+                INSERT INTO image_macros (model, phash, payload, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?)
+                """,
+                (model, f"{phash:016x}", info.model_dump_json(), now, now),
+            )
+            self._conn.execute(
+                """
+                DELETE FROM image_macros WHERE id IN (
+                    SELECT id FROM image_macros ORDER BY accessed_at DESC LIMIT -1 OFFSET ?
+                )
+                """,
+                (self.max_entries,),
+            )
+            self._conn.commit()
+
+    def clear(self, model: str | None = None) -> None:
+        """Delete cached entries for `model`, or every entry if not given."""
+        with self._lock:
+            for table in ("text_macros", "image_macros"):
+                if model is None:
+                    self._conn.execute(f"DELETE FROM {table}")
+                else:
+                    self._conn.execute(f"DELETE FROM {table} WHERE model = ?", (model,))
+            self._conn.commit()
+
+    def stats(self) -> dict[str, int]:
+        """Return hit/miss counters and the number of stored entries."""
+        with self._lock:
+            (entries,) = self._conn.execute("SELECT COUNT(*) FROM text_macros").fetchone()
+            (images,) = self._conn.execute("SELECT COUNT(*) FROM image_macros").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "images": images}
@@ -26,4 +26,8 @@ class NutritionalInfo(BaseModel):
     iron: float = Field(description="the amount of iron in mg")
     potassium: float = Field(description="the amount of potassium in mg")
     sodium: float = Field(description="the amount of sodium in mg")
-    
\ No newline at end of file
+    
+
+class NutritionalInfoBatch(BaseModel):
+    """The nutritional information for several foods, in the order they were listed."""
+    items: list[NutritionalInfo] = Field(description="one entry per listed food, in the same order")
@@ -0,0 +1,225 @@
+"""A local food-composition table used to answer simple meal descriptions without an LLM."""
+from collections import Counter
+import csv
+from dataclasses import dataclass, field
+from pathlib import Path
+import re
+
+from fit.nutrition.cache import normalize_food_text
+from fit.nutrition.data import NutritionalInfo
+
+FOODS_PATH = Path(__file__).with_name("foods.csv")
+
+NUTRIENT_FIELDS = [name for name in NutritionalInfo.model_fields if name != "summary"]
+
+# Grams per unit for mass quantities ("150 g chicken breast", "2 oz cheddar").
+_MASS_UNITS = {
+    "g": 1.0, "gram": 1.0, "grams": 1.0, "gr": 1.0,
+    "kg": 1000.0,
+    "oz": 28.35, "ounce": 28.35, "ounces": 28.35,
+    "lb": 453.6, "lbs": 453.6, "pound": 453.6, "pounds": 453.6,
+}
+_SERVING_UNITS = {"serving", "servings", "portion", "portions"}
+_ARTICLES = {"a": 1.0, "an": 1.0, "one": 1.0}
+# Volume units, by the name used in the table's `serving` column. Volumes need a
+# density to convert, so they only apply to foods whose serving is in the same unit.
+_VOLUME_UNITS = {
+    "cup": "cup", "cups": "cup", "glass": "cup", "glasses": "cup",
+    "tbsp": "tbsp", "tablespoon": "tbsp", "tablespoons": "tbsp",
+    "tsp": "tsp", "teaspoon": "tsp", "teaspoons": "tsp",
+    "scoop": "scoop", "scoops": "scoop",
+    "can": "can", "cans": "can",
+}
+
+# Descriptions with more than one food are left to the LLM.
+_COMPOSITE = re.compile(r"\b(and|with|plus|or)\b|[,+;&]")
+
+# Words that carry no food identity, so they need not appear in the matched name.
+_FILLER_WORDS = {"of", "the", "some"}
+# A query word counts as present in a food's names when their trigram similarity is at
+# least this, which tolerates typos ("bananna") but not different words ("cookie").
+_MIN_WORD_SCORE = 0.7
+
+
+def _singular(word: str) -> str:
+    if len(word) > 3 and word.endswith("ies"):
+        return word[:-3] + "y"
+    if len(word) > 3 and word.endswith(("oes", "ches", "shes", "xes")):
+        return word[:-2]
+    if len(word) > 2 and word.endswith("s") and not word.endswith("ss"):
+        return word[:-1]
+    return word
+
+
+def _canonical(name: str) -> str:
+    return " ".join(_singular(word) for word in normalize_food_text(name).split())
+
+
+def _trigrams(text: str) -> set[str]:
+    padded = f"  {text} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _dice(a: set[str], b: set[str]) -> float:
+    return 2 * len(a & b) / (len(a) + len(b))
+
+
+@dataclass
+class FoodEntry:
+    """One row of the food table. Nutrients are per `serving`, which weighs `serving_grams`."""
+    name: str
+    serving: str
+    serving_grams: float
+    nutrients: dict[str, float]
+    aliases: list[str] = field(default_factory=list)
+
+
+@dataclass
+class FoodMatch:
+    """The result of looking up a description in the `FoodDatabase`."""
+    entry: FoodEntry
+    servings: float
+    score: float
+
+    def nutritional_info(self, description: str) -> NutritionalInfo:
+        return NutritionalInfo.model_validate({
+            "summary": description.strip()[:80],
+            **{
+                name: round(value * self.servings, 1)
+                for name, value in self.entry.nutrients.items()
+            },
+        })
+
+
+class FoodDatabase:
+    """An in-memory food table with a trigram index for fuzzy name matching.
+
+    A description is answered only when it names a single food, optionally with a
+    quantity ("2 eggs", "150g chicken breast", "a banana"), and its best match is both
+    close and clearly better than the runner-up. Every word of the description must
+    also appear in the matched food's name or aliases, so a dish named after an
+    ingredient ("spinach dip", "black bean soup") is not mistaken for the ingredient.
+    Anything else returns `None` so the caller can fall back to the LLM.
+
+    Attributes:
+        min_score (float): Minimum trigram similarity for a confident match.
+        min_margin (float): Minimum lead of the best match over the next distinct food.
+    """
+    def __init__(self, entries: list[FoodEntry], min_score: float = 0.8, min_margin: float = 0.1):
+        self.entries = entries
+        self.min_score = min_score
+        self.min_margin = min_margin
+
+        self._names: list[tuple[str, set[str], int]] = []
+        self._index: dict[str, list[int]] = {}
+        self._words: list[dict[str, set[str]]] = []
+        for entry_id, entry in enumerate(entries):
+            words = {}
+            for name in {entry.name, *entry.aliases}:
+                canonical = _canonical(name)
+                words.update((word, _trigrams(word)) for word in canonical.split())
+                grams = _trigrams(canonical)
+                for gram in grams:
+                    self._index.setdefault(gram, []).append(len(self._names))
+                self._names.append((canonical, grams, entry_id))
+            self._words.append(words)
+
+    @classmethod
+    def load(cls, path: str | Path = FOODS_PATH, **kwargs) -> "FoodDatabase":
+        """Load the food table from a CSV file (the bundled `foods.csv` by default)."""
+        entries = []
+        with open(path, newline="") as f:
+            for row in csv.DictReader(f):
+                entry = FoodEntry(
+                    name=row["name"],
+                    serving=row["serving"],
+                    serving_grams=float(row["serving_grams"]),
+                    nutrients={name: float(row[name]) for name in NUTRIENT_FIELDS},
+                    aliases=[alias for alias in row["aliases"].split(";") if alias],
+                )
+                entries.append(entry)
+        return cls(entries, **kwargs)
+
+    def match(self, food: str) -> FoodMatch | None:
+        """Return a confident match for `food`, or `None` if it should go to the LLM."""
+        text = normalize_food_text(food)
+        if not text or _COMPOSITE.search(text):
+            return None
+
+        parsed = self._parse_quantity(text)
+        if parsed is None:
+            return None
+        quantity, unit, name = parsed
+
+        canonical = _canonical(name)
+        query = _trigrams(canonical)
+        overlaps = Counter(
+            name_id for gram in query for name_id in self._index.get(gram, ())
+        )
+
+        best_by_entry: dict[int, float] = {}
+        for name_id, overlap in overlaps.items():
+            _, grams_of_name, entry_id = self._names[name_id]
+            score = 2 * overlap / (len(query) + len(grams_of_name))
+            best_by_entry[entry_id] = max(score, best_by_entry.get(entry_id, 0.0))
+        if not best_by_entry:
+            return None
+
+        ranked = sorted(best_by_entry.items(), key=lambda item: item[1], reverse=True)
+        entry_id, score = ranked[0]
+        runner_up = ranked[1][1] if len(ranked) > 1 else 0.0
+        if score < self.min_score or score - runner_up < self.min_margin:
+            return None
+        if not self._covers(entry_id, canonical):
+            return None
+
+        entry = self.entries[entry_id]
+        if unit is None:
+            servings = quantity
+        elif unit == "g":
+            servings = quantity / entry.serving_grams
+        else:
+            amount, _, serving_unit = entry.serving.partition(" ")
+            if _VOLUME_UNITS.get(serving_unit.split()[0] if serving_unit else "") != unit:
+                return None
+            servings = quantity / float(amount)
+        return FoodMatch(entry=entry, servings=servings, score=score)
+
+    def _covers(self, entry_id: int, canonical: str) -> bool:
+        """Whether every content word of `canonical` appears in the entry's names."""
+        words = self._words[entry_id]
+        for word in canonical.split():
+            if word in words or word in _FILLER_WORDS:
+                continue
+            grams = _trigrams(word)
+            if not any(_dice(grams, other) >= _MIN_WORD_SCORE for other in words.values()):
+                return False
+        return True
+
+    @staticmethod
+    def _parse_quantity(text: str) -> tuple[float, str | None, str] | None:
+        """Split a normalized description into (quantity, unit, food name).
+
+        `unit` is None when `quantity` counts servings, "g" when it is a mass in grams,
+        or a volume unit from `_VOLUME_UNITS`. Returns `None` if no food name is left.
+        """
+        tokens = text.split()
+        quantity, unit = 1.0, None
+
+        if tokens and re.fullmatch(r"\d+(\.\d+)?", tokens[0]):
+            quantity = float(tokens.pop(0))
+        elif tokens and tokens[0] in _ARTICLES:
+            quantity = _ARTICLES[tokens.pop(0)]
+
+        if tokens and tokens[0] in _MASS_UNITS:
+            quantity, unit = quantity * _MASS_UNITS[tokens.pop(0)], "g"
+        elif tokens and tokens[0] in _VOLUME_UNITS:
+            unit = _VOLUME_UNITS[tokens.pop(0)]
+        elif tokens and tokens[0] in _SERVING_UNITS:
+            tokens.pop(0)
+        if tokens and tokens[0] == "of":
+            tokens.pop(0)
+
+        if not tokens or any(re.fullmatch(r"[\d.]+", token) for token in tokens):
+            return None
+        return quantity, unit, " ".join(tokens)
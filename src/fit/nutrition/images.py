@@ -0,0 +1,78 @@
+"""Pre-processing for food images before they are sent to a vision model."""
+import base64
+from dataclasses import dataclass
+import io
+
+from PIL import Image, ImageOps
+
+# Vision models fit images into 2048x2048 and then scale the short side down to 768px,
+# so anything larger is only extra upload and encode time.
+MAX_LONG_SIDE = 2048
+MAX_SHORT_SIDE = 768
+JPEG_QUALITY = 85
+
+
+@dataclass
+class PreparedImage:
+    """A decoded, downscaled image ready to be sent to a model.
+
+    Attributes:
+        image: The downscaled RGB image, without EXIF metadata.
+        data: `image` encoded as JPEG.
+        phash: 64-bit perceptual (difference) hash of the image.
+    """
+    image: Image.Image
+    data: bytes
+    phash: int
+
+    @property
+    def data_url(self) -> str:
+        """The JPEG encoded as a `data:` URL, so it is sent as-is rather than as PNG."""
+        return "data:image/jpeg;base64," + base64.b64encode(self.data).decode()
+
+
+def difference_hash(image: Image.Image, size: int = 8) -> int:
+    """Return a perceptual hash of `image` that is stable under resizing and recompression.
+
+    Compares the brightness of horizontally adjacent pixels in a `(size + 1) x size`
+    grayscale thumbnail. Near-duplicate images differ in only a few bits.
+    """
+    pixels = list(image.convert("L").resize((size + 1, size), Image.LANCZOS).getdata())
+    bits = 0
+    for row in range(size):
+        for col in range(size):
+            left = pixels[row * (size + 1) + col]
+            right = pixels[row * (size + 1) + col + 1]
+            bits = (bits << 1) | (left > right)
+    return bits
+
+
+def hamming_distance(a: int, b: int) -> int:
+    """Return the number of differing bits between two hashes."""
+    return bin(a ^ b).count("1")
+
+
+def prepare_image(data: bytes) -> PreparedImage:
+    """Decode an uploaded image, strip its metadata and shrink it to what the model uses.
+
+    The EXIF orientation is applied to the pixels before the metadata is dropped, so
+    rotated phone photos keep their orientation.
+
+    Args:
+        data: The raw uploaded image file.
+
+    Raises:
+        PIL.UnidentifiedImageError: If `data` is not a supported image.
+    """
+    with Image.open(io.BytesIO(data)) as original:
+        image = ImageOps.exif_transpose(original).convert("RGB")
+
+    width, height = image.size
+    scale = min(1.0, MAX_LONG_SIDE / max(width, height), MAX_SHORT_SIDE / min(width, height))
+    if scale < 1.0:
+        size = (max(1, round(width * scale)), max(1, round(height * scale)))
+        image = image.resize(size, Image.LANCZOS)
+
+    buffer = io.BytesIO()
+    image.save(buffer, format="JPEG", quality=JPEG_QUALITY, optimize=True)
+    return PreparedImage(image=image, data=buffer.getvalue(), phash=difference_hash(image))
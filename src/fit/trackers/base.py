@@ -1,16 +1,16 @@
 from abc import ABC, abstractmethod
-import logging
+import threading
 
 
 class FitnessTracker(ABC):
-    """Abstract base class for fitness trackers."""
+    """Abstract base class for fitness trackers.
+
+    Authentication is deferred until the first API call, so constructing a tracker never
+    touches the network. Implementations authenticate before their first request,
+    holding `_auth_lock` so that concurrent callers authenticate only once.
+    """
     def __init__(self):
-        try:
-            print("Authenticating...")
-            self._authenticate()
-        
-        except Exception as e:
-            logging.error(f"Error authenticating: {e}")
+        self._auth_lock = threading.Lock()
 
     @abstractmethod
     def resting_heart_rate(self) -> float:
@@ -23,4 +23,3 @@ class FitnessTracker(ABC):
     @abstractmethod
     def _authenticate(self):
         pass
-
@@ -0,0 +1,80 @@
+from collections import OrderedDict
+import threading
+import time
+from typing import Any, Callable, Hashable, Optional
+
+
+class ResponseCache:
+    """A size-bounded LRU cache of API responses with a per-entry TTL.
+
+    Attributes:
+        max_entries (int): Maximum number of responses kept before the least recently
+            used one is evicted.
+        hits (int): Number of lookups served from the cache.
+        misses (int): Number of lookups that were absent or expired.
+    """
+    def __init__(self, max_entries: int = 256, clock: Callable[[], float] = time.monotonic):
+        """
+        Args:
+            max_entries: Maximum number of responses to keep.
+            clock: Monotonic clock used to expire entries.
+        """
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._clock = clock
+        self._entries: OrderedDict[Hashable, tuple[float, Any]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def make_key(url: str, params: Optional[dict[str, Any]] = None) -> tuple:
+        """Build a cache key from a request URL and its query parameters."""
+        items = sorted((str(k), str(v)) for k, v in (params or {}).items())
+        return (url, tuple(items))
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value for `key`, or `None` if it is absent or expired."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+
+            expires_at, value = entry
+            if expires_at <= self._clock():
+                del self._entries[key]
+                self.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: float) -> None:
+        """Store `value` under `key` for `ttl` seconds. Non-positive TTLs are not stored."""
+        if ttl <= 0:
+            return
+
+        with self._lock:
+            self._entries[key] = (self._clock() + ttl, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, url: Optional[str] = None) -> None:
+        """Drop cached responses.
+
+        Args:
+            url: If given, only responses for this URL (under any parameters) are dropped.
+                Otherwise the whole cache is cleared.
+        """
+        with self._lock:
+            if url is None:
+                self._entries.clear()
+                return
+
+            for key in [k for k in self._entries if k[0] == url]:
+                del self._entries[key]
+
+    def __len__(self) -> int:
+        return len(self._entries)
@@ -0,0 +1,222 @@
+import concurrent.futures
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+from datetime import datetime
+import threading
+import time
+from typing import Any, Callable, Mapping, Optional, Sequence
+
+from fit.trackers.base import FitnessTracker
+
+
+@dataclass
+class FanOut:
+    """The outcome of one call fanned out to several trackers.
+
+    Attributes:
+        values: Result per source that answered in time, in precedence order.
+        errors: Error message per source whose call failed.
+        timed_out: Sources that did not answer within their timeout.
+    """
+    values: dict[str, Any] = field(default_factory=dict)
+    errors: dict[str, str] = field(default_factory=dict)
+    timed_out: list[str] = field(default_factory=list)
+
+    @property
+    def complete(self) -> bool:
+        """Whether every source answered."""
+        return not self.errors and not self.timed_out
+
+
+def _describe(result: FanOut) -> str:
+    failures = [f"{source}: {error}" for source, error in result.errors.items()]
+    failures += [f"{source}: timed out" for source in result.timed_out]
+    return "; ".join(failures) or "no source supports it"
+
+
+class CompositeTracker(FitnessTracker):
+    """A tracker that combines several trackers queried concurrently.
+
+    Every call runs on all sources at once on a thread pool, so it takes as long as the
+    slowest source that is needed rather than the sum of all of them. Each source has a
+    timeout; a source that fails or is too slow is left out and the others still answer.
+    Scalar metrics come from the first source in precedence order that answers, and
+    return as soon as that source does. History merges the records of every source,
+    keeping the preferred source's record where several cover the same day.
+
+    Attributes:
+        trackers (dict[str, FitnessTracker]): Sources by name (e.g. tracker type), in
+            default precedence order.
+        timeout (float): Seconds each source has to answer.
+        timeouts (dict[str, float]): Per-source overrides of `timeout`.
+        precedence (dict[str, list[str]]): Per-metric overrides of the source order,
+            keyed by method name (e.g. "calories_burned").
+        last (FanOut): Outcome of the most recent call, for diagnostics.
+    """
+    def __init__(
+            self,
+            trackers: Mapping[str, FitnessTracker],
+            timeout: float = 5.0,
+            timeouts: Optional[Mapping[str, float]] = None,
+            precedence: Optional[Mapping[str, Sequence[str]]] = None,
+            max_workers: Optional[int] = None,
+        ):
+        """
+        Args:
+            trackers: Sources by name, in default precedence order.
+            timeout: Seconds each source has to answer.
+            timeouts: Per-source overrides of `timeout`.
+            precedence: Per-metric source order, keyed by method name. Sources left out
+                of a list are tried after the listed ones, in default order.
+            max_workers: Size of the thread pool. Defaults to four threads per source,
+                so a hung source cannot starve the others.
+        """
+        if not trackers:
+            raise ValueError("CompositeTracker needs at least one tracker")
+        self.trackers = dict(trackers)
+        self.timeout = timeout
+        self.timeouts = dict(timeouts or {})
+        self.precedence = {metric: list(order) for metric, order in (precedence or {}).items()}
+        self.last = FanOut()
+        self._max_workers = max_workers or 4 * len(self.trackers)
+        self._executor: Optional[ThreadPoolExecutor] = None
+        self._calls = 0
+        self._closed = False
+        self._state_lock = threading.Lock()
+        super().__init__()
+
+    def resting_heart_rate(self) -> float:
+        return self._first("resting_heart_rate")
+
+    def calories_burned(self) -> float:
+        return self._first("calories_burned")
+
+    def iter_cycles(
+            self, start: Optional[datetime] = None, end: Optional[datetime] = None
+        ) -> list[dict[str, Any]]:
+        """Return the cycles of every source between `start` and `end`, most recent first.
+
+        Each record gets a "source" key. Where several sources have a cycle starting on
+        the same day, only the preferred source's cycle is kept.
+        """
+        return self._history("iter_cycles", start, end, lambda record: record["start"][:10])
+
+    def iter_recoveries(
+            self, start: Optional[datetime] = None, end: Optional[datetime] = None
+        ) -> list[dict[str, Any]]:
+        """Return the recoveries of every source between `start` and `end`.
+
+        Each record gets a "source" key. Recoveries are kept per source, since they
+        refer to that source's cycles.
+        """
+        return self._history("iter_recoveries", start, end, None)
+
+    def gather(self, method: str, *args: Any, first: bool = False) -> FanOut:
+        """Call `method` on every source that has it, concurrently.
+
+        Args:
+            method: Name of the tracker method to call.
+            *args: Arguments passed to each call.
+            first: Stop waiting as soon as the first source in precedence order has
+                answered. Sources after it are reported neither as values nor as timed out.
+        """
+        return self._fan_out(method, lambda tracker: getattr(tracker, method)(*args), first)
+
+    def order(self, method: str) -> list[str]:
+        """Return the sources in precedence order for `method`."""
+        preferred = [source for source in self.precedence.get(method, []) if source in self.trackers]
+        return preferred + [source for source in self.trackers if source not in preferred]
+
+    def close(self) -> None:
+        """Release the thread pool once the calls in progress have finished.
+
+        Calls still running on other threads complete normally, and a call made after
+        `close` still works on a fresh pool that is released when it returns.
+        """
+        with self._state_lock:
+            self._closed = True
+            self._release_idle_pool()
+
+    def _acquire_pool(self) -> ThreadPoolExecutor:
+        with self._state_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(
+                    max_workers=self._max_workers, thread_name_prefix="tracker"
+                )
+            self._calls += 1
+            return self._executor
+
+    def _release_pool(self) -> None:
+        with self._state_lock:
+            self._calls -= 1
+            if self._closed:
+                self._release_idle_pool()
+
+    def _release_idle_pool(self) -> None:
+        # Without waiting: workers still stuck on a timed-out source finish on their own.
+        if self._calls == 0 and self._executor is not None:
+            self._executor.shutdown(wait=False)
+            self._executor = None
+
+    def _fan_out(self, method: str, call: Callable[[FitnessTracker], Any], first: bool) -> FanOut:
+        executor = self._acquire_pool()
+        try:
+            return self._collect(method, call, first, executor)
+        finally:
+            self._release_pool()
+
+    def _collect(
+            self, method: str, call: Callable[[FitnessTracker], Any], first: bool,
+            executor: ThreadPoolExecutor,
+        ) -> FanOut:
+        started = time.monotonic()
+        futures: dict[str, Future] = {
+            source: executor.submit(call, self.trackers[source])
+            for source in self.order(method)
+            if hasattr(self.trackers[source], method)
+        }
+
+        result = FanOut()
+        for source, future in futures.items():
+            remaining = started + self.timeouts.get(source, self.timeout) - time.monotonic()
+            try:
+                result.values[source] = future.result(timeout=max(0.0, remaining))
+            except concurrent.futures.TimeoutError:
+                result.timed_out.append(source)
+            except Exception as e:
+                result.errors[source] = f"{type(e).__name__}: {e}"
+            else:
+                if first:
+                    break
+        self.last = result
+        return result
+
+    def _first(self, method: str) -> Any:
+        result = self.gather(method, first=True)
+        if not result.values:
+            raise RuntimeError(f"No tracker could provide {method}: {_describe(result)}")
+        return next(iter(result.values.values()))
+
+    def _history(
+            self, method: str, start: Optional[datetime], end: Optional[datetime],
+            day: Optional[Callable[[dict[str, Any]], str]],
+        ) -> list[dict[str, Any]]:
+        # Record iterators are lazy, so they are drained on the worker thread too.
+        result = self._fan_out(
+            method, lambda tracker: list(getattr(tracker, method)(start=start, end=end)), False
+        )
+        if not result.values and (result.errors or result.timed_out):
+            raise RuntimeError(f"No tracker could provide {method}: {_describe(result)}")
+
+        records, owners = [], {}
+        for source, source_records in result.values.items():  # precedence order
+            for record in source_records:
+                if day is not None and owners.setdefault(day(record), source) != source:
+                    continue
+                records.append({**record, "source": source})
+        if day:
+            records.sort(key=day, reverse=True)
+        return records
+
+    def _authenticate(self) -> None:
+        pass  # each source authenticates itself
@@ -1,48 +1,89 @@
 from authlib.common.urls import extract_params
 from authlib.integrations.requests_client import OAuth2Session
+from datetime import datetime
 import json
-from typing import Any
+import logging
+import requests
+import time
+from typing import Any, Iterator
 
 from fit.trackers.base import FitnessTracker
+from fit.trackers.cache import ResponseCache
+from fit.trackers.tokens import TokenStore
+from fit.trackers.transport import RateLimitedTransport, shared_transport
 from fit.utils.conversions import kj_to_kcal
 
+logger = logging.getLogger(__name__)
+
+
 class Whoop(FitnessTracker):
     """Fitness tracker subclass for WHOOP devices.
 
     Attributes:
         session (authlib.OAuth2Session): Requests session for accessing the WHOOP API.
-        user_id (str): User ID of the owner of the session. 
-    
+        user_id (str): User ID of the owner of the session.
+        cache (ResponseCache): Cache of GET responses, keyed by URL and params.
+        transport (RateLimitedTransport): Rate limiting and retries for API requests.
+
     Constants:
         AUTH_URL (str): Base URL for authentication requests.
         REQUEST_URL (str): Base URL for API requests.
+        CURRENT_TTL (float): Seconds to cache data that can still change (e.g. the
+            current, unscored cycle).
+        SCORED_TTL (float): Seconds to cache scored data from finished cycles, which
+            the API no longer updates.
+        MAX_PAGE_SIZE (int): Largest `limit` accepted by the collection endpoints.
+        REFRESH_MARGIN (float): Refresh the access token when it expires within this
+            many seconds.
+        RATE_LIMITS (tuple): Published API limits as (requests, per seconds) pairs,
+            enforced client-side by the shared `RateLimitedTransport`.
     """
     AUTH_URL = "https://api-7.whoop.com"
     REQUEST_URL = "https://api.prod.whoop.com/developer"
+    CURRENT_TTL = 60.0
+    SCORED_TTL = 24 * 60 * 60.0
+    MAX_PAGE_SIZE = 25
+    REFRESH_MARGIN = 5 * 60.0
+    RATE_LIMITS = ((100, 60.0), (10_000, 24 * 60 * 60.0))
 
     def __init__(
         self,
         username: str,
         password: str,
+        cache: ResponseCache | None = None,
+        token_store: TokenStore | None = None,
+        transport: RateLimitedTransport | None = None,
     ):
         """Initialize a Whoop session and set up parameters for making requests.
-        
+
+        No network calls are made here. The first request reuses a stored token for
+        this account if there is one, and only authenticates with the password otherwise.
+
         Args:
             username (str): WHOOP account email.
             password (str): WHOOP account password.
+            cache (ResponseCache, optional): Response cache to use. A private cache
+                is created if none is given.
+            token_store (TokenStore, optional): Where tokens are persisted. Defaults
+                to `data/tokens.json`.
+            transport (RateLimitedTransport, optional): Rate limiting and retry policy
+                for API requests. Defaults to the one shared by all WHOOP clients.
         """
         self._username = username
         self._password = password
         self.user_id = ""
+        self.cache = cache if cache is not None else ResponseCache()
+        self.token_store = token_store if token_store is not None else TokenStore()
+        self.transport = transport if transport is not None else self.default_transport()
 
         self._session = OAuth2Session(
-            token_endpont=f"{self.AUTH_URL}/oauth/token",
+            token_endpoint=f"{self.AUTH_URL}/oauth/token",
             token_endpoint_auth_method="password_json",
         )
         self._session.register_client_auth_method(("password_json", self._auth_password_json))
 
         super().__init__()
-    
+
     def resting_heart_rate(self) -> float:
         cycle_dict = self._get_current_cycle()
         cycle_id = cycle_dict["id"]
@@ -59,9 +100,120 @@ class Whoop(FitnessTracker):
             method="GET", url_slug=f"v1/cycle/{cycle_id}/recovery"
         )
 
+    def iter_cycles(
+            self, start: datetime | None = None, end: datetime | None = None
+        ) -> Iterator[dict[str, Any]]:
+        """Yield every cycle between `start` and `end`, most recent first.
+
+        Pages are requested lazily with the largest page size the API allows, so only
+        one page is held in memory at a time.
+
+        Args:
+            start: Only return cycles that start after this time.
+            end: Only return cycles that start before this time.
+        """
+        yield from self._paginate("v1/cycle", start, end)
+
+    def iter_recoveries(
+            self, start: datetime | None = None, end: datetime | None = None
+        ) -> Iterator[dict[str, Any]]:
+        """Yield every recovery between `start` and `end`, most recent first.
+
+        Args:
+            start: Only return recoveries for cycles that start after this time.
+            end: Only return recoveries for cycles that start before this time.
+        """
+        yield from self._paginate("v1/recovery", start, end)
+
+    def _paginate(
+            self, url_slug: str, start: datetime | None, end: datetime | None
+        ) -> Iterator[dict[str, Any]]:
+        """Follow `next_token` through a collection endpoint, yielding each record."""
+        params = self._page_params(start, end)
+        while True:
+            page = self._make_request(
+                method="GET", url_slug=url_slug, params=params, use_cache=False
+            )
+            yield from page.get("records", [])
+
+            next_token = page.get("next_token")
+            if not next_token:
+                return
+            params = {**params, "nextToken": next_token}
+
+    def invalidate_cache(self, url_slug: str | None = None) -> None:
+        """Drop cached responses for `url_slug`, or all cached responses if not given."""
+        url = f"{self.REQUEST_URL}/{url_slug}" if url_slug is not None else None
+        self.cache.invalidate(url)
+
+    def _cache_ttl(self, url_slug: str, payload: dict[str, Any]) -> float:
+        """Return how long a GET response for `url_slug` may be cached.
+
+        Collection queries always include the current cycle, so they get the short TTL.
+        Single cycles and recoveries that have been scored are final and get the long one.
+        """
+        if url_slug == "v1/cycle":
+            return self.CURRENT_TTL
+
+        if payload.get("score_state") == "SCORED":
+            if url_slug.endswith("/recovery") or payload.get("end"):
+                return self.SCORED_TTL
+
+        return self.CURRENT_TTL
+
+    @classmethod
+    def default_transport(cls) -> RateLimitedTransport:
+        """Return the transport shared by every WHOOP client in the process."""
+        return shared_transport(
+            "whoop",
+            cls.RATE_LIMITS,
+            retry_exceptions=(requests.ConnectionError, requests.Timeout),
+        )
+
+    def _page_params(self, start: datetime | None, end: datetime | None) -> dict[str, str]:
+        """Return the query parameters for the first page of a collection request."""
+        params = {"limit": str(self.MAX_PAGE_SIZE)}
+        if start is not None:
+            params["start"] = start.isoformat()
+        if end is not None:
+            params["end"] = end.isoformat()
+        return params
+
+    def _token_key(self) -> str:
+        return TokenStore.key("whoop", self._username)
+
+    def _token_is_fresh(self, token: dict[str, Any]) -> bool:
+        """Return whether `token` is valid for longer than `REFRESH_MARGIN`."""
+        expires_at = token.get("expires_at")
+        return expires_at is None or expires_at - time.time() > self.REFRESH_MARGIN
+
+    def _store_token(self, token: dict[str, Any]) -> None:
+        """Persist `token`, keeping the user ID that refresh responses may omit."""
+        token = dict(token)
+        if "user" not in token and self.user_id:
+            token["user"] = {"id": self.user_id}
+        self.token_store.save(self._token_key(), token)
+
+    def _set_user_id(self, token: dict[str, Any]) -> None:
+        """Set `user_id` from a token response if it is not known yet.
+
+        Raises:
+            ValueError: If user ID cannot be retrieved from token response
+        """
+        if not self.user_id:
+            user_id = token.get("user", {}).get("id")
+            if not user_id:
+                raise ValueError("Could not retrieve user ID from authentication response")
+            self.user_id = str(user_id)
+
+    def _auth_password_json(self, _client, _method, uri, headers, body):
+        body = json.dumps(dict(extract_params(body)))
+        headers["Content-Type"] = "application/json"
+        return uri, headers, body
+
     def _authenticate(self) -> None:
         """Authenticate OAuth2Session by fetching token.
-    
+
         If `user_id` is `None`, it will be set according to the `user_id` returned with
         the token.
 
@@ -71,7 +223,7 @@ class Whoop(FitnessTracker):
         """
         try:
             self._session.fetch_token(
-                url=f"{self.AUTH_URL}/oauth/token", 
+                url=f"{self.AUTH_URL}/oauth/token",
                 username=self._username,
                 password=self._password,
                 grant_type="password",
@@ -79,19 +231,46 @@ class Whoop(FitnessTracker):
         except Exception as e:
             raise RuntimeError(f"Failed to authenticate with Whoop: {str(e)}")
 
-        if not self.user_id:
-            user_id = self._session.token.get("user", {}).get("id")
-            if not user_id:
-                raise ValueError("Could not retrieve user ID from authentication response")
-            self.user_id = str(user_id)
+        self._set_user_id(self._session.token)
+        self._store_token(self._session.token)
 
-    def _auth_password_json(self, _client, _method, uri, headers, body):
-        body = json.dumps(dict(extract_params(body)))
-        headers["Content-Type"] = "application/json"
-        return uri, headers, body
+    def _ensure_authenticated(self) -> None:
+        """Make sure the session holds a token that is not about to expire.
+
+        A token already held by the session or persisted in the token store is reused.
+        It is refreshed when it is within `REFRESH_MARGIN` of expiring, and the password
+        grant is only used when no token is available at all.
+        """
+        with self._auth_lock:
+            token = self._session.token
+            if not token:
+                token = self.token_store.load(self._token_key())
+                if token:
+                    self._session.token = token
+                    self._set_user_id(token)
+
+            if not token:
+                logger.debug("Authenticating with Whoop")
+                self._authenticate()
+            elif not self._token_is_fresh(token):
+                self._refresh_token()
+
+    def _refresh_token(self) -> None:
+        """Refresh the access token, falling back to the password grant on failure."""
+        refresh_token = (self._session.token or {}).get("refresh_token")
+        if refresh_token:
+            try:
+                self._session.refresh_token(
+                    url=f"{self.AUTH_URL}/oauth/token", refresh_token=refresh_token
+                )
+                self._store_token(self._session.token)
+                return
+            except Exception as e:
+                logger.warning(f"Failed to refresh Whoop token, re-authenticating: {e}")
+        self._authenticate()
 
     def _get_current_cycle(self):
-        """Get the current cycle from Whoop API. The "cycle" is the fundamental 
+        """Get the current cycle from Whoop API. The "cycle" is the fundamental
         time unit for the whoop, and is necessary to make subsequent queries. (by id)
         """
         params = {
@@ -105,13 +284,27 @@ class Whoop(FitnessTracker):
         return results['records'][0]
 
     def _make_request(
-            self, method: str, url_slug: str, **kwargs: Any
+            self, method: str, url_slug: str, use_cache: bool = True, **kwargs: Any
         ) -> dict[str, Any]:
-        response = self._session.request(
-            method=method,
-            url=f"{self.REQUEST_URL}/{url_slug}",
-            **kwargs,
-        )
+        url = f"{self.REQUEST_URL}/{url_slug}"
+        cacheable = use_cache and method.upper() == "GET"
+
+        if cacheable:
+            key = ResponseCache.make_key(url, kwargs.get("params"))
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
+
+        self._ensure_authenticated()
+        send = lambda: self._session.request(method=method, url=url, **kwargs)
+        response = self.transport.request(method, send)
+        if response.status_code == 401:
+            with self._auth_lock:
+                self._refresh_token()
+            response = self.transport.request(method, send)
         response.raise_for_status()
-        return response.json()
+        payload = response.json()
 
+        if cacheable:
+            self.cache.set(key, payload, self._cache_ttl(url_slug, payload))
+        return payload
@@ -1,10 +1,13 @@
+import hashlib
 import json
-import os
-from pathlib import Path
-from typing import Optional, Dict, Any
+import threading
+from typing import Optional, Dict, Any, List, Tuple
 
 from fit.trackers.base import FitnessTracker
+from fit.trackers.composite import CompositeTracker
 from fit.trackers.implementations.whoop import Whoop
+from fit.trackers.tokens import TokenStore
+from fit.utils.json_store import JsonStore
 
 SECRETS_PATH = "data/secrets.json"
 CONFIG_PATH = "data/config.json"
@@ -16,80 +19,216 @@ def create_tracker(tracker_type: str, username: str, password: str) -> FitnessTr
     # Add other tracker types here
     raise ValueError(f"Invalid tracker type: {tracker_type}")
 
-def load_secrets() -> Dict[str, Any]:
-    """Load existing secrets if they exist."""
-    if os.path.exists(SECRETS_PATH):
-        with open(SECRETS_PATH, 'r') as f:
-            return json.load(f)
-    return {}
-
-def save_secrets(tracker_type: str, username: str, password: str) -> None:
-    """Save tracker credentials to secrets file."""
-    secrets = load_secrets()
-    Path("data").mkdir(exist_ok=True)
-    
-    secrets[tracker_type] = {
-        "username": username,
-        "password": password
-    }
-    
-    with open(SECRETS_PATH, 'w') as f:
-        json.dump(secrets, f, indent=2)
-    os.chmod(SECRETS_PATH, 0o600)  # Read/write for owner only
-
-def load_config() -> Dict[str, Any]:
-    """Load config if it exists."""
-    if os.path.exists(CONFIG_PATH):
-        with open(CONFIG_PATH, 'r') as f:
-            return json.load(f)
-    return {"active_tracker": None}
-
-def save_config(active_tracker: str) -> None:
-    """Save active tracker choice to config file."""
-    config = load_config()
-    Path("data").mkdir(exist_ok=True)
-    config["active_tracker"] = active_tracker
-    with open(CONFIG_PATH, 'w') as f:
-        json.dump(config, f, indent=2)
-
-def get_active_tracker_type() -> Optional[str]:
-    """Return the type of the currently active tracker."""
-    config = load_config()
-    return config.get("active_tracker")
-
-def get_active_tracker_credentials() -> Optional[Dict[str, str]]:
-    """Return the credentials for the active tracker if it exists."""
-    active_type = get_active_tracker_type()
-    if not active_type:
-        return None
-    
-    secrets = load_secrets()
-    return secrets.get(active_type)
+class TrackerStore:
+    """Tracker credentials and configuration, kept in memory.
+
+    Both files are parsed once and reloaded only when their mtime changes, so page
+    renders do no disk reads in the steady state. Writes are serialized and atomic
+    (see `JsonStore`).
+
+    Attributes:
+        secrets (JsonStore): Credentials per tracker type, in `data/secrets.json`.
+        config (JsonStore): Active tracker choice, in `data/config.json`.
+    """
+    def __init__(self, secrets_path: str = SECRETS_PATH, config_path: str = CONFIG_PATH):
+        self.secrets = JsonStore(secrets_path, mode=0o600)  # Read/write for owner only
+        self.config = JsonStore(config_path, default={"active_tracker": None})
+
+    @property
+    def version(self) -> Tuple[int, int]:
+        """Changes whenever the credentials or the config change."""
+        self.secrets.read()
+        self.config.read()
+        return (self.secrets.version, self.config.version)
+
+    def load_secrets(self) -> Dict[str, Any]:
+        """Return the stored credentials, keyed by tracker type."""
+        return self.secrets.read()
+
+    def save_secrets(self, tracker_type: str, username: str, password: str) -> None:
+        """Save tracker credentials to the secrets file."""
+        def _set(secrets: Dict[str, Any]) -> None:
+            secrets[tracker_type] = {
+                "username": username,
+                "password": password
+            }
+        self.secrets.update(_set)
+
+    def load_config(self) -> Dict[str, Any]:
+        """Return the stored config."""
+        return self.config.read()
+
+    def save_config(self, active_tracker: str) -> None:
+        """Save active tracker choice to the config file."""
+        def _set(config: Dict[str, Any]) -> None:
+            config["active_tracker"] = active_tracker
+        self.config.update(_set)
+
+    def active_tracker_type(self) -> Optional[str]:
+        """Return the type of the currently active tracker."""
+        return self.load_config().get("active_tracker")
+
+    def tracker_precedence(self) -> List[str]:
+        """Return the tracker types in the order their data is preferred.
+
+        The active tracker comes first, then the types listed under "tracker_precedence"
+        in the config, then every other connected tracker.
+        """
+        config = self.load_config()
+        secrets = self.load_secrets()
+        order: List[str] = []
+        for tracker_type in [config.get("active_tracker"), *config.get("tracker_precedence", []), *secrets]:
+            if tracker_type in secrets and tracker_type not in order:
+                order.append(tracker_type)
+        return order
+
+    def active_tracker_source(self) -> Optional[str]:
+        """Return a key for the active tracker account (type and username), if any.
+
+        Data synced from a tracker is stored under this key, so switching to another
+        account of the same tracker type never serves the previous account's data.
+        """
+        active_type = self.active_tracker_type()
+        creds = self.active_tracker_credentials()
+        if not active_type or not creds:
+            return None
+        return TokenStore.key(active_type, creds["username"])
+
+    def active_tracker_credentials(self) -> Optional[Dict[str, str]]:
+        """Return the credentials for the active tracker if it exists."""
+        active_type = self.active_tracker_type()
+        if not active_type:
+            return None
+        return self.load_secrets().get(active_type)
+
+store = TrackerStore()
+
+class TrackerRegistry:
+    """Keeps one live tracker instance per (tracker_type, username).
+
+    Trackers are rebuilt only when their credentials change, detected by a hash of the
+    stored credentials. The active tracker is re-resolved only when the `TrackerStore`
+    version changes, so repeated lookups do not touch the filesystem beyond two `stat`
+    calls. All methods are thread-safe and never block on the network, so they can be
+    called from async handlers.
+    """
+    def __init__(self, tracker_store: TrackerStore):
+        self._store = tracker_store
+        self._lock = threading.RLock()
+        self._trackers: Dict[Tuple[str, str], Tuple[str, FitnessTracker]] = {}
+        self._store_version = None
+        self._active: Optional[FitnessTracker] = None
+        self._combined_version = None
+        self._combined: Optional[FitnessTracker] = None
+
+    def get(self, tracker_type: str, creds: Dict[str, str]) -> FitnessTracker:
+        """Return the live tracker for these credentials, creating it if needed."""
+        key = (tracker_type, creds["username"])
+        digest = hashlib.sha256(json.dumps(creds, sort_keys=True).encode()).hexdigest()
+        with self._lock:
+            entry = self._trackers.get(key)
+            if entry is not None and entry[0] == digest:
+                return entry[1]
+
+            tracker = create_tracker(tracker_type, creds["username"], creds["password"])
+            self._trackers[key] = (digest, tracker)
+            return tracker
+
+    def active(self) -> Optional[FitnessTracker]:
+        """Return the active tracker, re-resolving it only if the store changed."""
+        with self._lock:
+            store_version = self._store.version
+            if store_version != self._store_version:
+                self._active = self._resolve_active()
+                self._store_version = store_version
+            return self._active
+
+    def combined(self) -> Optional[FitnessTracker]:
+        """Return one tracker over every connected tracker, re-resolved if the store changed.
+
+        With several connected trackers this is a `CompositeTracker` that queries them
+        concurrently in `TrackerStore.tracker_precedence` order; with one it is that
+        tracker itself. Tracker types that cannot be created yet are left out.
+        """
+        with self._lock:
+            store_version = self._store.version
+            if store_version != self._combined_version:
+                # Requests may still be using the old composite: swap it out first and
+                # let it release its threads once they are done.
+                previous, self._combined = self._combined, self._resolve_combined()
+                self._combined_version = store_version
+                if isinstance(previous, CompositeTracker):
+                    previous.close()
+            return self._combined
+
+    def clear(self) -> None:
+        """Drop every cached tracker instance."""
+        with self._lock:
+            self._trackers.clear()
+            self._store_version = None
+            self._active = None
+            previous, self._combined = self._combined, None
+            self._combined_version = None
+            if isinstance(previous, CompositeTracker):
+                previous.close()
+
+    def _resolve_active(self) -> Optional[FitnessTracker]:
+        active_type = self._store.active_tracker_type()
+        if not active_type:
+            return None
+
+        creds = self._store.load_secrets().get(active_type)
+        if creds is None:
+            return None
+        return self.get(active_type, creds)
+
+    def _resolve_combined(self) -> Optional[FitnessTracker]:
+        secrets = self._store.load_secrets()
+        trackers = {}
+        for tracker_type in self._store.tracker_precedence():
+            try:
+                trackers[tracker_type] = self.get(tracker_type, secrets[tracker_type])
+            except ValueError:
+                continue  # no implementation for this tracker type yet
+        if len(trackers) <= 1:
+            return next(iter(trackers.values()), None)
+        config = self._store.load_config()
+        return CompositeTracker(
+            trackers,
+            timeout=config.get("tracker_timeout", 5.0),
+            precedence=config.get("metric_precedence"),
+        )
+
+_registry = TrackerRegistry(store)
 
 def get_active_tracker() -> Optional[FitnessTracker]:
-    """Get an instance of the active tracker if one is configured."""
-    active_type = get_active_tracker_type()
-    if not active_type:
-        return None
-    
+    """Get the live instance of the active tracker if one is configured.
+
+    Instances are shared through the module's `TrackerRegistry`, so this is cheap enough
+    to call on every request.
+    """
     try:
-        secrets = load_secrets()
-        if active_type in secrets:
-            creds = secrets[active_type]
-            return create_tracker(
-                active_type,
-                creds["username"],
-                creds["password"]
-            )
+        return _registry.active()
     except Exception as e:
         print(f"Failed to load active tracker: {e}")
     return None
 
+def get_combined_tracker() -> Optional[FitnessTracker]:
+    """Get a tracker that reads from every connected tracker, preferring the active one.
+
+    Like `get_active_tracker`, this is cheap enough to call on every request.
+    """
+    try:
+        return _registry.combined()
+    except Exception as e:
+        print(f"Failed to load trackers: {e}")
+    return None
+
 def set_active_tracker(tracker_type: str) -> Optional[FitnessTracker]:
     """Set the active tracker and return an instance of it."""
-    secrets = load_secrets()
+    secrets = store.load_secrets()
     if tracker_type not in secrets:
         raise ValueError(f"No credentials found for tracker type: {tracker_type}")
-    
-    save_config(tracker_type)
-    return get_active_tracker()
\ No newline at end of file
+
+    store.save_config(tracker_type)
+    return get_active_tracker()
@@ -0,0 +1,515 @@
+"""Background sync of tracker history into a local SQLite database.
+
+`TrackerSync` periodically pulls the cycles and recoveries that are new since its
+stored cursor and upserts them into `TrackerDataStore`. Pages then read tracker data
+locally instead of calling the tracker API on every request, so API traffic depends on
+the sync interval rather than on page views.
+
+The scheduler runs in a daemon thread inside the web app, or as a separate worker:
+
+    python -m fit.trackers.sync [--once] [--interval SECONDS] [--db PATH]
+"""
+import argparse
+from datetime import datetime, timedelta, timezone
+import json
+import logging
+import os
+from pathlib import Path
+import random
+import sqlite3
+import threading
+import time
+from typing import Any, Callable, Optional
+import uuid
+
+from fit.trackers.base import FitnessTracker
+
+SYNC_DB_PATH = "data/tracker.db"
+BUSY_TIMEOUT_MS = 5000
+
+# Synced record types, in sync order: recoveries look up the start of their cycle.
+RESOURCES = ("cycles", "recoveries")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS tracker_cycles (
+    source TEXT NOT NULL,
+    id INTEGER NOT NULL,
+    start TEXT NOT NULL,
+    "end" TEXT,
+    timezone_offset TEXT,
+    score_state TEXT,
+    strain REAL,
+    kilojoule REAL,
+    average_heart_rate REAL,
+    max_heart_rate REAL,
+    updated_at TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (source, id)
+);
+CREATE INDEX IF NOT EXISTS idx_tracker_cycles_start ON tracker_cycles(source, start);
+CREATE TABLE IF NOT EXISTS tracker_recoveries (
+    source TEXT NOT NULL,
+    cycle_id INTEGER NOT NULL,
+    sleep_id INTEGER,
+    score_state TEXT,
+    recovery_score REAL,
+    resting_heart_rate REAL,
+    hrv_rmssd_milli REAL,
+    spo2_percentage REAL,
+    skin_temp_celsius REAL,
+    created_at TEXT,
+    updated_at TEXT,
+    payload TEXT NOT NULL,
+    PRIMARY KEY (source, cycle_id)
+);
+CREATE TABLE IF NOT EXISTS tracker_sync_cursors (
+    source TEXT NOT NULL,
+    resource TEXT NOT NULL,
+    cursor TEXT NOT NULL,
+    synced_at REAL NOT NULL,
+    PRIMARY KEY (source, resource)
+);
+CREATE TABLE IF NOT EXISTS tracker_sync_leases (
+    source TEXT PRIMARY KEY,
+    owner TEXT NOT NULL,
+    expires_at REAL NOT NULL
+);
+"""
+
+# Upserts skip the write when the record has not changed since it was stored.
+_UPSERT_CYCLE = """
+INSERT INTO tracker_cycles (
+    source, id, start, "end", timezone_offset, score_state, strain, kilojoule,
+    average_heart_rate, max_heart_rate, updated_at, payload
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source, id) DO UPDATE SET
+    start = excluded.start, "end" = excluded."end",
+    timezone_offset = excluded.timezone_offset, score_state = excluded.score_state,
+    strain = excluded.strain, kilojoule = excluded.kilojoule,
+    average_heart_rate = excluded.average_heart_rate,
+    max_heart_rate = excluded.max_heart_rate,
+    updated_at = excluded.updated_at, payload = excluded.payload
+WHERE excluded.updated_at IS NOT tracker_cycles.updated_at
+"""
+
+_UPSERT_RECOVERY = """
+INSERT INTO tracker_recoveries (
+    source, cycle_id, sleep_id, score_state, recovery_score, resting_heart_rate,
+    hrv_rmssd_milli, spo2_percentage, skin_temp_celsius, created_at, updated_at, payload
+) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (source, cycle_id) DO UPDATE SET
+    sleep_id = excluded.sleep_id, score_state = excluded.score_state,
+    recovery_score = excluded.recovery_score,
+    resting_heart_rate = excluded.resting_heart_rate,
+    hrv_rmssd_milli = excluded.hrv_rmssd_milli,
+    spo2_percentage = excluded.spo2_percentage,
+    skin_temp_celsius = excluded.skin_temp_celsius,
+    created_at = excluded.created_at, updated_at = excluded.updated_at,
+    payload = excluded.payload
+WHERE excluded.updated_at IS NOT tracker_recoveries.updated_at
+"""
+
+# Takes the lease if it is free or expired, or extends it if `owner` already holds it.
+_TAKE_LEASE = """
+INSERT INTO tracker_sync_leases (source, owner, expires_at) VALUES (?, ?, ?)
+ON CONFLICT (source) DO UPDATE SET
+    owner = excluded.owner, expires_at = excluded.expires_at
+WHERE tracker_sync_leases.owner = excluded.owner
+    OR tracker_sync_leases.expires_at < ?
+"""
+
+
+class LeaseLost(RuntimeError):
+    """Another process took over the sync lease of a source during a run."""
+
+
+def parse_time(value: str) -> datetime:
+    """Parse an API timestamp such as "2022-04-24T11:25:44.774Z" into an aware datetime."""
+    parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def _cycle_row(source: str, cycle: dict[str, Any]) -> tuple:
+    score = cycle.get("score") or {}
+    return (
+        source, cycle["id"], cycle["start"], cycle.get("end"), cycle.get("timezone_offset"),
+        cycle.get("score_state"), score.get("strain"), score.get("kilojoule"),
+        score.get("average_heart_rate"), score.get("max_heart_rate"),
+        cycle.get("updated_at"), json.dumps(cycle),
+    )
+
+
+def _recovery_row(source: str, recovery: dict[str, Any]) -> tuple:
+    score = recovery.get("score") or {}
+    return (
+        source, recovery["cycle_id"], recovery.get("sleep_id"), recovery.get("score_state"),
+        score.get("recovery_score"), score.get("resting_heart_rate"),
+        score.get("hrv_rmssd_milli"), score.get("spo2_percentage"),
+        score.get("skin_temp_celsius"), recovery.get("created_at"),
+        recovery.get("updated_at"), json.dumps(recovery),
+    )
+
+
+def _is_final(resource: str, record: dict[str, Any]) -> bool:
+    """Whether a record can no longer change (scored or unscorable, and finished)."""
+    if record.get("score_state") == "PENDING_SCORE":
+        return False
+    return resource != "cycles" or record.get("end") is not None
+
+
+class TrackerDataStore:
+    """Local copy of tracker cycles and recoveries, with the sync cursors.
+
+    Records are kept per `source`, the tracker account (e.g. "whoop:me@example.com", see
+    `TrackerStore.active_tracker_source`), in their own SQLite database, so syncing
+    never contends with meal logging. Reads take microseconds and never touch the
+    network.
+
+    Attributes:
+        path (str): Path of the SQLite database.
+    """
+    def __init__(self, path: str = SYNC_DB_PATH):
+        """
+        Args:
+            path: Path of the SQLite database. Created if it does not exist.
+        """
+        self.path = path
+        Path(os.path.dirname(path) or ".").mkdir(parents=True, exist_ok=True)
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self._conn.row_factory = sqlite3.Row
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.execute(f"PRAGMA busy_timeout={BUSY_TIMEOUT_MS}")
+        self._conn.executescript(_SCHEMA)
+
+    def cursor(self, source: str, resource: str) -> Optional[datetime]:
+        """Return the time up to which `resource` is fully synced, if it was ever synced."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT cursor FROM tracker_sync_cursors WHERE source = ? AND resource = ?",
+                (source, resource),
+            ).fetchone()
+        return parse_time(row["cursor"]) if row else None
+
+    def last_synced(self, source: str) -> Optional[float]:
+        """Return the epoch time of the last completed sync of every resource, if any."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT count(*) AS n, min(synced_at) AS synced_at "
+                "FROM tracker_sync_cursors WHERE source = ?",
+                (source,),
+            ).fetchone()
+        return row["synced_at"] if row["n"] == len(RESOURCES) else None
+
+    def save(
+            self, source: str, resource: str, records: list[dict[str, Any]], cursor: datetime,
+            owner: Optional[str] = None, lease: float = 0.0,
+        ) -> int:
+        """Upsert a window of records and advance the cursor in one transaction.
+
+        Args:
+            source: Name the records are stored under.
+            resource: One of `RESOURCES`.
+            records: Records as returned by the tracker.
+            cursor: Time up to which `resource` is now fully synced.
+            owner: Holder of the sync lease. If given, the lease is extended by `lease`
+                seconds in the same transaction, and nothing is written if `owner` no
+                longer holds it.
+            lease: Seconds to extend the lease by.
+
+        Returns:
+            The number of records inserted or changed.
+
+        Raises:
+            LeaseLost: If `owner` no longer holds the lease.
+        """
+        sql, to_row = (
+            (_UPSERT_CYCLE, _cycle_row) if resource == "cycles" else (_UPSERT_RECOVERY, _recovery_row)
+        )
+        with self._lock:
+            self._conn.execute("BEGIN IMMEDIATE")
+            try:
+                if owner is not None:
+                    now = time.time()
+                    if not self._conn.execute(_TAKE_LEASE, (source, owner, now + lease, now)).rowcount:
+                        raise LeaseLost(f"Sync lease for {source} was taken by another process")
+                before = self._conn.total_changes
+                self._conn.executemany(sql, [to_row(source, record) for record in records])
+                changed = self._conn.total_changes - before
+                self._conn.execute(
+                    """
+                    INSERT INTO tracker_sync_cursors (source, resource, cursor, synced_at)
+                    VALUES (?, ?, ?, ?)
+                    ON CONFLICT (source, resource) DO UPDATE SET
+                        cursor = excluded.cursor, synced_at = excluded.synced_at
+                    """,
+                    (source, resource, cursor.isoformat(), time.time()),
+                )
+                self._conn.execute("COMMIT")
+            except BaseException:
+                self._conn.execute("ROLLBACK")
+                raise
+        return changed
+
+    def acquire_lease(self, source: str, owner: str, seconds: float) -> bool:
+        """Take or extend the sync lease for `source`. False if another owner holds it."""
+        now = time.time()
+        with self._lock:
+            changed = self._conn.execute(_TAKE_LEASE, (source, owner, now + seconds, now)).rowcount
+        return changed > 0
+
+    def release_lease(self, source: str, owner: str) -> None:
+        """Release the sync lease for `source` if `owner` holds it."""
+        with self._lock:
+            self._conn.execute(
+                "DELETE FROM tracker_sync_leases WHERE source = ? AND owner = ?", (source, owner)
+            )
+
+    def cycle_start(self, source: str, cycle_id: int) -> Optional[datetime]:
+        """Return the start of a stored cycle."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT start FROM tracker_cycles WHERE source = ? AND id = ?", (source, cycle_id)
+            ).fetchone()
+        return parse_time(row["start"]) if row else None
+
+    def latest_cycle(self, source: str) -> Optional[dict[str, Any]]:
+        """Return the most recent stored cycle as a row dict, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                "SELECT * FROM tracker_cycles WHERE source = ? ORDER BY start DESC LIMIT 1",
+                (source,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def latest_recovery(self, source: str) -> Optional[dict[str, Any]]:
+        """Return the scored recovery of the most recent cycle that has one, or None."""
+        with self._lock:
+            row = self._conn.execute(
+                """
+                SELECT r.* FROM tracker_recoveries r
+                JOIN tracker_cycles c ON c.source = r.source AND c.id = r.cycle_id
+                WHERE r.source = ? AND r.score_state = 'SCORED'
+                ORDER BY c.start DESC LIMIT 1
+                """,
+                (source,),
+            ).fetchone()
+        return dict(row) if row else None
+
+    def cycles(self, source: str, start: datetime, end: datetime) -> list[dict[str, Any]]:
+        """Return the stored cycles that start between `start` and `end`, oldest first."""
+        with self._lock:
+            rows = self._conn.execute(
+                """
+                SELECT * FROM tracker_cycles
+                WHERE source = ? AND start >= ? AND start < ? ORDER BY start
+                """,
+                (source, _api_time(start), _api_time(end)),
+            ).fetchall()
+        return [dict(row) for row in rows]
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _api_time(value: datetime) -> str:
+    """Format a datetime the way the API writes timestamps, so stored strings compare."""
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+    return value.strftime("%Y-%m-%dT%H:%M:%S.") + f"{value.microsecond // 1000:03d}Z"
+
+
+def _active_tracker() -> tuple[Optional[str], Optional[FitnessTracker]]:
+    from fit.trackers.manager import get_active_tracker, store
+
+    return store.active_tracker_source(), get_active_tracker()
+
+
+class TrackerSync:
+    """Keeps a `TrackerDataStore` up to date with a tracker's cycles and recoveries.
+
+    Each run reads every record since the stored cursor (minus `lookback`, to pick up
+    late rescoring) in `window`-sized steps and saves each window together with the new
+    cursor, so an interrupted sync resumes where it stopped. The cursor never moves past
+    a record that can still change, such as the current cycle, so such records are
+    re-read until they are final.
+
+    Runs never overlap: within a process a run that finds another one in progress is
+    skipped, and across processes (e.g. the web app and a separate worker) a lease row
+    in the database gives one of them the source at a time.
+
+    Attributes:
+        interval (float): Seconds between runs of the scheduler.
+        jitter (float): Fraction of `interval` by which each delay is randomly varied,
+            so several workers do not hit the API in lockstep.
+        runs (int): Number of completed runs.
+        skipped (int): Number of runs skipped because another run held the source.
+        errors (int): Number of failed runs.
+        last_error (Optional[str]): Message of the most recent failure.
+    """
+    def __init__(
+            self,
+            store: TrackerDataStore,
+            tracker: Optional[FitnessTracker] = None,
+            source: Optional[str] = None,
+            interval: float = 15 * 60,
+            jitter: float = 0.1,
+            window: timedelta = timedelta(days=30),
+            history: timedelta = timedelta(days=90),
+            lookback: timedelta = timedelta(days=1),
+            lease: float = 10 * 60,
+            clock: Callable[[], datetime] = lambda: datetime.now(timezone.utc),
+        ):
+        """
+        Args:
+            store: Where records and cursors are kept.
+            tracker: Tracker to sync. Defaults to the active tracker, resolved again on
+                every run so switching trackers takes effect without a restart.
+            source: Name the records are stored under. Defaults to the active tracker
+                account, so each account keeps its own records and cursors.
+            interval: Seconds between scheduled runs.
+            jitter: Fraction of `interval` by which each delay is randomly varied.
+            window: Time span fetched and committed at once.
+            history: How far back the first sync of a source reaches.
+            lookback: How far before the cursor each run starts reading.
+            lease: Seconds a run may hold the source before another process can take it.
+            clock: Returns the current time as an aware datetime.
+        """
+        if (tracker is None) != (source is None):
+            raise ValueError("Pass both tracker and source, or neither")
+        self.store = store
+        self.interval = interval
+        self.jitter = jitter
+        self.window = window
+        self.history = history
+        self.lookback = lookback
+        self.lease = lease
+        self.runs = 0
+        self.skipped = 0
+        self.errors = 0
+        self.last_error: Optional[str] = None
+        self._tracker = tracker
+        self._source = source
+        self._clock = clock
+        self._owner = uuid.uuid4().hex
+        self._running = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def sync_once(self) -> Optional[dict[str, int]]:
+        """Sync every resource once.
+
+        Returns:
+            The number of records inserted or changed per resource, or None if the run
+            was skipped: another run is in progress or took over the lease during this
+            one, or there is nothing to sync.
+        """
+        if not self._running.acquire(blocking=False):
+            self.skipped += 1
+            return None
+        try:
+            source, tracker = (
+                (self._source, self._tracker) if self._tracker is not None else _active_tracker()
+            )
+            if tracker is None or not hasattr(tracker, "iter_cycles"):
+                return None
+            if not self.store.acquire_lease(source, self._owner, self.lease):
+                self.skipped += 1
+                return None
+            try:
+                changed = {
+                    resource: self._sync_resource(source, tracker, resource)
+                    for resource in RESOURCES
+                }
+            except LeaseLost:
+                # The other process carries on from the cursors saved so far.
+                self.skipped += 1
+                return None
+            finally:
+                self.store.release_lease(source, self._owner)
+            self.runs += 1
+            return changed
+        finally:
+            self._running.release()
+
+    def _sync_resource(self, source: str, tracker: FitnessTracker, resource: str) -> int:
+        fetch = tracker.iter_cycles if resource == "cycles" else tracker.iter_recoveries
+        now = self._clock()
+        cursor = self.store.cursor(source, resource)
+        start = cursor - self.lookback if cursor else now - self.history
+
+        changed = 0
+        pending = None  # earliest start of a record that can still change
+        while start < now:
+            end = min(start + self.window, now)
+            records = list(fetch(start=start, end=end))
+            for record in records:
+                if not _is_final(resource, record):
+                    record_start = self._record_start(source, resource, record) or start
+                    pending = min(pending or record_start, record_start)
+            changed += self.store.save(
+                source, resource, records, min(pending or end, end),
+                owner=self._owner, lease=self.lease,
+            )
+            start = end
+        return changed
+
+    def _record_start(self, source: str, resource: str, record: dict[str, Any]) -> Optional[datetime]:
+        if resource == "cycles":
+            return parse_time(record["start"])
+        return self.store.cycle_start(source, record["cycle_id"])
+
+    def next_delay(self) -> float:
+        """Seconds until the next scheduled run, with jitter applied."""
+        return self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+
+    def run_forever(self) -> None:
+        """Run the scheduler until `stop` is called. Failures are logged and retried."""
+        # Spread the first run too, so workers started together do not sync together.
+        delay = self.interval * random.uniform(0, self.jitter)
+        while not self._stop.wait(delay):
+            try:
+                self.sync_once()
+            except Exception as e:
+                self.errors += 1
+                self.last_error = str(e)
+                logging.warning(f"Tracker sync failed: {e}")
+            delay = self.next_delay()
+
+    def start(self) -> None:
+        """Start the scheduler in a daemon thread."""
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self.run_forever, name="tracker-sync", daemon=True)
+        self._thread.start()
+
+    def stop(self, timeout: Optional[float] = None) -> None:
+        """Stop the scheduler, waiting up to `timeout` seconds for a run in progress."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Sync the active tracker into local SQLite")
+    parser.add_argument("--db", default=SYNC_DB_PATH, help="Path of the tracker database")
+    parser.add_argument("--interval", type=float, default=15 * 60, help="Seconds between runs")
+    parser.add_argument("--once", action="store_true", help="Run a single sync and exit")
+    args = parser.parse_args()
+
+    sync = TrackerSync(TrackerDataStore(args.db), interval=args.interval)
+    if args.once:
+        print(sync.sync_once())
+        return
+    try:
+        sync.run_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
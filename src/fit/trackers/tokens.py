@@ -0,0 +1,41 @@
+from typing import Any, Dict, Optional
+
+from fit.utils.json_store import JsonStore
+
+TOKENS_PATH = "data/tokens.json"
+
+
+class TokenStore:
+    """Persists OAuth tokens on disk so they can be reused across processes.
+
+    Tokens are stored as JSON, keyed by tracker type and username (see `key`), next to
+    the tracker credentials in `data/secrets.json`. Each token keeps the `expires_at`
+    timestamp returned by the provider, which callers use to decide when to refresh.
+    """
+    def __init__(self, path: str = TOKENS_PATH):
+        """
+        Args:
+            path: Path of the JSON file holding the tokens.
+        """
+        self._store = JsonStore(path, mode=0o600)  # Read/write for owner only
+
+    @property
+    def path(self) -> str:
+        return self._store.path
+
+    @staticmethod
+    def key(tracker_type: str, username: str) -> str:
+        """Return the key a tracker account's token is stored under."""
+        return f"{tracker_type}:{username}"
+
+    def load(self, key: str) -> Optional[Dict[str, Any]]:
+        """Return the stored token for `key`, if any."""
+        return self._store.read().get(key)
+
+    def save(self, key: str, token: Dict[str, Any]) -> None:
+        """Store `token` under `key`, replacing any previous token."""
+        self._store.update(lambda tokens: tokens.__setitem__(key, dict(token)))
+
+    def delete(self, key: str) -> None:
+        """Forget the token stored under `key`."""
+        self._store.update(lambda tokens: tokens.pop(key, None))
@@ -0,0 +1,264 @@
+"""Rate-limit-aware request policy shared by the tracker API clients."""
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+import random
+import threading
+import time
+from typing import Any, Callable, Optional, Sequence
+
+# Only these are retried after a failure: repeating them cannot change server state.
+IDEMPOTENT_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+RETRY_STATUSES = frozenset({500, 502, 503, 504})
+
+
+class TokenBucket:
+    """A thread-safe token bucket that schedules requests instead of rejecting them.
+
+    `reserve` always takes a token and returns how long the caller must wait before
+    sending, so concurrent callers are spaced out at `rate` rather than bursting and
+    then failing together. `pause` stops every caller until a given time, e.g. when
+    the server answers `429 Too Many Requests`.
+
+    Attributes:
+        rate (float): Tokens added per second.
+        capacity (float): Largest number of tokens held, i.e. the largest burst.
+    """
+    def __init__(
+            self, rate: float, capacity: float, clock: Callable[[], float] = time.monotonic
+        ):
+        """
+        Args:
+            rate: Tokens added per second.
+            capacity: Largest number of tokens held. The bucket starts full.
+            clock: Monotonic clock.
+        """
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._tokens = capacity
+        self._updated = clock()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def for_limit(
+            cls, requests: int, per: float, burst: float = 0.1,
+            clock: Callable[[], float] = time.monotonic,
+        ) -> "TokenBucket":
+        """Size a bucket so no `per`-second window ever sees more than `requests` calls.
+
+        Args:
+            requests: The provider's published limit.
+            per: Length of the limit's window in seconds.
+            burst: Fraction of `requests` that may be sent back to back.
+        """
+        capacity = max(1.0, requests * burst)
+        return cls((requests - capacity) / per, capacity, clock)
+
+    def reserve(self) -> float:
+        """Take a token and return the seconds to wait before using it."""
+        with self._lock:
+            now = self._clock()
+            if now > self._updated:
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+            self._tokens -= 1
+            return (self._updated - now) + max(0.0, -self._tokens) / self.rate
+
+    def pause(self, seconds: float) -> None:
+        """Hand out no tokens for `seconds`, then refill from empty."""
+        with self._lock:
+            self._updated = max(self._updated, self._clock() + seconds)
+            self._tokens = min(self._tokens, 0.0)
+
+
+def retry_after(headers: Any, now: Optional[datetime] = None) -> Optional[float]:
+    """Return the delay requested by a `Retry-After` header, in seconds, if any.
+
+    Both forms of the header are understood: a number of seconds and an HTTP date.
+    """
+    value = headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    now = now or datetime.now(timezone.utc)
+    return max(0.0, (when - now).total_seconds())
+
+
+class RateLimitedTransport:
+    """Sends requests within a provider's rate limits and retries transient failures.
+
+    Every attempt first waits for a token from each bucket. A `429` pauses the buckets
+    for the `Retry-After` delay (or `X-RateLimit-Reset`, or a backoff when neither is
+    given), so every caller sharing the transport backs off together, and the request
+    is retried: a `429` means the server did not process it. `5xx` responses and the
+    `retry_exceptions` raised by the client are retried only for idempotent methods,
+    after an exponential backoff with full jitter. When a response reports that no
+    requests remain in the window, the buckets are paused until the window resets.
+
+    The transport is independent of the HTTP client: `request` takes a callable that
+    sends one attempt and returns a response with `status_code` and `headers` (as
+    `requests` responses have).
+
+    Attributes:
+        buckets (list[TokenBucket]): Limits every request must fit within.
+        max_retries (int): Retries after the first attempt before giving up.
+        backoff_base (float): Seconds of backoff before the first retry.
+        backoff_max (float): Largest backoff between two attempts.
+        max_retry_after (float): Longest `Retry-After` that is waited out; a `429`
+            asking for more is returned to the caller.
+        requests (int): Attempts sent.
+        throttled (int): `429` responses received.
+        retried (int): Attempts that were retries.
+        wait_time (float): Seconds spent waiting for the rate limit before sending.
+    """
+    def __init__(
+            self,
+            buckets: Sequence[TokenBucket],
+            max_retries: int = 4,
+            backoff_base: float = 0.5,
+            backoff_max: float = 30.0,
+            max_retry_after: float = 5 * 60.0,
+            retry_exceptions: tuple[type[BaseException], ...] = (),
+            sleep: Callable[[float], None] = time.sleep,
+        ):
+        """
+        Args:
+            buckets: Limits every request must fit within.
+            max_retries: Retries after the first attempt before giving up.
+            backoff_base: Seconds of backoff before the first retry, doubled each time.
+            backoff_max: Largest backoff between two attempts.
+            max_retry_after: Longest `Retry-After` that is waited out.
+            retry_exceptions: Client errors (e.g. connection failures) that are retried
+                for idempotent methods.
+            sleep: Blocking sleep used by `request`.
+        """
+        self.buckets = list(buckets)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.max_retry_after = max_retry_after
+        self.retry_exceptions = retry_exceptions
+        self.requests = 0
+        self.throttled = 0
+        self.retried = 0
+        self.wait_time = 0.0
+        self._sleep = sleep
+
+    def request(self, method: str, send: Callable[[], Any]) -> Any:
+        """Send one request through `send`, waiting for the rate limit and retrying.
+
+        Returns:
+            The last response. Errors that are not retried, or that remain after the
+            last retry, are raised from `send` unchanged.
+        """
+        attempt = 0
+        while True:
+            self._sleep(self._reserve())
+            try:
+                response = send()
+            except self.retry_exceptions:
+                delay = self._error_delay(method, attempt)
+                if delay is None:
+                    raise
+            else:
+                delay = self._response_delay(method, response, attempt)
+                if delay is None:
+                    return response
+            attempt += 1
+            self.retried += 1
+            self._sleep(delay)
+
+    def pause(self, seconds: float) -> None:
+        """Stop sending on every bucket for `seconds`."""
+        for bucket in self.buckets:
+            bucket.pause(seconds)
+
+    def backoff(self, attempt: int) -> float:
+        """Return a random delay before retry number `attempt + 1` (full jitter)."""
+        return random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+
+    def _reserve(self) -> float:
+        self.requests += 1
+        wait = max((bucket.reserve() for bucket in self.buckets), default=0.0)
+        self.wait_time += wait
+        return wait
+
+    def _error_delay(self, method: str, attempt: int) -> Optional[float]:
+        if method.upper() not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+            return None
+        return self.backoff(attempt)
+
+    def _response_delay(self, method: str, response: Any, attempt: int) -> Optional[float]:
+        """Return the delay before retrying `response`, or None to return it."""
+        headers = response.headers
+        status = response.status_code
+        if status == 429:
+            self.throttled += 1
+            delay = retry_after(headers)
+            if delay is None:
+                delay = _reset_after(headers)
+            if delay is None:
+                delay = self.backoff(attempt)
+            if attempt >= self.max_retries or delay > self.max_retry_after:
+                return None
+            # Pausing the buckets makes every caller wait, not just this one.
+            self.pause(delay)
+            return 0.0
+
+        if headers.get("X-RateLimit-Remaining") == "0":
+            reset = _reset_after(headers)
+            if reset:
+                self.pause(reset)
+
+        if status in RETRY_STATUSES:
+            if method.upper() not in IDEMPOTENT_METHODS or attempt >= self.max_retries:
+                return None
+            delay = retry_after(headers)
+            return delay if delay is not None and delay <= self.max_retry_after else self.backoff(attempt)
+        return None
+
+
+def _reset_after(headers: Any) -> Optional[float]:
+    """Seconds until the rate limit window resets, from `X-RateLimit-Reset`."""
+    try:
+        return max(0.0, float(headers.get("X-RateLimit-Reset")))
+    except (TypeError, ValueError):
+        return None
+
+
+_shared: dict[str, RateLimitedTransport] = {}
+_shared_lock = threading.Lock()
+
+
+def shared_transport(
+        name: str,
+        limits: Sequence[tuple[int, float]],
+        retry_exceptions: tuple[type[BaseException], ...] = (),
+    ) -> RateLimitedTransport:
+    """Return the process-wide transport for a provider, creating it on first use.
+
+    Rate limits apply to the provider as a whole, so every client of the same provider
+    (any account) shares its buckets and counters.
+
+    Args:
+        name: Provider name, e.g. "whoop".
+        limits: The provider's published limits as (requests, per seconds) pairs.
+        retry_exceptions: Client errors that are retried for idempotent methods. The
+            exceptions given on first use are kept.
+    """
+    with _shared_lock:
+        transport = _shared.get(name)
+        if transport is None:
+            transport = RateLimitedTransport(
+                [TokenBucket.for_limit(requests, per) for requests, per in limits],
+                retry_exceptions=retry_exceptions,
+            )
+            _shared[name] = transport
+        return transport
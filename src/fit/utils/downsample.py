@@ -0,0 +1,51 @@
+"""Downsampling of time series for plotting."""
+from typing import Sequence
+
+
+def lttb(xs: Sequence[float], ys: Sequence[float], threshold: int) -> list[int]:
+    """Pick `threshold` points of a series that preserve its visual shape.
+
+    Implements Largest-Triangle-Three-Buckets (Steinarsson, 2013): the first and last
+    points are kept, the rest are split into `threshold - 2` buckets, and each bucket
+    keeps the point forming the largest triangle with the previously kept point and the
+    average of the next bucket. Peaks and dips survive, unlike with plain averaging or
+    striding.
+
+    Args:
+        xs: The x values, in increasing order (e.g. timestamps).
+        ys: The y values, one per x.
+        threshold: The number of points to keep. At least 3.
+
+    Returns:
+        The indices of the kept points, in increasing order. All indices if the series
+        already has at most `threshold` points.
+    """
+    n = len(xs)
+    if threshold >= n or n <= 2:
+        return list(range(n))
+    if threshold < 3:
+        raise ValueError("threshold must be at least 3")
+
+    bucket_size = (n - 2) / (threshold - 2)
+    selected = [0]
+    a = 0
+    for i in range(threshold - 2):
+        start = int(i * bucket_size) + 1
+        end = int((i + 1) * bucket_size) + 1
+        next_end = min(int((i + 2) * bucket_size) + 1, n)
+
+        avg_x = sum(xs[end:next_end]) / (next_end - end)
+        avg_y = sum(ys[end:next_end]) / (next_end - end)
+
+        best, best_area = start, -1.0
+        for j in range(start, end):
+            area = abs(
+                (xs[a] - avg_x) * (ys[j] - ys[a]) - (xs[a] - xs[j]) * (avg_y - ys[a])
+            )
+            if area > best_area:
+                best, best_area = j, area
+        selected.append(best)
+        a = best
+
+    selected.append(n - 1)
+    return selected
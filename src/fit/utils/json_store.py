@@ -0,0 +1,123 @@
+"""A JSON file kept in memory and written atomically."""
+from contextlib import contextmanager
+import copy
+import json
+import os
+from pathlib import Path
+import tempfile
+import threading
+from typing import Any, Callable, Dict, Iterator, Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: writers are only serialized within the process.
+    fcntl = None
+
+
+class JsonStore:
+    """A JSON object stored in a file, cached in memory and reloaded only when the file changes.
+
+    Reads cost one `stat` call in the steady state. Writes are serialized across threads
+    and, where `fcntl` is available, across processes, and replace the file atomically
+    through a temporary file, `fsync` and `rename`, so readers never see a partial file.
+
+    Attributes:
+        path (str): Path of the JSON file.
+        version (int): Incremented every time the in-memory state changes.
+    """
+    def __init__(self, path: str, default: Optional[Dict[str, Any]] = None, mode: Optional[int] = None):
+        """
+        Args:
+            path: Path of the JSON file.
+            default: Value returned while the file does not exist.
+            mode: Permission bits to create the file with.
+        """
+        self.path = path
+        self.version = 0
+        self._default = default or {}
+        self._mode = mode
+        self._lock = threading.RLock()
+        self._data: Dict[str, Any] = copy.deepcopy(self._default)
+        self._file_state = None
+
+    def read(self) -> Dict[str, Any]:
+        """Return a copy of the stored object, reloading it if the file changed."""
+        with self._lock:
+            self._refresh()
+            return copy.deepcopy(self._data)
+
+    def update(self, mutate: Callable[[Dict[str, Any]], None]) -> Dict[str, Any]:
+        """Apply `mutate` to the latest stored object and write the result back.
+
+        The read-modify-write cycle holds the store's lock, so concurrent writers cannot
+        lose each other's changes.
+
+        Args:
+            mutate: Function that modifies the object in place.
+
+        Returns:
+            A copy of the object that was written.
+        """
+        with self._lock, self._file_lock():
+            self._refresh()
+            data = copy.deepcopy(self._data)
+            mutate(data)
+            self._write(data)
+            self._data = data
+            self._file_state = self._stat()
+            self.version += 1
+            return copy.deepcopy(data)
+
+    def _stat(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _refresh(self) -> None:
+        file_state = self._stat()
+        if file_state == self._file_state:
+            return
+
+        if file_state is None:
+            self._data = copy.deepcopy(self._default)
+        else:
+            with open(self.path, 'r') as f:
+                self._data = json.load(f)
+        self._file_state = file_state
+        self.version += 1
+
+    def _write(self, data: Dict[str, Any]) -> None:
+        directory = os.path.dirname(self.path) or "."
+        Path(directory).mkdir(parents=True, exist_ok=True)
+
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(self.path)}.")
+        try:
+            if self._mode is not None:
+                os.chmod(tmp_path, self._mode)
+            with os.fdopen(fd, 'w') as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.path)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.unlink(tmp_path)
+            raise
+
+    @contextmanager
+    def _file_lock(self) -> Iterator[None]:
+        """Hold an exclusive lock on a sidecar lock file while writing."""
+        if fcntl is None:
+            yield
+            return
+
+        directory = os.path.dirname(self.path) or "."
+        Path(directory).mkdir(parents=True, exist_ok=True)
+        with open(f"{self.path}.lock", 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
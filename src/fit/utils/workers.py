@@ -0,0 +1,108 @@
+"""Running blocking calls from async code without stalling the event loop."""
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+import threading
+from typing import Any, AsyncIterator, Callable, Iterable, TypeVar
+
+T = TypeVar("T")
+
+
+class WorkerPoolBusy(RuntimeError):
+    """Raised when a `BoundedWorkerPool` already has as many calls queued as it accepts."""
+
+
+class BoundedWorkerPool:
+    """A thread pool for blocking calls with a concurrency limit, timeout and backpressure.
+
+    At most `max_workers` calls run at once and at most `max_queue` more wait for a
+    worker; further calls fail fast with `WorkerPoolBusy` instead of piling up.
+
+    Attributes:
+        max_workers (int): Number of calls that run concurrently.
+        max_queue (int): Number of calls allowed to wait for a free worker.
+        timeout (float): Seconds a caller waits for a result before giving up.
+    """
+    def __init__(self, max_workers: int = 4, max_queue: int = 16, timeout: float = 60.0):
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.timeout = timeout
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="fit-worker")
+        self._pending = 0
+        self._lock = threading.Lock()
+
+    @property
+    def pending(self) -> int:
+        """Number of calls currently running or waiting for a worker."""
+        return self._pending
+
+    async def run(self, fn: Callable[..., T], *args: Any, **kwargs: Any) -> T:
+        """Run `fn(*args, **kwargs)` on a worker thread and await its result.
+
+        A timed-out call stops being awaited, but its thread runs to completion in the
+        background since Python threads cannot be interrupted.
+
+        Raises:
+            WorkerPoolBusy: If the pool's queue is full.
+            asyncio.TimeoutError: If the call takes longer than `timeout`.
+        """
+        future = self._submit(functools.partial(fn, *args, **kwargs))
+        return await asyncio.wait_for(asyncio.shield(future), self.timeout)
+
+    async def stream(self, fn: Callable[..., Iterable[T]], *args: Any, **kwargs: Any) -> AsyncIterator[T]:
+        """Iterate `fn(*args, **kwargs)` on a worker thread, yielding items as they arrive.
+
+        The iteration holds one worker until it finishes. If the consumer stops early, the
+        worker stops at the next item.
+
+        Raises:
+            WorkerPoolBusy: If the pool's queue is full.
+            asyncio.TimeoutError: If no item arrives within `timeout` of the previous one.
+        """
+        loop = asyncio.get_running_loop()
+        queue: asyncio.Queue = asyncio.Queue()
+        stopped = threading.Event()
+        done = object()
+
+        def produce():
+            try:
+                for item in fn(*args, **kwargs):
+                    if stopped.is_set():
+                        return
+                    loop.call_soon_threadsafe(queue.put_nowait, (item, None))
+            except Exception as e:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, e))
+            else:
+                loop.call_soon_threadsafe(queue.put_nowait, (done, None))
+
+        self._submit(produce)
+        try:
+            while True:
+                item, error = await asyncio.wait_for(queue.get(), self.timeout)
+                if item is done:
+                    if error is not None:
+                        raise error
+                    return
+                yield item
+        finally:
+            stopped.set()
+
+    def shutdown(self) -> None:
+        """Stop accepting work and wait for running calls to finish."""
+        self._executor.shutdown(wait=True)
+
+    def _submit(self, call: Callable[[], T]) -> "asyncio.Future[T]":
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                raise WorkerPoolBusy(
+                    f"{self._pending} calls already in progress, try again shortly"
+                )
+            self._pending += 1
+
+        future = asyncio.get_running_loop().run_in_executor(self._executor, call)
+        future.add_done_callback(lambda _: self._release())
+        return future
+
+    def _release(self) -> None:
+        with self._lock:
+            self._pending -= 1
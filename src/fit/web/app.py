@@ -1,34 +1,59 @@
 import fasthtml.common as fh
+import fit.web.assets as assets
+import fit.web.common as common
+from fit.web.compression import CompressionMiddleware
 import fit.web.food as food
 import fit.web.personal as personal
 import fit.web.progress as progress
 import fit.web.trackers as trackers
 
 
-tlink = (fh.Script(src="https://cdn.tailwindcss.com"),)
-plotly = fh.Script(src="https://cdn.plot.ly/plotly-2.32.0.min.js")
-dlink = fh.Link(
-    rel="stylesheet",
-    href="https://cdn.jsdelivr.net/npm/daisyui@4.12.10/dist/full.css",
-)
 modal_css = fh.Link(rel="stylesheet", href="/static/public/modal.css")
-app = fh.FastHTML(hdrs=(tlink, plotly, dlink, fh.picolink, modal_css))
 
-# Food routes
-app.get("/food")(food.get)
-app.post("/analyze_text")(food.analyze_text)
-app.post("/analyze_image")(food.analyze_image)
 
-# Personal routes
-app.get("/personal")(personal.get)
-app.post("/update_personal")(personal.update_personal)
+def create_app() -> fh.FastHTML:
+    """
+    Build the web app. The database, LLM clients and tracker are created on first use
+    (see `common.get_db` and friends) or by the startup warm-up, never at import.
+    """
+    # htmx, Tailwind, DaisyUI, Plotly etc. come from the vendored asset build (see
+    # assets.py), which replaces FastHTML's CDN-hosted default headers.
+    assets.check()
+    app = fh.FastHTML(
+        hdrs=(*assets.headers(), modal_css),
+        htmx=False,
+        surreal=False,
+        on_startup=[common.warm_up],
+        on_shutdown=[common.shut_down],
+    )
+    app.add_middleware(CompressionMiddleware)
 
-# Progress routes
-app.get("/progress")(progress.get)
+    # Static assets
+    app.get("/static/{fname}")(assets.serve)
 
-# Tracker routes
-app.get("/trackers")(trackers.get)
-app.post("/connect_tracker")(trackers.connect_tracker)
-app.post("/set_active_tracker")(trackers.set_active_tracker)
+    # Food routes
+    app.get("/food")(food.get)
+    app.post("/analyze_text")(food.analyze_text)
+    app.post("/analyze_image")(food.analyze_image)
+    app.post("/recommendations")(food.recommendations)
+    app.get("/recommendations/stream")(food.stream_recommendations)
 
-fh.serve() 
\ No newline at end of file
+    # Personal routes
+    app.get("/personal")(personal.get)
+    app.post("/update_personal")(personal.update_personal)
+
+    # Progress routes
+    app.get("/progress")(progress.get)
+    app.get("/api/progress/weight")(progress.api_weight)
+
+    # Tracker routes
+    app.get("/trackers")(trackers.get)
+    app.post("/connect_tracker")(trackers.connect_tracker)
+    app.post("/set_active_tracker")(trackers.set_active_tracker)
+
+    return app
+
+
+app = create_app()
+
+fh.serve()
@@ -0,0 +1,234 @@
+"""Vendored, content-hashed static assets for the web app.
+
+`python -m fit.web.assets build` downloads the pinned third-party scripts and styles,
+compiles a purged Tailwind + DaisyUI stylesheet for the classes the app actually uses,
+and writes every file to `static/` under a content-hashed name, next to pre-compressed
+`.gz` (and, if the `brotli` package is installed, `.br`) variants and a `manifest.json`.
+
+At runtime `headers()` links the hashed local files, which are served with
+`Cache-Control: immutable`, so first paint needs no external network. The build is a
+required install step: `create_app` calls `check()`, which logs a warning naming any
+asset that has not been built, and those fall back to their CDN URL.
+"""
+import argparse
+from dataclasses import dataclass
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+from pathlib import Path
+import shutil
+import subprocess
+
+import fasthtml.common as fh
+
+try:
+    import brotli
+except ImportError:  # optional: only .gz variants are written without it
+    brotli = None
+
+WEB_DIR = Path(__file__).parent
+SOURCE_DIR = WEB_DIR / "assets"
+BUILD_DIR = SOURCE_DIR / "build"
+STATIC_DIR = WEB_DIR / "static"
+MANIFEST_PATH = STATIC_DIR / "manifest.json"
+URL_PREFIX = "/static"
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+
+TAILWIND_CDN = "https://cdn.tailwindcss.com"
+DAISYUI_CDN = "https://cdn.jsdelivr.net/npm/daisyui@4.12.10/dist/full.css"
+
+
+@dataclass(frozen=True)
+class Asset:
+    """A static asset linked from every page.
+
+    Attributes:
+        name: The logical file name, e.g. "plotly.js".
+        url: Where the build downloads it from, and the fallback if it is not built.
+            `None` for assets compiled locally.
+    """
+    name: str
+    url: str | None = None
+
+    @property
+    def is_css(self) -> bool:
+        return self.name.endswith(".css")
+
+
+# In page order. htmx and the FastHTML helper scripts replace FastHTML's default
+# headers, which are otherwise loaded from CDNs with unpinned versions.
+ASSETS = [
+    Asset("htmx.js", "https://unpkg.com/htmx.org@2.0.3/dist/htmx.min.js"),
+    Asset("fasthtml.js", "https://cdn.jsdelivr.net/gh/answerdotai/fasthtml-js@1.0.4/fasthtml.js"),
+    Asset("surreal.js", "https://cdn.jsdelivr.net/gh/answerdotai/surreal@main/surreal.js"),
+    Asset("css-scope-inline.js", "https://cdn.jsdelivr.net/gh/gnat/css-scope-inline@main/script.js"),
+    Asset("htmx-ext-sse.js", "https://unpkg.com/htmx-ext-sse@2.2.2/sse.js"),
+    Asset("plotly.js", "https://cdn.plot.ly/plotly-2.32.0.min.js"),
+    Asset("pico.css", "https://cdn.jsdelivr.net/npm/@picocss/pico@2.0.6/css/pico.min.css"),
+    Asset("app.css"),  # Tailwind + DaisyUI, compiled by `build_css`
+]
+
+_manifest: dict[str, str] | None = None
+
+
+def manifest() -> dict[str, str]:
+    """Return the logical name -> hashed file name map written by the last build."""
+    global _manifest
+    if _manifest is None:
+        _manifest = json.loads(MANIFEST_PATH.read_text()) if MANIFEST_PATH.exists() else {}
+    return _manifest
+
+
+def version() -> str:
+    """Return a short hash of the manifest, which changes whenever any asset does."""
+    return hashlib.sha256(json.dumps(manifest(), sort_keys=True).encode()).hexdigest()[:8]
+
+
+def asset_url(name: str) -> str | None:
+    """Return the URL of the built asset `name`, or `None` if it has not been built."""
+    hashed = manifest().get(name)
+    return f"{URL_PREFIX}/{hashed}" if hashed else None
+
+
+def missing() -> list[str]:
+    """Return the names of the assets that have not been built."""
+    built = manifest()
+    return [
+        asset.name for asset in ASSETS
+        if asset.name not in built or not (STATIC_DIR / built[asset.name]).exists()
+    ]
+
+
+def check() -> None:
+    """Log a warning if any asset is not built, since pages then load it from a CDN."""
+    names = missing()
+    if names:
+        logging.warning(
+            f"Static assets not built, loading {', '.join(names)} from CDNs. "
+            "Run `python -m fit.web.assets build` so pages do not depend on the network."
+        )
+
+
+def headers() -> list:
+    """Return the page headers for every asset, local where built and CDN otherwise."""
+    hdrs = []
+    for asset in ASSETS:
+        url = asset_url(asset.name)
+        if url is None and asset.name == "app.css":
+            # Unbuilt: compile Tailwind in the browser and load the full DaisyUI build.
+            hdrs += [fh.Script(src=TAILWIND_CDN), fh.Link(rel="stylesheet", href=DAISYUI_CDN)]
+            continue
+        url = url or asset.url
+        hdrs.append(fh.Link(rel="stylesheet", href=url) if asset.is_css else fh.Script(src=url))
+    hdrs.append(fh.Style(":root { --pico-font-size: 100%; }"))
+    return hdrs
+
+
+async def serve(req, fname: str):
+    """Serve a built asset, pre-compressed if the client accepts it."""
+    if fname not in manifest().values():
+        return fh.Response(status_code=404)
+
+    path = STATIC_DIR / fname
+    media_type = mimetypes.guess_type(fname)[0] or "application/octet-stream"
+    headers = {"Cache-Control": IMMUTABLE, "Vary": "Accept-Encoding"}
+    accepted = req.headers.get("accept-encoding", "")
+    for encoding, suffix in (("br", ".br"), ("gzip", ".gz")):
+        variant = path.with_name(path.name + suffix)
+        if encoding in accepted and variant.exists():
+            headers["Content-Encoding"] = encoding
+            return fh.FileResponse(variant, media_type=media_type, headers=headers)
+    return fh.FileResponse(path, media_type=media_type, headers=headers)
+
+
+def download(asset: Asset) -> Path:
+    """Download a third-party asset into the build directory."""
+    import httpx
+
+    path = BUILD_DIR / asset.name
+    response = httpx.get(asset.url, follow_redirects=True, timeout=60)
+    response.raise_for_status()
+    path.write_bytes(response.content)
+    return path
+
+
+def build_css() -> Path:
+    """Compile `app.css` with the Tailwind CLI, keeping only the classes the app uses.
+
+    Requires Node.js; the Tailwind and DaisyUI versions are pinned in
+    `assets/package.json`.
+    """
+    path = BUILD_DIR / "app.css"
+    subprocess.run(["npm", "install", "--no-audit", "--no-fund"], cwd=SOURCE_DIR, check=True)
+    subprocess.run(
+        [
+            "npx", "tailwindcss", "--config", "tailwind.config.js",
+            "--input", "app.css", "--output", str(path), "--minify",
+        ],
+        cwd=SOURCE_DIR,
+        check=True,
+    )
+    return path
+
+
+def fingerprint(path: Path) -> str:
+    """Copy a built file to `static/` under a content-hashed name, with compressed variants."""
+    data = path.read_bytes()
+    digest = hashlib.sha256(data).hexdigest()[:12]
+    hashed = f"{path.stem}.{digest}{path.suffix}"
+    target = STATIC_DIR / hashed
+    target.write_bytes(data)
+    # mtime=0 keeps the .gz byte-identical across builds of the same content.
+    target.with_name(hashed + ".gz").write_bytes(gzip.compress(data, compresslevel=9, mtime=0))
+    if brotli is not None:
+        target.with_name(hashed + ".br").write_bytes(brotli.compress(data, quality=11))
+    return hashed
+
+
+def build(skip_css: bool = False) -> dict[str, str]:
+    """Download, compile and fingerprint every asset, and write the manifest."""
+    global _manifest
+    BUILD_DIR.mkdir(parents=True, exist_ok=True)
+    STATIC_DIR.mkdir(parents=True, exist_ok=True)
+    previous = manifest()
+
+    built = {}
+    for asset in ASSETS:
+        if asset.url is not None:
+            built[asset.name] = fingerprint(download(asset))
+        elif not skip_css:
+            built[asset.name] = fingerprint(build_css())
+        elif asset.name in previous:
+            built[asset.name] = previous[asset.name]
+
+    # Drop files from earlier builds that are no longer referenced.
+    keep = set(built.values())
+    for path in STATIC_DIR.iterdir():
+        if path.name != MANIFEST_PATH.name and path.name.removesuffix(".gz").removesuffix(".br") not in keep:
+            path.unlink()
+
+    MANIFEST_PATH.write_text(json.dumps(built, indent=2) + "\n")
+    _manifest = built
+    return built
+
+
+def main():
+    """Build or clean the vendored static assets."""
+    parser = argparse.ArgumentParser(description="Static asset pipeline")
+    parser.add_argument("command", choices=["build", "clean"])
+    parser.add_argument("--skip-css", action="store_true", help="Keep the current app.css (no Node.js needed)")
+    args = parser.parse_args()
+
+    if args.command == "build":
+        for name, hashed in build(skip_css=args.skip_css).items():
+            print(f"{name} -> {hashed}")
+    else:
+        shutil.rmtree(BUILD_DIR, ignore_errors=True)
+        shutil.rmtree(STATIC_DIR, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
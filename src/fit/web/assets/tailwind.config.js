@@ -0,0 +1,9 @@
+// Classes are collected from the cls="..." strings in the page modules, so the built
+// stylesheet only contains what the app uses.
+module.exports = {
+  content: ["../**/*.py"],
+  plugins: [require("daisyui")],
+  daisyui: {
+    themes: ["winter"],
+  },
+};
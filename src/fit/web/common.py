@@ -1,59 +1,186 @@
+import functools
 import os
-import json
+import threading
+from typing import Callable, TypeVar
 import fasthtml.common as fh
-from fit.nutrition.assistants import NutritionLogger
-from fit.trackers.manager import get_active_tracker
-
-DB_PATH = "data/nutrition.db"
-
-def init_db():
-    """
-    Initialize the database and create tables if they don't exist.
-    """
-    db = fh.database(DB_PATH)
-
-    meals_table = db.t.meals
-    if meals_table not in db.t:
-        meals_table.create(
-            dict(
-                datetime_entered=str,
-                meal_time=str,
-                user_description=str,
-                llm_summary=str,
-                calories=float,
-                protein=float,
-                carbs=float,
-                fat=float,
-                fiber=float,
-                vitamin_a=float,
-                vitamin_c=float,
-                vitamin_d=float,
-                calcium=float,
-                iron=float,
-                potassium=float,
-                sodium=float,
-                
-            ),
-            pk='datetime_entered' # TODO: change to a more suitable primary key
-        )
-
-    measurements_table = db.t.measurements  
-    if measurements_table not in db.t:
-        measurements_table.create(
-            dict(
-                datetime=str,
-                height=float,
-                weight=float,
-            ),
-            pk='datetime' # TODO: change to a more suitable primary key
-        )
+from fit.utils.workers import BoundedWorkerPool
+from fit.web import assets
+from fit.web.database import DB_PATH, connect
+from fit.web.render_cache import RENDER_VERSION, RenderCache
+
+T = TypeVar("T")
+
+# LLM calls block for seconds, so they run on a bounded thread pool instead of the event
+# loop. Tune with FIT_LLM_WORKERS, FIT_LLM_QUEUE and FIT_LLM_TIMEOUT (seconds).
+LLM_WORKERS = int(os.environ.get("FIT_LLM_WORKERS", 8))
+LLM_QUEUE = int(os.environ.get("FIT_LLM_QUEUE", 32))
+LLM_TIMEOUT = float(os.environ.get("FIT_LLM_TIMEOUT", 60))
+
+# Tracker data is synced into a local database every FIT_TRACKER_SYNC_INTERVAL seconds.
+# Set it to 0 when a separate `python -m fit.trackers.sync` worker does the syncing.
+TRACKER_SYNC_INTERVAL = float(os.environ.get("FIT_TRACKER_SYNC_INTERVAL", 15 * 60))
+# Synced data older than this is not trusted and the tracker is asked directly instead.
+TRACKER_DATA_MAX_AGE = float(os.environ.get("FIT_TRACKER_DATA_MAX_AGE", 60 * 60))
+
+
+def resource(factory: Callable[[], T]) -> Callable[[], T]:
+    """
+    Turn `factory` into an accessor that creates the resource on first call and then
+    returns the same instance. Nothing is created at import time, so importing the web
+    modules opens no database, loads no LLM libraries and contacts no tracker.
+    `accessor.reset()` drops the instance so the next call creates a new one.
+    """
+    lock = threading.Lock()
+    instance = []
 
-    return db, (meals_table, measurements_table)
+    @functools.wraps(factory)
+    def get() -> T:
+        if not instance:
+            with lock:
+                if not instance:
+                    instance.append(factory())
+        return instance[0]
+
+    get.reset = instance.clear
+    return get
+
+
+@resource
+def get_db():
+    """
+    The meals/measurements database, migrated to the current schema.
+    """
+    return connect(DB_PATH)
+
+
+@resource
+def get_nutrition_tracker():
+    """
+    The `NutritionLogger`, with its result cache and local food table.
+    """
+    from fit.nutrition.assistants import NutritionLogger
+    from fit.nutrition.cache import MacroCache
+    from fit.nutrition.food_db import FoodDatabase
 
+    return NutritionLogger(cache=MacroCache(), food_db=FoodDatabase.load())
+
+
+@resource
+def get_food_assistant():
+    """
+    The `FoodAssistant` used for meal recommendations.
+    """
+    from fit.nutrition.assistants import FoodAssistant
+
+    return FoodAssistant()
+
+
+@resource
+def get_llm_pool():
+    """
+    The worker pool that LLM calls run on.
+    """
+    return BoundedWorkerPool(max_workers=LLM_WORKERS, max_queue=LLM_QUEUE, timeout=LLM_TIMEOUT)
+
+
+def get_tracker():
+    """
+    The fitness tracker to read from, or None: the active tracker, or a composite of
+    every connected tracker that queries them concurrently. The tracker manager caches
+    it and it authenticates on its first API call, not here.
+    """
+    from fit.trackers.manager import get_combined_tracker
+
+    return get_combined_tracker()
+
+
+def get_tracker_source():
+    """
+    The key the active tracker account's synced data is stored under, or None.
+    """
+    from fit.trackers.manager import store
+
+    return store.active_tracker_source()
+
+
+@resource
+def get_tracker_data():
+    """
+    The local copy of tracker cycles and recoveries kept current by the tracker sync.
+    """
+    from fit.trackers.sync import TrackerDataStore
+
+    return TrackerDataStore()
+
+
+@resource
+def get_tracker_sync():
+    """
+    The scheduler that syncs the active tracker into `get_tracker_data()`.
+    """
+    from fit.trackers.sync import TrackerSync
+
+    return TrackerSync(get_tracker_data(), interval=TRACKER_SYNC_INTERVAL or 15 * 60)
+
+
+# Full pages embed the asset URLs, so a new asset build invalidates cached pages too.
+render_cache = RenderCache(version=f"{RENDER_VERSION}-{assets.version()}")
+
+
+def warm_up():
+    """
+    Create the database and LLM resources at server start instead of on the first
+    request, and start the tracker sync. The LLM client setup can be skipped with
+    FIT_LLM_WARMUP=0.
+    """
+    get_db()
+    if TRACKER_SYNC_INTERVAL > 0:
+        get_tracker_sync().start()
+    if os.environ.get("FIT_LLM_WARMUP", "1") != "0":
+        get_nutrition_tracker().warm_up()
+        get_food_assistant().warm_up()
+
+
+def shut_down():
+    """
+    Stop the tracker sync at server shutdown.
+    """
+    if TRACKER_SYNC_INTERVAL > 0:
+        get_tracker_sync().stop(timeout=5)
+
+
+@render_cache.component
+def navbar():
+    """
+    Return the navigation bar shared by every page.
+    """
+    return fh.Div(
+        fh.Div(
+            fh.A(
+                "Food",
+                href="/food",
+                cls="btn btn-ghost text-white",
+            ),
+            fh.A(
+                "Personal",
+                href="/personal", 
+                cls="btn btn-ghost text-white",
+            ),
+            fh.A(
+                "Progress",
+                href="/progress",
+                cls="btn btn-ghost text-white",
+            ),
+            fh.A(
+                "Trackers",
+                href="/trackers",
+                cls="btn btn-ghost text-white",
+            ),
+            cls="flex justify-center items-center flex-1",
+        ),
+        cls="navbar bg-slate-950 bg-opacity-100 rounded-m h-[5vh] flex justify-center",
+    )
 
-DB, (MEALS_TABLE, MEASUREMENTS_TABLE) = init_db()
-nutrition_tracker = NutritionLogger()
-active_tracker = get_active_tracker()
 
 def page_outline(selidx, title, *c):
     """
@@ -63,32 +190,7 @@ def page_outline(selidx, title, *c):
         fh.Title(title),
         fh.Body(
             fh.Html(data_theme="winter"),
-            fh.Div(
-                fh.Div(
-                    fh.A(
-                        "Food",
-                        href="/food",
-                        cls="btn btn-ghost text-white",
-                    ),
-                    fh.A(
-                        "Personal",
-                        href="/personal", 
-                        cls="btn btn-ghost text-white",
-                    ),
-                    fh.A(
-                        "Progress",
-                        href="/progress",
-                        cls="btn btn-ghost text-white",
-                    ),
-                    fh.A(
-                        "Trackers",
-                        href="/trackers",
-                        cls="btn btn-ghost text-white",
-                    ),
-                    cls="flex justify-center items-center flex-1",
-                ),
-                cls="navbar bg-slate-950 bg-opacity-100 rounded-m h-[5vh] flex justify-center",
-            ),
+            navbar(),
             fh.Div(
                 fh.Div(*c, cls="min-h-[calc(100vh-8vh)] pb-[3vh]"),
                 cls="overflow-y-auto",
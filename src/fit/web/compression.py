@@ -0,0 +1,166 @@
+"""Negotiated gzip/brotli response compression for the web app."""
+import zlib
+
+try:
+    import brotli
+except ImportError:  # optional: gzip only without it
+    brotli = None
+
+# Bodies smaller than this are sent as-is: the encoding headers and the compression
+# framing would eat most of the savings.
+MINIMUM_SIZE = 500
+
+# Content that is already compressed gains nothing from another pass.
+SKIP_CONTENT_TYPES = (
+    "image/", "video/", "audio/", "font/woff", "application/zip", "application/gzip",
+    "application/x-gzip", "application/x-brotli", "application/octet-stream", "application/pdf",
+)
+
+# Levels tuned for on-the-fly compression: most of the size reduction for a fraction
+# of the CPU cost of the maximum settings.
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 4
+
+
+def negotiate(accept_encoding: str) -> str | None:
+    """Pick "br" or "gzip" from an `Accept-Encoding` header, or `None` for identity."""
+    accepted = {}
+    for item in accept_encoding.lower().split(","):
+        coding, _, params = item.strip().partition(";")
+        q = 1.0
+        if params.strip().startswith("q="):
+            try:
+                q = float(params.strip()[2:])
+            except ValueError:
+                q = 0.0
+        accepted[coding.strip()] = q
+
+    def ok(coding: str) -> bool:
+        return accepted.get(coding, accepted.get("*", 0.0)) > 0
+    if brotli is not None and ok("br"):
+        return "br"
+    if ok("gzip"):
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental compressor for one response body."""
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._br = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._gz = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, flush: bool) -> bytes:
+        """Compress a chunk. `flush` makes everything so far decodable by the client."""
+        if self.encoding == "br":
+            out = self._br.process(data)
+            return out + self._br.flush() if flush else out
+        out = self._gz.compress(data)
+        return out + self._gz.flush(zlib.Z_SYNC_FLUSH) if flush else out
+
+    def finish(self, data: bytes = b"") -> bytes:
+        if self.encoding == "br":
+            return self._br.process(data) + self._br.finish()
+        return self._gz.compress(data) + self._gz.flush(zlib.Z_FINISH)
+
+
+class CompressionMiddleware:
+    """ASGI middleware that compresses HTTP responses with gzip or brotli.
+
+    Single-body responses are compressed when at least `minimum_size` bytes. Streaming
+    responses (SSE, file and other chunked bodies) are compressed incrementally and each
+    chunk is flushed, so events reach the client as soon as they are sent. Responses that
+    already have a `Content-Encoding`, or whose type is in `SKIP_CONTENT_TYPES`, pass
+    through untouched. Strong ETags are weakened on compressed responses, since the bytes
+    differ from the identity representation.
+
+    Attributes:
+        minimum_size (int): Smallest single-body response that is compressed.
+        bytes_in (int): Uncompressed bytes of the responses compressed so far.
+        bytes_out (int): Compressed bytes sent for them.
+    """
+    def __init__(self, app, minimum_size: int = MINIMUM_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+        self.bytes_in = 0
+        self.bytes_out = 0
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            return await self.app(scope, receive, send)
+
+        headers = dict(scope["headers"])
+        encoding = negotiate(headers.get(b"accept-encoding", b"").decode("latin-1"))
+        if encoding is None:
+            return await self.app(scope, receive, send)
+
+        start = None
+        compressor = None
+
+        async def send_compressed(message):
+            nonlocal start, compressor
+            if message["type"] == "http.response.start":
+                start = message
+                return
+            if message["type"] != "http.response.body":
+                return await send(message)
+
+            body = message.get("body", b"")
+            more_body = message.get("more_body", False)
+
+            if start is not None:
+                response_start, start = start, None
+                if not self._compressible(response_start) or (
+                    not more_body and len(body) < self.minimum_size
+                ):
+                    await send(response_start)
+                    return await send(message)
+
+                compressor = _Compressor(encoding)
+                out = compressor.compress(body, flush=True) if more_body else compressor.finish(body)
+                self.bytes_in += len(body)
+                self.bytes_out += len(out)
+                await send(self._encoded_start(response_start, encoding, None if more_body else len(out)))
+                return await send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+            if compressor is None:
+                return await send(message)
+            out = compressor.compress(body, flush=True) if more_body else compressor.finish(body)
+            self.bytes_in += len(body)
+            self.bytes_out += len(out)
+            await send({"type": "http.response.body", "body": out, "more_body": more_body})
+
+        await self.app(scope, receive, send_compressed)
+
+    @staticmethod
+    def _compressible(start) -> bool:
+        if start["status"] in (204, 304) or start["status"] < 200:
+            return False
+        headers = {k.lower(): v for k, v in start.get("headers", [])}
+        if b"content-encoding" in headers:
+            return False
+        content_type = headers.get(b"content-type", b"").decode("latin-1").lower()
+        return not content_type.startswith(SKIP_CONTENT_TYPES)
+
+    @staticmethod
+    def _encoded_start(start, encoding: str, length: int | None):
+        headers = []
+        vary = None
+        for key, value in start.get("headers", []):
+            name = key.lower()
+            if name == b"content-length":
+                continue
+            if name == b"vary":
+                vary = value
+                continue
+            if name == b"etag" and not value.startswith(b"W/"):
+                value = b"W/" + value
+            headers.append((key, value))
+        if length is not None:
+            headers.append((b"content-length", str(length).encode()))
+        headers.append((b"content-encoding", encoding.encode()))
+        headers.append((b"vary", vary + b", Accept-Encoding" if vary else b"Accept-Encoding"))
+        return {**start, "headers": headers}
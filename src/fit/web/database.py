@@ -0,0 +1,326 @@
+"""The meals/measurements SQLite database: connection settings, schema migrations and the insert hot path."""
+import argparse
+from datetime import date, datetime
+import sqlite3
+
+import fasthtml.common as fh
+
+from fit.nutrition.data import NutritionalInfo
+
+DB_PATH = "data/nutrition.db"
+
+# Wait this long for another connection's write lock instead of failing with
+# "database is locked".
+BUSY_TIMEOUT_MS = 5000
+
+SCHEMA_VERSION = 3
+
+NUTRIENT_COLUMNS = [
+    "calories", "protein", "carbs", "fat", "fiber", "vitamin_a", "vitamin_c",
+    "vitamin_d", "calcium", "iron", "potassium", "sodium",
+]
+MEAL_COLUMNS = ["datetime_entered", "meal_time", "user_description", "llm_summary", *NUTRIENT_COLUMNS]
+MEASUREMENT_COLUMNS = ["datetime", "height", "weight"]
+
+_CREATE_TABLES = f"""
+CREATE TABLE IF NOT EXISTS meals (
+    id INTEGER PRIMARY KEY,
+    datetime_entered TEXT NOT NULL,
+    meal_time TEXT NOT NULL,
+    user_description TEXT,
+    llm_summary TEXT,
+    {", ".join(f"{column} REAL" for column in NUTRIENT_COLUMNS)}
+);
+CREATE INDEX IF NOT EXISTS idx_meals_meal_time ON meals(meal_time);
+CREATE TABLE IF NOT EXISTS measurements (
+    id INTEGER PRIMARY KEY,
+    datetime TEXT NOT NULL,
+    height REAL,
+    weight REAL
+);
+CREATE INDEX IF NOT EXISTS idx_measurements_datetime ON measurements(datetime);
+"""
+
+# Per-day sums of every nutrient, so daily/weekly/monthly views read one row per day
+# instead of every meal. Triggers keep it in step with `meals` inside the same
+# transaction as each insert, edit or delete.
+_DAY = "substr({row}.meal_time, 1, 10)"
+_ADD_MEAL = f"""
+    INSERT INTO daily_nutrition (day, meal_count, {", ".join(NUTRIENT_COLUMNS)})
+    VALUES ({_DAY.format(row="NEW")}, 1, {", ".join(f"COALESCE(NEW.{c}, 0)" for c in NUTRIENT_COLUMNS)})
+    ON CONFLICT(day) DO UPDATE SET
+        meal_count = meal_count + 1,
+        {", ".join(f"{c} = {c} + excluded.{c}" for c in NUTRIENT_COLUMNS)};
+"""
+_REMOVE_MEAL = f"""
+    UPDATE daily_nutrition SET
+        meal_count = meal_count - 1,
+        {", ".join(f"{c} = {c} - COALESCE(OLD.{c}, 0)" for c in NUTRIENT_COLUMNS)}
+    WHERE day = {_DAY.format(row="OLD")};
+    DELETE FROM daily_nutrition WHERE day = {_DAY.format(row="OLD")} AND meal_count <= 0;
+"""
+_CREATE_ROLLUP = f"""
+CREATE TABLE IF NOT EXISTS daily_nutrition (
+    day TEXT PRIMARY KEY,
+    meal_count INTEGER NOT NULL,
+    {", ".join(f"{column} REAL NOT NULL" for column in NUTRIENT_COLUMNS)}
+);
+CREATE TRIGGER IF NOT EXISTS meals_rollup_insert AFTER INSERT ON meals BEGIN
+{_ADD_MEAL}
+END;
+CREATE TRIGGER IF NOT EXISTS meals_rollup_delete AFTER DELETE ON meals BEGIN
+{_REMOVE_MEAL}
+END;
+CREATE TRIGGER IF NOT EXISTS meals_rollup_update
+AFTER UPDATE OF meal_time, {", ".join(NUTRIENT_COLUMNS)} ON meals BEGIN
+{_REMOVE_MEAL}
+{_ADD_MEAL}
+END;
+"""
+
+# A change counter per table, bumped by triggers on every insert, edit or delete, so
+# readers can tell whether a table changed (e.g. for ETags) without scanning it.
+VERSIONED_TABLES = ["measurements"]
+_BUMP_VERSION = """
+CREATE TRIGGER IF NOT EXISTS {table}_version_{suffix} AFTER {event} ON {table} BEGIN
+    UPDATE table_versions SET version = version + 1 WHERE name = '{table}';
+END;
+"""
+_CREATE_VERSIONS = """
+CREATE TABLE IF NOT EXISTS table_versions (
+    name TEXT PRIMARY KEY,
+    version INTEGER NOT NULL
+);
+""" + "".join(
+    f"INSERT OR IGNORE INTO table_versions (name, version) VALUES ('{table}', 0);\n"
+    + "".join(
+        _BUMP_VERSION.format(table=table, event=event, suffix=event.lower())
+        for event in ("INSERT", "UPDATE", "DELETE")
+    )
+    for table in VERSIONED_TABLES
+)
+
+# Kept as constants so sqlite3 reuses the prepared statement from its per-connection
+# statement cache instead of re-parsing the SQL on every insert.
+_INSERT_MEAL = (
+    f"INSERT INTO meals ({', '.join(MEAL_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(MEAL_COLUMNS))})"
+)
+_INSERT_MEASUREMENT = (
+    f"INSERT INTO measurements ({', '.join(MEASUREMENT_COLUMNS)}) "
+    f"VALUES ({', '.join('?' * len(MEASUREMENT_COLUMNS))})"
+)
+
+
+def connect(path: str = DB_PATH):
+    """
+    Open the database, apply the connection settings and migrate it to the current schema.
+    """
+    db = fh.database(path)
+    db.execute("PRAGMA journal_mode = WAL")
+    # In WAL mode NORMAL only syncs at checkpoints: a power loss can drop the last
+    # commits but never corrupts the database.
+    db.execute("PRAGMA synchronous = NORMAL")
+    db.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    migrate(db)
+    return db
+
+
+def migrate(db) -> None:
+    """
+    Bring the schema up to `SCHEMA_VERSION`, tracked in SQLite's `user_version`.
+
+    Version 0 is the original schema, keyed on ISO timestamp strings (so two meals logged
+    at the same instant collided) and without secondary indexes. Version 1 keys both
+    tables on an integer rowid and indexes the timestamps used for day-range queries.
+    Version 2 adds the `daily_nutrition` rollup and the triggers that maintain it.
+    Version 3 adds the `table_versions` change counters.
+    """
+    (version,) = db.execute("PRAGMA user_version").fetchone()
+    if version >= SCHEMA_VERSION:
+        return
+
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        if version < 1:
+            _migrate_to_integer_keys(db)
+        if version < 2:
+            _execute_statements(db, _CREATE_ROLLUP)
+            _rebuild_rollup(db)
+        if version < 3:
+            _execute_statements(db, _CREATE_VERSIONS)
+        db.execute(f"PRAGMA user_version = {SCHEMA_VERSION}")
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+
+
+def _execute_statements(db, script: str) -> None:
+    # executescript() would commit the open transaction, so run statements one by one.
+    # Trigger bodies contain semicolons, so split on complete statements only.
+    statement = ""
+    for line in script.splitlines(keepends=True):
+        statement += line
+        if sqlite3.complete_statement(statement):
+            db.execute(statement)
+            statement = ""
+
+
+def _migrate_to_integer_keys(db) -> None:
+    legacy = {
+        table: columns
+        for table, columns in (("meals", MEAL_COLUMNS), ("measurements", MEASUREMENT_COLUMNS))
+        if table in db.table_names() and "id" not in db[table].columns_dict
+    }
+    for table in legacy:
+        db.execute(f"ALTER TABLE {table} RENAME TO {table}_v0")
+    _execute_statements(db, _CREATE_TABLES)
+    for table, columns in legacy.items():
+        column_list = ", ".join(columns)
+        db.execute(
+            f"INSERT INTO {table} ({column_list}) "
+            f"SELECT {column_list} FROM {table}_v0 ORDER BY {columns[0]}"
+        )
+        db.execute(f"DROP TABLE {table}_v0")
+
+
+def _rebuild_rollup(db) -> None:
+    db.execute("DELETE FROM daily_nutrition")
+    db.execute(
+        f"""
+        INSERT INTO daily_nutrition (day, meal_count, {", ".join(NUTRIENT_COLUMNS)})
+        SELECT {_DAY.format(row="meals")}, COUNT(*),
+            {", ".join(f"COALESCE(SUM({c}), 0)" for c in NUTRIENT_COLUMNS)}
+        FROM meals GROUP BY {_DAY.format(row="meals")}
+        """
+    )
+
+
+def rebuild_daily_nutrition(db) -> int:
+    """
+    Recompute the `daily_nutrition` rollup from `meals` and return the number of days.
+
+    The triggers keep the rollup current; this is for backfilling it and for clearing
+    the rounding drift that many edits of the same day can accumulate.
+    """
+    db.execute("BEGIN IMMEDIATE")
+    try:
+        _rebuild_rollup(db)
+        db.execute("COMMIT")
+    except Exception:
+        db.execute("ROLLBACK")
+        raise
+    (days,) = db.execute("SELECT COUNT(*) FROM daily_nutrition").fetchone()
+    return days
+
+
+def table_version(db, table: str) -> int:
+    """
+    Return the change counter of `table`, one of `VERSIONED_TABLES`.
+
+    It increases with every insert, edit or delete, including backdated inserts.
+    """
+    (version,) = db.execute("SELECT version FROM table_versions WHERE name = ?", (table,)).fetchone()
+    return version
+
+
+def daily_nutrition(db, start: date, end: date) -> list[dict]:
+    """
+    Return the per-day nutrient totals from `start` to `end` inclusive, oldest first.
+
+    Days without meals are omitted.
+    """
+    cursor = db.execute(
+        "SELECT * FROM daily_nutrition WHERE day BETWEEN ? AND ? ORDER BY day",
+        (start.isoformat(), end.isoformat()),
+    )
+    columns = [d[0] for d in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor]
+
+
+def insert_meal(
+        db, user_description: str, nutrition_info: NutritionalInfo, meal_time: datetime | None = None
+    ) -> int:
+    """
+    Log a meal and return its id.
+
+    Args:
+        db: The database to insert into.
+        user_description: What the user entered, e.g. the meal text or "Image Upload".
+        nutrition_info: The analysed nutrients of the meal.
+        meal_time: When the meal was eaten. Defaults to now.
+    """
+    now = datetime.now()
+    cursor = db.execute(
+        _INSERT_MEAL,
+        (
+            now.isoformat(),
+            (meal_time or now).isoformat(),
+            user_description,
+            nutrition_info.summary,
+            *(getattr(nutrition_info, column) for column in NUTRIENT_COLUMNS),
+        ),
+    )
+    return cursor.lastrowid
+
+
+def insert_measurement(db, height: float, weight: float, when: datetime | None = None) -> int:
+    """
+    Log a body measurement and return its id.
+
+    Args:
+        db: The database to insert into.
+        height: Height in inches.
+        weight: Weight in pounds.
+        when: When the measurement was taken. Defaults to now.
+    """
+    cursor = db.execute(_INSERT_MEASUREMENT, ((when or datetime.now()).isoformat(), height, weight))
+    return cursor.lastrowid
+
+
+def delete_meal(db, meal_id: int) -> bool:
+    """
+    Delete a logged meal, returning whether it existed. The daily rollup follows.
+    """
+    return db.execute("DELETE FROM meals WHERE id = ?", (meal_id,)).rowcount > 0
+
+
+def update_meal(db, meal_id: int, **changes) -> bool:
+    """
+    Edit fields of a logged meal, returning whether it existed. The daily rollup follows.
+
+    Args:
+        db: The database to update.
+        meal_id: The id returned by `insert_meal`.
+        **changes: New values for columns in `MEAL_COLUMNS`, e.g. `calories=350` or
+            `meal_time="2024-11-20T08:30:00"`.
+    """
+    unknown = set(changes) - set(MEAL_COLUMNS)
+    if unknown:
+        raise ValueError(f"Unknown meal columns: {', '.join(sorted(unknown))}")
+    if not changes:
+        return False
+    assignments = ", ".join(f"{column} = ?" for column in changes)
+    cursor = db.execute(f"UPDATE meals SET {assignments} WHERE id = ?", (*changes.values(), meal_id))
+    return cursor.rowcount > 0
+
+
+def main():
+    """Maintenance commands for the nutrition database."""
+    parser = argparse.ArgumentParser(description="Nutrition database maintenance")
+    parser.add_argument("command", choices=["migrate", "backfill-rollup"])
+    parser.add_argument("--db", type=str, default=DB_PATH, help="Path of the SQLite database")
+    args = parser.parse_args()
+
+    db = connect(args.db)  # connecting always migrates
+    if args.command == "backfill-rollup":
+        days = rebuild_daily_nutrition(db)
+        print(f"Rebuilt daily_nutrition: {days} days")
+    else:
+        (version,) = db.execute("PRAGMA user_version").fetchone()
+        print(f"Schema is at version {version}")
+
+
+if __name__ == "__main__":
+    main()
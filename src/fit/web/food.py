@@ -1,8 +1,23 @@
+import asyncio
 import fasthtml.common as fh
-from datetime import datetime
-from fit.web.common import MEALS_TABLE, nutrition_tracker, page_outline
+from datetime import date
+import logging
+import time
+from urllib.parse import urlencode
+from fit.nutrition.data import Goals, NutritionalInfo
+from fit.utils.conversions import kj_to_kcal
+from fit.utils.workers import WorkerPoolBusy
+from fit.web.common import (
+    TRACKER_DATA_MAX_AGE, get_db, get_food_assistant, get_llm_pool, get_nutrition_tracker,
+    get_tracker, get_tracker_data, get_tracker_source, page_outline, render_cache
+)
+from fit.web.database import daily_nutrition, insert_meal
 
+# Used for meal recommendations when no tracker is connected or it cannot be reached.
+DEFAULT_CALORIC_BURN = 2000.0
 
+
+@render_cache.page
 def get():
     """Return the food tracking page content"""
     content = fh.Article(
@@ -60,6 +75,34 @@ def get():
                     fh.Div(id="image-result", cls="mt-4")
                 )
             ),
+            # Meal recommendations section
+            fh.Card(
+                fh.Header(fh.H3("Meal Ideas", cls="text-xl font-bold mb-4")),
+                fh.Form(
+                    hx_post="/recommendations",
+                    hx_target="#recommendations-result",
+                    cls="space-y-4"
+                )(
+                    fh.Div(
+                        fh.Label("Goal", cls="label"),
+                        fh.Select(
+                            *[
+                                fh.Option(goal.value.title(), value=goal.value)
+                                for goal in Goals
+                            ],
+                            name="goal",
+                            cls="select select-bordered w-full"
+                        ),
+                        cls="form-control"
+                    ),
+                    fh.Button(
+                        "Suggest Meals",
+                        type="submit",
+                        cls="btn btn-primary w-full"
+                    ),
+                    fh.Div(id="recommendations-result", cls="mt-4")
+                )
+            ),
             cls="space-y-6 max-w-lg mx-auto p-6"
         )
     )
@@ -159,54 +202,159 @@ def NutritionCard(nutrition_info):
     )
 
 
+def AnalysisError(message):
+    """Helper function to display a failed meal analysis"""
+    return fh.Div(
+        fh.P(
+            "Failed to analyze meal.",
+            cls="text-red-600 font-semibold text-center mt-4"
+        ),
+        fh.P(
+            message,
+            cls="text-gray-600 text-center text-sm mt-1"
+        )
+    )
+
+
+async def run_llm(fn, *args):
+    """Run a blocking LLM call on the worker pool, returning an error fragment on failure"""
+    try:
+        return await get_llm_pool().run(fn, *args), None
+    except WorkerPoolBusy:
+        return None, AnalysisError("The server is busy, please try again in a moment.")
+    except asyncio.TimeoutError:
+        return None, AnalysisError("The analysis took too long, please try again.")
+
+
 async def analyze_image(food_image: fh.UploadFile):
     """Handle image upload and analysis"""
-    nutrition_info = nutrition_tracker.image_macros(food_image)
+    nutrition_info, error = await run_llm(get_nutrition_tracker().image_macros, await food_image.read())
+    if error:
+        return error
     
-    MEALS_TABLE.insert(
-        datetime_entered=datetime.now().isoformat(),
-        meal_time=datetime.now().isoformat(),
-        user_description="Image Upload",
-        llm_summary=nutrition_info.summary,
-        calories=nutrition_info.calories,
-        protein=nutrition_info.protein,
-        carbs=nutrition_info.carbs,
-        fat=nutrition_info.fat,
-        vitamin_a=nutrition_info.vitamin_a,
-        vitamin_c=nutrition_info.vitamin_c,
-        vitamin_d=nutrition_info.vitamin_d,
-        calcium=nutrition_info.calcium,
-        iron=nutrition_info.iron,
-        potassium=nutrition_info.potassium,
-        sodium=nutrition_info.sodium,
-        fiber=nutrition_info.fiber
-    )
+    insert_meal(get_db(), "Image Upload", nutrition_info)
     
     return NutritionCard(nutrition_info)
 
 
 async def analyze_text(meal_description: str):
     """Handle meal description analysis"""
-    nutrition_info = nutrition_tracker.natural_language_macros(meal_description)
+    nutrition_info, error = await run_llm(get_nutrition_tracker().natural_language_macros, meal_description)
+    if error:
+        return error
     
-    MEALS_TABLE.insert(
-        datetime_entered=datetime.now().isoformat(),
-        meal_time=datetime.now().isoformat(),
-        user_description=meal_description,
-        llm_summary=nutrition_info.summary,
-        calories=nutrition_info.calories,
-        protein=nutrition_info.protein,
-        carbs=nutrition_info.carbs,
-        fat=nutrition_info.fat,
-        vitamin_a=nutrition_info.vitamin_a,
-        vitamin_c=nutrition_info.vitamin_c,
-        vitamin_d=nutrition_info.vitamin_d,
-        calcium=nutrition_info.calcium,
-        iron=nutrition_info.iron,
-        potassium=nutrition_info.potassium,
-        sodium=nutrition_info.sodium,
-        fiber=nutrition_info.fiber
-    )
+    insert_meal(get_db(), meal_description, nutrition_info)
 
     return NutritionCard(nutrition_info)
 
+
+def todays_intake():
+    """Return today's macros from the daily rollup"""
+    today = date.today()
+    totals = next(iter(daily_nutrition(get_db(), today, today)), {})
+    return NutritionalInfo.model_construct(
+        summary="Today's meals",
+        calories=totals.get("calories", 0.0),
+        protein=totals.get("protein", 0.0),
+        carbs=totals.get("carbs", 0.0),
+        fat=totals.get("fat", 0.0),
+    )
+
+
+def synced_caloric_burn():
+    """Return today's caloric burn from the locally synced tracker data, if it is fresh"""
+    source = get_tracker_source()
+    if source is None:
+        return None
+    data = get_tracker_data()
+    synced_at = data.last_synced(source)
+    if synced_at is None or time.time() - synced_at > TRACKER_DATA_MAX_AGE:
+        return None
+    cycle = data.latest_cycle(source)
+    if cycle is None or cycle["kilojoule"] is None:
+        return None
+    return kj_to_kcal(cycle["kilojoule"])
+
+
+def caloric_burn():
+    """Return today's caloric burn from the synced tracker data, the active tracker, or a default"""
+    burn = synced_caloric_burn()
+    if burn is not None:
+        return burn
+    tracker = get_tracker()
+    if tracker is None:
+        return DEFAULT_CALORIC_BURN
+    try:
+        return tracker.calories_burned()
+    except Exception:
+        return DEFAULT_CALORIC_BURN
+
+
+def parse_goal(goal: str):
+    """Return the `Goals` member for a submitted goal, or None if it is not one"""
+    try:
+        return Goals(goal)
+    except ValueError:
+        return None
+
+
+def GoalError():
+    """Helper function to display an unknown goal"""
+    return fh.P(
+        "Please choose one of the listed goals.",
+        cls="text-red-600 font-semibold text-center mt-4"
+    )
+
+
+async def recommendations(goal: str):
+    """Return a container that streams meal recommendations into the page"""
+    goal = parse_goal(goal)
+    if goal is None:
+        return GoalError()
+    return fh.Div(
+        fh.Div(
+            sse_swap="message",
+            hx_swap="beforeend",
+            cls="whitespace-pre-wrap"
+        ),
+        hx_ext="sse",
+        sse_connect=f"/recommendations/stream?{urlencode({'goal': goal.value})}",
+        sse_close="close",
+        cls="p-4 bg-white rounded-lg shadow-lg"
+    )
+
+
+async def stream_recommendations(goal: str):
+    """Stream meal recommendations as server-sent events, one message per text chunk"""
+    goal = parse_goal(goal)
+    if goal is None:
+        # A non-200 answer makes the EventSource give up instead of reconnecting.
+        return fh.Response("Unknown goal", status_code=400)
+
+    async def messages():
+        aborted = False
+        try:
+            # Both block (tracker or SQLite), so they run on the pool, side by side.
+            burn, intake = await asyncio.gather(
+                get_llm_pool().run(caloric_burn), get_llm_pool().run(todays_intake)
+            )
+            async for text in get_llm_pool().stream(
+                get_food_assistant().stream_recommendations, burn, goal, intake
+            ):
+                yield fh.sse_message(fh.Span(text))
+        except Exception as e:
+            if not isinstance(e, (WorkerPoolBusy, asyncio.TimeoutError)):
+                logging.exception(f"Failed to stream recommendations: {e}")
+            yield fh.sse_message(fh.P(
+                "Could not get recommendations right now, please try again.",
+                cls="text-red-600 font-semibold"
+            ))
+        except BaseException:
+            aborted = True  # client disconnected or the server is stopping
+            raise
+        finally:
+            # Without the close event the EventSource reconnects and starts over.
+            if not aborted:
+                yield fh.sse_message("", event="close")
+
+    return fh.EventStream(messages())
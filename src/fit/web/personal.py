@@ -1,8 +1,9 @@
 import fasthtml.common as fh
-from datetime import datetime
 from fit.nutrition.data import Goals
-from fit.web.common import MEASUREMENTS_TABLE, page_outline
+from fit.web.common import get_db, page_outline, render_cache
+from fit.web.database import insert_measurement
 
+@render_cache.page
 def get():
     """Return the personal information page content"""
     content = fh.Article(
@@ -85,11 +86,7 @@ async def update_personal(weight: float, height_feet: int, height_inches: int, f
     total_height = (height_feet * 12) + height_inches
     
     # Store in database
-    MEASUREMENTS_TABLE.insert(
-        datetime=datetime.now().isoformat(),
-        height=total_height,
-        weight=weight
-    )
+    insert_measurement(get_db(), total_height, weight)
     
     # Return success message
     return fh.Div(
@@ -1,25 +1,146 @@
 import fasthtml.common as fh
+import hashlib
 import json
-from fit.web.common import page_outline, DB
+from datetime import date, datetime, timedelta
+from urllib.parse import urlencode
+from fit.utils.downsample import lttb
+from fit.web.common import page_outline, get_db
+from fit.web.database import table_version
 
-def get():
-    """Return the progress tracking page content"""
-    measurements = DB.execute(
-        "SELECT datetime, weight FROM measurements ORDER BY datetime"
+# The plot never gets more points than this, however long the history is; LTTB keeps
+# the shape of the curve. Override per request with ?points=.
+MAX_PLOT_POINTS = 500
+POINTS_LIMIT = 5000
+
+RANGE_PRESETS = [("30 days", 30), ("90 days", 90), ("1 year", 365), ("All", None)]
+
+
+def parse_date(value: str | None) -> date | None:
+    """Parse a YYYY-MM-DD query parameter, ignoring missing or malformed values"""
+    try:
+        return date.fromisoformat(value) if value else None
+    except ValueError:
+        return None
+
+
+def range_bounds(start: date | None, end: date | None) -> tuple[str, str]:
+    """Return [low, high) ISO bounds for the indexed `datetime` column"""
+    low = start.isoformat() if start else ""
+    # ISO timestamps sort as strings, so "day after end" excludes everything past `end`.
+    high = (end + timedelta(days=1)).isoformat() if end else "9999"
+    return low, high
+
+
+def weight_series(
+        start: date | None, end: date | None, points: int, since: str = ""
+    ) -> dict:
+    """Return the weigh-ins in the range, downsampled to at most `points` points.
+
+    `since` limits the result to weigh-ins strictly after that timestamp, for callers
+    that only need points newer than ones they already have. `last` is the timestamp to
+    pass as `since` next time. Backdated or edited weigh-ins are not picked up that way;
+    use the ETag to tell when the whole series must be fetched again.
+    """
+    low, high = range_bounds(start, end)
+    rows = get_db().execute(
+        "SELECT datetime, weight FROM measurements "
+        "WHERE datetime >= ? AND datetime > ? AND datetime < ? AND weight IS NOT NULL "
+        "ORDER BY datetime",
+        (low, since, high),
     ).fetchall()
-    
-    dates = [m[0].split("T")[0] for m in measurements]
-    weights = [m[1] for m in measurements]
-    
-    plot_data = json.dumps([{
-        "x": dates,
-        "y": weights,
+
+    xs = [datetime.fromisoformat(row[0]).timestamp() for row in rows]
+    ys = [row[1] for row in rows]
+    keep = lttb(xs, ys, points)
+    return {
+        "x": [rows[i][0].split("T")[0] for i in keep],
+        "y": [ys[i] for i in keep],
+        "last": rows[-1][0] if rows else since,
+    }
+
+
+def series_etag(start: date | None, end: date | None, points: int, since: str = "") -> str:
+    """A strong ETag for one series response.
+
+    It covers the requested range and point count, and the measurements change counter,
+    which moves on every insert (backdated ones too), edit and delete.
+    """
+    query = hashlib.sha256(repr((range_bounds(start, end), points, since)).encode())
+    return f'"weight-{table_version(get_db(), "measurements")}-{query.hexdigest()[:16]}"'
+
+
+def weight_stats(start: date | None, end: date | None) -> dict:
+    """Compute the statistics cards in SQL, using the `datetime` index for first/last"""
+    where = "WHERE datetime >= :low AND datetime < :high AND weight IS NOT NULL"
+    low, high = range_bounds(start, end)
+    count, first, last = get_db().execute(
+        f"""
+        SELECT
+            (SELECT COUNT(*) FROM measurements {where}),
+            (SELECT weight FROM measurements {where} ORDER BY datetime LIMIT 1),
+            (SELECT weight FROM measurements {where} ORDER BY datetime DESC LIMIT 1)
+        """,
+        {"low": low, "high": high},
+    ).fetchone()
+    return {"count": count, "first": first, "last": last}
+
+
+def RangeSelector(start: date | None, end: date | None):
+    """Preset range links and a custom date range form"""
+    today = date.today()
+    presets = [
+        fh.A(
+            label,
+            href=f"/progress?start={(today - timedelta(days=days)).isoformat()}" if days else "/progress",
+            cls="btn btn-sm btn-outline",
+        )
+        for label, days in RANGE_PRESETS
+    ]
+    return fh.Div(
+        fh.Div(*presets, cls="flex gap-2 justify-center"),
+        fh.Form(
+            fh.Input(type="date", name="start", value=start.isoformat() if start else ""),
+            fh.Input(type="date", name="end", value=end.isoformat() if end else ""),
+            fh.Button("Apply", type="submit", cls="btn btn-sm btn-primary"),
+            method="get",
+            action="/progress",
+            cls="flex gap-2 justify-center items-center mt-2",
+        ),
+        cls="mb-4",
+    )
+
+
+def api_weight(req, start: str = "", end: str = "", points: int = MAX_PLOT_POINTS, since: str = ""):
+    """Return the weight series as JSON, or 304 if the client's copy is current"""
+    start_date, end_date = parse_date(start), parse_date(end)
+    points = min(max(points, 3), POINTS_LIMIT)
+    etag = series_etag(start_date, end_date, points, since)
+    headers = {"ETag": etag, "Cache-Control": "private, no-cache"}
+    if etag in req.headers.get("if-none-match", ""):
+        return fh.Response(status_code=304, headers=headers)
+
+    series = weight_series(start_date, end_date, points, since)
+    return fh.JSONResponse(series, headers=headers)
+
+
+def get(start: str = "", end: str = "", points: int = MAX_PLOT_POINTS):
+    """Return the progress tracking page content"""
+    start_date, end_date = parse_date(start), parse_date(end)
+    points = min(max(points, 3), POINTS_LIMIT)
+    stats = weight_stats(start_date, end_date)
+    query = urlencode({
+        "start": start_date.isoformat() if start_date else "",
+        "end": end_date.isoformat() if end_date else "",
+        "points": points,
+    })
+
+    plot_trace = json.dumps({
         "type": "scatter",
         "mode": "lines+markers",
         "name": "Weight",
         "line": {"color": "rgb(59, 130, 246)"},
         "marker": {"color": "rgb(59, 130, 246)"}
-    }])
+    })
 
     plot_layout = json.dumps({
         "title": "Weight Progress Over Time",
@@ -50,17 +171,35 @@ def get():
                     ),
                     cls="mb-6"
                 ),
+                RangeSelector(start_date, end_date),
                 # Plot container and script
                 fh.Div(
                     fh.Div(id="weight-plot", cls="w-full"),
+                    # The series is fetched after the page loads. The last response is
+                    # kept in localStorage with its ETag; the endpoint answers 304 while
+                    # no measurement changed, and the whole series otherwise.
                     fh.Script(
                         f"""
-                        Plotly.newPlot(
-                            'weight-plot',
-                            {plot_data},
-                            {plot_layout},
-                            {{responsive: true}}
-                        );
+                        (async () => {{
+                            const query = '{query}';
+                            const key = 'weight-series:' + query;
+                            const cached = JSON.parse(localStorage.getItem(key) || 'null');
+                            const response = await fetch(
+                                '/api/progress/weight?' + query,
+                                cached && cached.etag ? {{headers: {{'If-None-Match': cached.etag}}}} : {{}}
+                            );
+                            let series = cached && cached.series;
+                            if (response.status !== 304) {{
+                                series = await response.json();
+                                localStorage.setItem(key, JSON.stringify({{etag: response.headers.get('ETag'), series}}));
+                            }}
+                            Plotly.newPlot(
+                                'weight-plot',
+                                [{{...{plot_trace}, x: series.x, y: series.y}}],
+                                {plot_layout},
+                                {{responsive: true}}
+                            );
+                        }})();
                         """
                     ),
                     cls="p-4 bg-white rounded-lg shadow-lg"
@@ -72,7 +211,7 @@ def get():
                             fh.Card(
                                 fh.H5("Current Weight", cls="text-sm text-gray-600"),
                                 fh.P(
-                                    f"{weights[-1]:.1f} lbs" if weights else "No data",
+                                    f"{stats['last']:.1f} lbs" if stats["count"] else "No data",
                                     cls="text-2xl font-bold text-blue-600"
                                 ),
                                 cls="p-4 text-center"
@@ -80,7 +219,7 @@ def get():
                             fh.Card(
                                 fh.H5("Total Change", cls="text-sm text-gray-600"),
                                 fh.P(
-                                    f"{(weights[-1] - weights[0]):.1f} lbs" if len(weights) > 1 else "No change",
+                                    f"{(stats['last'] - stats['first']):.1f} lbs" if stats["count"] > 1 else "No change",
                                     cls="text-2xl font-bold text-blue-600"
                                 ),
                                 cls="p-4 text-center"
@@ -88,7 +227,7 @@ def get():
                             fh.Card(
                                 fh.H5("Measurements", cls="text-sm text-gray-600"),
                                 fh.P(
-                                    str(len(weights)),
+                                    str(stats["count"]),
                                     cls="text-2xl font-bold text-blue-600"
                                 ),
                                 cls="p-4 text-center"
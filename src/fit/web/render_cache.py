@@ -0,0 +1,93 @@
+"""Memoized rendering of FastHTML components and pages whose output never changes."""
+import hashlib
+import threading
+from typing import Any, Callable
+
+import fasthtml.common as fh
+
+# Bump to invalidate every cached render (and the ETags browsers hold) after a change
+# to a cached page or component.
+RENDER_VERSION = "1"
+
+# Top-level elements FastHTML moves into <head>; they are kept as components so it
+# still can.
+HEAD_TAGS = ("title", "meta", "link", "style", "base")
+
+
+class RenderCache:
+    """Caches the serialized HTML of pure components and static pages.
+
+    A cached component is rendered once and returned as pre-serialized markup, so it
+    costs nothing to embed in a larger tree. A cached page is served from its stored
+    markup with a strong ETag, and a request whose `If-None-Match` matches gets an empty
+    304. All keys include `version`, so changing it invalidates everything.
+
+    Only use it for output that depends on nothing but the arguments (components) or
+    nothing at all (pages).
+
+    Attributes:
+        version (str): Part of every key and ETag.
+        hits (int): Number of renders served from the cache.
+        misses (int): Number of renders that had to be built.
+    """
+    def __init__(self, version: str = RENDER_VERSION):
+        self.version = version
+        self.hits = 0
+        self.misses = 0
+        self._entries: dict[tuple, Any] = {}
+        self._lock = threading.Lock()
+
+    def component(self, fn: Callable[..., Any]) -> Callable[..., fh.NotStr]:
+        """Decorate a pure component function so each distinct call is rendered once."""
+        def render(*args, **kwargs):
+            key = ("component", fn.__module__, fn.__qualname__, args, tuple(sorted(kwargs.items())))
+            return self._get(key, lambda: fh.NotStr(fh.to_xml(fn(*args, **kwargs))))
+        render.__name__, render.__doc__ = fn.__name__, fn.__doc__
+        return render
+
+    def page(self, fn: Callable[[], Any]) -> Callable[[Any], Any]:
+        """Decorate a route handler without parameters whose page never changes.
+
+        The returned handler takes the request, so FastHTML passes it in.
+        """
+        def handler(req):
+            parts, etags = self._get(("page", fn.__module__, fn.__qualname__), lambda: self._freeze(fn()))
+            # htmx requests get the bare fragment and full loads the whole document, so
+            # the two representations need distinct validators.
+            etag = etags["hx-request" in req.headers]
+            headers = {"ETag": etag, "Cache-Control": "no-cache", "Vary": "HX-Request"}
+            if etag in req.headers.get("if-none-match", ""):
+                return fh.Response(status_code=304, headers=headers)
+            return (*parts, *(fh.HttpHeader(k, v) for k, v in headers.items()))
+        handler.__name__, handler.__doc__ = fn.__name__, fn.__doc__
+        return handler
+
+    def clear(self, version: str | None = None) -> None:
+        """Drop every cached render, optionally switching to a new `version`."""
+        with self._lock:
+            self._entries.clear()
+            if version is not None:
+                self.version = version
+
+    def _get(self, key: tuple, build: Callable[[], Any]) -> Any:
+        key = (self.version, *key)
+        entry = self._entries.get(key)
+        if entry is not None:
+            self.hits += 1
+            return entry
+        self.misses += 1
+        entry = build()
+        with self._lock:
+            return self._entries.setdefault(key, entry)
+
+    def _freeze(self, result: Any) -> tuple[tuple, dict[bool, str]]:
+        """Serialize a page's body once, keeping head elements for FastHTML to place."""
+        parts = tuple(
+            part if getattr(part, "tag", "") in HEAD_TAGS else fh.NotStr(fh.to_xml(part))
+            for part in (result if isinstance(result, tuple) else (result,))
+        )
+        digest = hashlib.sha256(self.version.encode())
+        for part in parts:
+            digest.update(fh.to_xml(part).encode())
+        etags = {hx: f'"{digest.hexdigest()[:16]}-{"hx" if hx else "doc"}"' for hx in (False, True)}
+        return parts, etags
@@ -1,11 +1,11 @@
 import fasthtml.common as fh
 from fit.web.common import page_outline
-from fit.trackers.manager import load_secrets, get_active_tracker_type
+from fit.trackers import manager
 
 def active_tracker_info():
     """Return information about the currently active tracker"""
-    secrets = load_secrets()
-    active_type = get_active_tracker_type()
+    secrets = manager.store.load_secrets()
+    active_type = manager.store.active_tracker_type()
     
     if not active_type or active_type not in secrets:
         return fh.Card(
@@ -40,7 +40,7 @@ def active_tracker_info():
 
 def credentials_section():
     """Return the credentials management section"""
-    active_type = get_active_tracker_type()
+    active_type = manager.store.active_tracker_type()
     has_active = active_type is not None
     
     return fh.Card(
@@ -123,8 +123,8 @@ def credentials_section():
 
 def change_tracker_section():
     """Return the section for changing active tracker"""
-    secrets = load_secrets()
-    active_type = get_active_tracker_type()
+    secrets = manager.store.load_secrets()
+    active_type = manager.store.active_tracker_type()
     
     # Only show if there are multiple trackers or if there are trackers but none active
     if len(secrets) == 0 or (len(secrets) == 1 and active_type is not None):
@@ -186,11 +186,11 @@ def get():
 async def connect_tracker(tracker_type: str, username: str, password: str, set_active: bool = False, first_tracker: str = "false"):
     """Handle tracker connection"""
     try:
-        save_credentials(tracker_type, username, password)
+        manager.store.save_secrets(tracker_type, username, password)
         
         # Set as active if it's the first tracker or if requested
         if first_tracker == "true" or set_active:
-            set_active_tracker(tracker_type)
+            manager.set_active_tracker(tracker_type)
             active_msg = " and set as active tracker"
         else:
             active_msg = ""
@@ -216,7 +216,7 @@ async def connect_tracker(tracker_type: str, username: str, password: str, set_a
 async def set_active_tracker(active_tracker: str):
     """Handle setting the active tracker"""
     try:
-        set_active_tracker(active_tracker)
+        manager.set_active_tracker(active_tracker)
         return fh.Div(
             fh.P(
                 f"Successfully set {active_tracker.replace('_', ' ').title()} as active tracker!",
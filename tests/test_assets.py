@@ -0,0 +1,40 @@
+import json
+import logging
+
+import pytest
+
+from fit.web import assets
+
+
+@pytest.fixture
+def static_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(assets, "STATIC_DIR", tmp_path)
+    monkeypatch.setattr(assets, "MANIFEST_PATH", tmp_path / "manifest.json")
+    monkeypatch.setattr(assets, "_manifest", None)
+    return tmp_path
+
+
+def test_check_warns_when_assets_are_not_built(static_dir, caplog):
+    with caplog.at_level(logging.WARNING):
+        assets.check()
+
+    assert assets.missing() == [asset.name for asset in assets.ASSETS]
+    assert "python -m fit.web.assets build" in caplog.text
+    assert assets.TAILWIND_CDN in [getattr(hdr, "src", None) for hdr in assets.headers()]
+
+
+def test_check_is_quiet_when_every_asset_is_built(static_dir, caplog):
+    built = {}
+    for asset in assets.ASSETS:
+        path = static_dir / asset.name
+        path.write_text("/* built */")
+        built[asset.name] = assets.fingerprint(path)
+        path.unlink()
+    (static_dir / "manifest.json").write_text(json.dumps(built))
+
+    with caplog.at_level(logging.WARNING):
+        assets.check()
+
+    assert assets.missing() == []
+    assert caplog.text == ""
+    assert f"/static/{built['plotly.js']}" in [getattr(hdr, "src", None) for hdr in assets.headers()]
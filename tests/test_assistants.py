@@ -0,0 +1,16 @@
+import inspect
+
+from ell.lmp.complex import _get_messages
+
+from fit.nutrition.assistants import IMAGE_MACROS_PROMPT, _nutrition_programs
+
+DATA_URL = "data:image/jpeg;base64,/9j/4AAQSkZJRg=="
+
+
+def test_image_macros_sends_the_prompt_with_the_image():
+    image_macros = _nutrition_programs("gpt-4o-2024-08-06").image_macros
+    messages = _get_messages(inspect.unwrap(image_macros)(DATA_URL), image_macros)
+
+    assert [message.role for message in messages] == ["system", "user"]
+    assert messages[0].text == IMAGE_MACROS_PROMPT
+    assert messages[1].content[0].image.url == DATA_URL
@@ -0,0 +1,185 @@
+import threading
+import time
+
+import pytest
+
+from fit.trackers.composite import CompositeTracker
+
+
+class FakeTracker:
+    def __init__(self, burn=None, heart_rate=None, cycles=(), delay=0.0, error=None, hang=None):
+        self.burn, self.heart_rate, self.cycles = burn, heart_rate, list(cycles)
+        self.delay, self.error, self.hang = delay, error, hang
+        self.calls = 0
+
+    def _answer(self, value):
+        self.calls += 1
+        if self.hang is not None:
+            self.hang.wait()
+        time.sleep(self.delay)
+        if self.error is not None:
+            raise self.error
+        return value
+
+    def calories_burned(self):
+        return self._answer(self.burn)
+
+    def resting_heart_rate(self):
+        return self._answer(self.heart_rate)
+
+    def iter_cycles(self, start=None, end=None):
+        yield from self._answer(self.cycles)
+
+
+@pytest.fixture
+def hang():
+    event = threading.Event()
+    yield event
+    event.set()  # let the stuck workers finish
+
+
+def cycle(day, kilojoule):
+    return {"start": f"2024-11-{day:02d}T06:00:00.000Z", "kilojoule": kilojoule}
+
+
+def test_slow_source_times_out_and_the_others_still_answer(hang):
+    composite = CompositeTracker(
+        {"whoop": FakeTracker(burn=2100.0, hang=hang), "garmin": FakeTracker(burn=2300.0)},
+        timeout=0.1,
+    )
+
+    started = time.monotonic()
+    result = composite.gather("calories_burned")
+
+    assert time.monotonic() - started < 1
+    assert result.values == {"garmin": 2300.0}
+    assert result.timed_out == ["whoop"]
+    assert not result.complete
+    assert composite.calories_burned() == 2300.0
+    composite.close()
+
+
+def test_per_source_timeout_overrides_the_default():
+    composite = CompositeTracker(
+        {"whoop": FakeTracker(burn=2100.0, delay=0.2), "garmin": FakeTracker(burn=2300.0, delay=0.5)},
+        timeout=0.05, timeouts={"whoop": 1.0},
+    )
+
+    result = composite.gather("calories_burned")
+
+    assert result.values == {"whoop": 2100.0}
+    assert result.timed_out == ["garmin"]
+    composite.close()
+
+
+def test_sources_are_queried_concurrently():
+    composite = CompositeTracker(
+        {name: FakeTracker(burn=2000.0, delay=0.2) for name in ("whoop", "garmin", "oura")}
+    )
+
+    started = time.monotonic()
+    result = composite.gather("calories_burned")
+
+    assert len(result.values) == 3
+    assert time.monotonic() - started < 0.5
+    composite.close()
+
+
+def test_errors_are_reported_per_source():
+    composite = CompositeTracker({
+        "whoop": FakeTracker(error=ConnectionError("offline")),
+        "garmin": FakeTracker(burn=2300.0),
+    })
+
+    result = composite.gather("calories_burned")
+
+    assert result.errors == {"whoop": "ConnectionError: offline"}
+    assert composite.calories_burned() == 2300.0
+    composite.close()
+
+
+def test_metric_raises_when_no_source_answers(hang):
+    composite = CompositeTracker(
+        {"whoop": FakeTracker(error=ConnectionError("offline")), "garmin": FakeTracker(hang=hang)},
+        timeout=0.05,
+    )
+
+    with pytest.raises(RuntimeError, match="whoop: ConnectionError: offline; garmin: timed out"):
+        composite.calories_burned()
+    composite.close()
+
+
+def test_precedence_picks_the_source_per_metric():
+    composite = CompositeTracker(
+        {"whoop": FakeTracker(burn=2100.0, heart_rate=52.0), "garmin": FakeTracker(burn=2300.0, heart_rate=55.0)},
+        precedence={"resting_heart_rate": ["garmin"]},
+    )
+
+    assert composite.order("resting_heart_rate") == ["garmin", "whoop"]
+    assert composite.resting_heart_rate() == 55.0
+    assert composite.calories_burned() == 2100.0
+    composite.close()
+
+
+def test_first_returns_without_waiting_for_later_sources(hang):
+    composite = CompositeTracker(
+        {"whoop": FakeTracker(burn=2100.0), "garmin": FakeTracker(burn=2300.0, hang=hang)},
+        timeout=5.0,
+    )
+
+    started = time.monotonic()
+    result = composite.gather("calories_burned", first=True)
+
+    assert time.monotonic() - started < 1
+    assert result.values == {"whoop": 2100.0}
+    assert result.timed_out == []
+    composite.close()
+
+
+def test_history_keeps_the_preferred_source_per_day():
+    composite = CompositeTracker({
+        "whoop": FakeTracker(cycles=[cycle(19, 8000.0), cycle(18, 7900.0)]),
+        "garmin": FakeTracker(cycles=[cycle(20, 9100.0), cycle(19, 9000.0)]),
+    })
+
+    cycles = composite.iter_cycles()
+
+    assert [(record["start"][:10], record["source"], record["kilojoule"]) for record in cycles] == [
+        ("2024-11-20", "garmin", 9100.0),
+        ("2024-11-19", "whoop", 8000.0),
+        ("2024-11-18", "whoop", 7900.0),
+    ]
+    composite.close()
+
+
+def test_history_leaves_out_a_failed_source():
+    composite = CompositeTracker({
+        "whoop": FakeTracker(error=ConnectionError("offline")),
+        "garmin": FakeTracker(cycles=[cycle(20, 9100.0)]),
+    })
+
+    assert [record["source"] for record in composite.iter_cycles()] == ["garmin"]
+    assert composite.last.errors == {"whoop": "ConnectionError: offline"}
+    composite.close()
+
+
+def test_close_waits_for_calls_in_progress():
+    composite = CompositeTracker({"whoop": FakeTracker(burn=2100.0, delay=0.2)})
+    results = []
+    call = threading.Thread(target=lambda: results.append(composite.calories_burned()))
+    call.start()
+    time.sleep(0.05)
+
+    composite.close()
+    call.join()
+
+    assert results == [2100.0]
+    assert composite._executor is None
+
+
+def test_call_after_close_uses_a_fresh_pool():
+    composite = CompositeTracker({"whoop": FakeTracker(burn=2100.0)})
+    composite.close()
+
+    assert composite.calories_burned() == 2100.0
+    assert composite._executor is None
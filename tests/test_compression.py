@@ -0,0 +1,113 @@
+import asyncio
+import gzip
+import zlib
+
+import pytest
+from starlette.applications import Starlette
+from starlette.responses import PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+from starlette.testclient import TestClient
+
+from fit.web.compression import CompressionMiddleware, negotiate
+
+BODY = "protein carbs fat " * 100
+
+
+def text(request):
+    return PlainTextResponse(BODY, headers={"ETag": '"abc"', "Vary": "HX-Request"})
+
+
+def small(request):
+    return PlainTextResponse("ok")
+
+
+def image(request):
+    return Response(BODY.encode(), media_type="image/png")
+
+
+def not_modified(request):
+    return Response(status_code=304, headers={"ETag": '"abc"'})
+
+
+@pytest.fixture
+def client():
+    app = Starlette(routes=[
+        Route("/text", text), Route("/small", small), Route("/image", image),
+        Route("/not-modified", not_modified),
+    ])
+    app.add_middleware(CompressionMiddleware)
+    return TestClient(app)
+
+
+@pytest.mark.parametrize("header, expected", [
+    ("gzip, deflate", "gzip"),
+    ("gzip;q=0, deflate", None),
+    ("*", "gzip"),
+    ("identity", None),
+    ("", None),
+])
+def test_negotiate_gzip(header, expected, monkeypatch):
+    monkeypatch.setattr("fit.web.compression.brotli", None)
+    assert negotiate(header) == expected
+
+
+def test_large_response_is_gzipped(client):
+    response = client.get("/text", headers={"Accept-Encoding": "gzip"})
+
+    assert response.headers["content-encoding"] == "gzip"
+    assert response.text == BODY
+    assert int(response.headers["content-length"]) < len(BODY) / 10
+    # The existing Vary is kept, and the strong ETag is weakened for the encoded bytes.
+    assert response.headers["vary"] == "HX-Request, Accept-Encoding"
+    assert response.headers["etag"] == 'W/"abc"'
+
+
+def test_identity_request_is_untouched(client):
+    response = client.get("/text", headers={"Accept-Encoding": "identity"})
+
+    assert "content-encoding" not in response.headers
+    assert response.headers["etag"] == '"abc"'
+    assert response.text == BODY
+
+
+@pytest.mark.parametrize("path", ["/small", "/image", "/not-modified"])
+def test_small_precompressed_and_empty_responses_pass_through(client, path):
+    response = client.get(path, headers={"Accept-Encoding": "gzip"})
+
+    assert "content-encoding" not in response.headers
+    assert "accept-encoding" not in response.headers.get("vary", "").lower()
+
+
+def test_not_modified_keeps_its_strong_etag(client):
+    response = client.get("/not-modified", headers={"Accept-Encoding": "gzip"})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == '"abc"'
+
+
+def test_stream_chunks_are_decodable_as_they_arrive():
+    async def events():
+        for n in range(3):
+            yield f"data: event {n}\n\n"
+
+    app = CompressionMiddleware(StreamingResponse(events(), media_type="text/event-stream"))
+    scope = {"type": "http", "headers": [(b"accept-encoding", b"gzip")]}
+    sent = []
+
+    async def receive():
+        return {"type": "http.disconnect"}
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+
+    start, *bodies = sent
+    assert dict(start["headers"])[b"content-encoding"] == b"gzip"
+    assert b"content-length" not in dict(start["headers"])
+    decoder = zlib.decompressobj(16 + zlib.MAX_WBITS)
+    # Every event is complete as soon as its chunk arrives, before the stream ends.
+    for n, body in enumerate(bodies[:3]):
+        assert decoder.decompress(body["body"]) == f"data: event {n}\n\n".encode()
+    assert gzip.decompress(b"".join(body["body"] for body in bodies)).count(b"event") == 3
+    assert not bodies[-1].get("more_body", False)
@@ -0,0 +1,144 @@
+from datetime import datetime
+import sqlite3
+
+import pytest
+
+from fit.nutrition.data import NutritionalInfo
+from fit.web.database import (
+    NUTRIENT_COLUMNS, SCHEMA_VERSION, connect, daily_nutrition, delete_meal, insert_meal,
+    rebuild_daily_nutrition, update_meal,
+)
+
+# The tables as the original `init_db()` created them: keyed on timestamps, no indexes.
+V0_SCHEMA = f"""
+CREATE TABLE meals (
+    datetime_entered TEXT PRIMARY KEY, meal_time TEXT, user_description TEXT, llm_summary TEXT,
+    {", ".join(f"{column} FLOAT" for column in NUTRIENT_COLUMNS)}
+);
+CREATE TABLE measurements (datetime TEXT PRIMARY KEY, height FLOAT, weight FLOAT);
+"""
+
+
+def meal(calories: float, protein: float = 0.0) -> NutritionalInfo:
+    values = dict.fromkeys(NUTRIENT_COLUMNS, 0.0)
+    return NutritionalInfo.model_construct(
+        summary="meal", **{**values, "calories": calories, "protein": protein}
+    )
+
+
+def legacy_meal_row(entered: str, meal_time: str, calories: float, protein: float) -> tuple:
+    nutrients = dict.fromkeys(NUTRIENT_COLUMNS, 0.0)
+    nutrients.update(calories=calories, protein=protein)
+    return (entered, meal_time, "eggs", "Eggs", *nutrients.values())
+
+
+def rollup(db) -> dict[str, tuple]:
+    rows = db.execute("SELECT day, meal_count, calories, protein FROM daily_nutrition ORDER BY day")
+    return {day: tuple(values) for day, *values in rows.fetchall()}
+
+
+@pytest.fixture
+def db(tmp_path):
+    return connect(str(tmp_path / "nutrition.db"))
+
+
+def test_migrates_a_populated_v0_database(tmp_path):
+    path = str(tmp_path / "nutrition.db")
+    legacy = sqlite3.connect(path)
+    legacy.executescript(V0_SCHEMA)
+    legacy.executemany(
+        f"INSERT INTO meals VALUES ({', '.join('?' * (4 + len(NUTRIENT_COLUMNS)))})",
+        [
+            legacy_meal_row("2024-11-20T08:05:00", "2024-11-20T08:00:00", 300, 20),
+            legacy_meal_row("2024-11-20T13:05:00", "2024-11-20T13:00:00", 600, 35),
+            legacy_meal_row("2024-11-21T08:05:00", "2024-11-21T08:00:00", 250, 15),
+        ],
+    )
+    legacy.executemany(
+        "INSERT INTO measurements VALUES (?, ?, ?)",
+        [("2024-11-20T07:00:00", 70, 181.5), ("2024-11-21T07:00:00", 70, 181.0)],
+    )
+    legacy.commit()
+    legacy.close()
+
+    db = connect(path)
+
+    assert db.execute("PRAGMA user_version").fetchone() == (SCHEMA_VERSION,)
+    assert db.execute("SELECT id, meal_time, calories FROM meals ORDER BY id").fetchall() == [
+        (1, "2024-11-20T08:00:00", 300),
+        (2, "2024-11-20T13:00:00", 600),
+        (3, "2024-11-21T08:00:00", 250),
+    ]
+    assert db.execute("SELECT id, datetime, weight FROM measurements ORDER BY id").fetchall() == [
+        (1, "2024-11-20T07:00:00", 181.5),
+        (2, "2024-11-21T07:00:00", 181.0),
+    ]
+    assert rollup(db) == {"2024-11-20": (2, 900, 55), "2024-11-21": (1, 250, 15)}
+    assert {"idx_meals_meal_time", "idx_measurements_datetime"} <= {
+        name for (name,) in db.execute("SELECT name FROM sqlite_master WHERE type = 'index'")
+    }
+    assert not {"meals_v0", "measurements_v0"} & set(db.table_names())
+
+    # Meals logged at the same instant no longer collide, and the triggers are live.
+    when = datetime(2024, 11, 21, 12, 0)
+    insert_meal(db, "toast", meal(100), when)
+    insert_meal(db, "toast", meal(100), when)
+    assert rollup(db)["2024-11-21"] == (3, 450, 15)
+
+
+def test_migration_is_idempotent(tmp_path):
+    path = str(tmp_path / "nutrition.db")
+    db = connect(path)
+    insert_meal(db, "eggs", meal(300, 20), datetime(2024, 11, 20, 8, 0))
+
+    db = connect(path)
+
+    assert db.execute("SELECT COUNT(*) FROM meals").fetchone() == (1,)
+    assert rollup(db) == {"2024-11-20": (1, 300, 20)}
+
+
+def test_rollup_follows_inserts_updates_and_deletes(db):
+    breakfast = insert_meal(db, "eggs", meal(300, 20), datetime(2024, 11, 20, 8, 0))
+    lunch = insert_meal(db, "salad", meal(600, 35), datetime(2024, 11, 20, 13, 0))
+    insert_meal(db, "oats", meal(250, 15), datetime(2024, 11, 21, 8, 0))
+    assert rollup(db) == {"2024-11-20": (2, 900, 55), "2024-11-21": (1, 250, 15)}
+
+    assert update_meal(db, lunch, calories=650)
+    assert rollup(db)["2024-11-20"] == (2, 950, 55)
+
+    # Moving a meal to another day takes it out of the old day and into the new one.
+    assert update_meal(db, breakfast, meal_time="2024-11-21T09:00:00")
+    assert rollup(db) == {"2024-11-20": (1, 650, 35), "2024-11-21": (2, 550, 35)}
+
+    # A day whose last meal is deleted disappears from the rollup.
+    assert delete_meal(db, lunch)
+    assert rollup(db) == {"2024-11-21": (2, 550, 35)}
+    assert not delete_meal(db, lunch)
+
+    expected = rollup(db)
+    assert rebuild_daily_nutrition(db) == 1
+    assert rollup(db) == expected
+
+
+def test_rollup_treats_missing_nutrients_as_zero(db):
+    db.execute(
+        "INSERT INTO meals (datetime_entered, meal_time, calories) "
+        "VALUES ('2024-11-20T08:05:00', '2024-11-20T08:00:00', NULL)"
+    )
+    assert rollup(db) == {"2024-11-20": (1, 0, 0)}
+
+
+def test_daily_nutrition_returns_the_requested_days(db):
+    for day in (19, 20, 21):
+        insert_meal(db, "eggs", meal(100 * day), datetime(2024, 11, day, 8, 0))
+
+    days = daily_nutrition(db, datetime(2024, 11, 20).date(), datetime(2024, 11, 21).date())
+
+    assert [(row["day"], row["calories"]) for row in days] == [("2024-11-20", 2000), ("2024-11-21", 2100)]
+
+
+def test_update_meal_rejects_unknown_columns(db):
+    meal_id = insert_meal(db, "eggs", meal(300), datetime(2024, 11, 20, 8, 0))
+    with pytest.raises(ValueError):
+        update_meal(db, meal_id, id=5)
+
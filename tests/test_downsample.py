@@ -0,0 +1,51 @@
+import math
+import random
+
+import pytest
+
+from fit.utils.downsample import lttb
+
+
+@pytest.mark.parametrize("n, threshold", [(0, 10), (1, 3), (2, 3), (10, 10), (10, 50)])
+def test_short_series_is_kept_whole(n, threshold):
+    assert lttb(list(range(n)), [1.0] * n, threshold) == list(range(n))
+
+
+def test_threshold_below_three_is_rejected():
+    with pytest.raises(ValueError):
+        lttb(list(range(10)), [1.0] * 10, 2)
+
+
+@pytest.mark.parametrize("n, threshold", [(100, 3), (101, 10), (1000, 500), (3650, 500), (5000, 4999)])
+def test_keeps_threshold_points_one_per_bucket(n, threshold):
+    rng = random.Random(n)
+    ys = [rng.uniform(170, 190) for _ in range(n)]
+
+    kept = lttb(list(range(n)), ys, threshold)
+
+    assert len(kept) == threshold
+    assert kept[0] == 0 and kept[-1] == n - 1
+    assert kept == sorted(set(kept))
+    bucket_size = (n - 2) / (threshold - 2)
+    for i, index in enumerate(kept[1:-1]):
+        assert int(i * bucket_size) + 1 <= index < int((i + 1) * bucket_size) + 1
+
+
+def test_peaks_and_dips_survive():
+    xs = list(range(1000))
+    ys = [180 + math.sin(x / 50) for x in xs]
+    ys[333] = 200.0  # a one-day spike
+    ys[666] = 160.0  # and a one-day dip
+
+    kept = lttb(xs, ys, 50)
+
+    assert 333 in kept
+    assert 666 in kept
+
+
+def test_straight_line_is_sampled_evenly():
+    xs = [float(x) for x in range(102)]
+
+    kept = lttb(xs, [2 * x for x in xs], 12)
+
+    assert kept == [0, *range(1, 101, 10), 101]
@@ -0,0 +1,37 @@
+import pytest
+
+from fit.nutrition.food_db import FoodDatabase
+
+
+@pytest.fixture(scope="module")
+def food_db():
+    return FoodDatabase.load()
+
+
+@pytest.mark.parametrize("food", [
+    "spinach dip",
+    "peanut butter cookie",
+    "sweet potato fries",
+    "black bean soup",
+])
+def test_dish_named_after_an_ingredient_is_not_matched(food_db, food):
+    assert food_db.match(food) is None
+
+
+def test_exact_alias_matches_its_entry(food_db):
+    match = food_db.match("2 tablespoons of peanut butter")
+    assert match is not None
+    assert match.entry.name == "peanut butter"
+    assert match.servings == 1
+
+    match = food_db.match("black beans")
+    assert match is not None
+    assert match.entry.name == "cup of black beans"
+    assert match.servings == 1
+
+
+def test_typo_still_matches(food_db):
+    match = food_db.match("2 bananna")
+    assert match is not None
+    assert match.entry.name == "banana"
+    assert match.servings == 2
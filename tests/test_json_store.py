@@ -0,0 +1,101 @@
+import json
+import os
+import stat
+import threading
+
+import pytest
+
+from fit.trackers.tokens import TokenStore
+from fit.utils.json_store import JsonStore
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "data" / "store.json")
+
+
+def test_missing_file_reads_as_the_default(path):
+    store = JsonStore(path, default={"trackers": {}})
+
+    assert store.read() == {"trackers": {}}
+    assert not os.path.exists(path)
+
+
+def test_update_writes_the_file_with_the_given_mode(path):
+    store = JsonStore(path, mode=0o600)
+
+    written = store.update(lambda data: data.update(active="whoop"))
+
+    assert written == {"active": "whoop"}
+    with open(path) as f:
+        assert json.load(f) == {"active": "whoop"}
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+
+def test_read_returns_a_copy(path):
+    store = JsonStore(path)
+    store.update(lambda data: data.update(trackers={"whoop": {}}))
+
+    store.read()["trackers"]["garmin"] = {}
+
+    assert store.read() == {"trackers": {"whoop": {}}}
+
+
+def test_changes_by_another_store_are_picked_up(path):
+    reader, writer = JsonStore(path), JsonStore(path)
+    assert reader.read() == {}
+    version = reader.version
+
+    writer.update(lambda data: data.update(active="whoop"))
+
+    assert reader.read() == {"active": "whoop"}
+    assert reader.version > version
+
+
+def test_concurrent_writers_do_not_lose_updates(path):
+    # Separate instances, as in separate processes: only the file lock serializes them.
+    stores = [JsonStore(path) for _ in range(4)]
+
+    def increment(data):
+        data["count"] = data.get("count", 0) + 1
+
+    def work(store):
+        for _ in range(25):
+            store.update(increment)
+
+    threads = [threading.Thread(target=work, args=(store,)) for store in stores]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+
+    assert JsonStore(path).read() == {"count": 100}
+
+
+def test_failed_write_leaves_the_file_and_memory_untouched(path):
+    store = JsonStore(path)
+    store.update(lambda data: data.update(active="whoop"))
+
+    with pytest.raises(TypeError):
+        store.update(lambda data: data.update(active=object()))  # not JSON serializable
+
+    assert store.read() == {"active": "whoop"}
+    assert JsonStore(path).read() == {"active": "whoop"}
+    assert sorted(os.listdir(os.path.dirname(path))) == ["store.json", "store.json.lock"]
+
+
+def test_tokens_persist_across_instances(tmp_path):
+    path = str(tmp_path / "tokens.json")
+    key = TokenStore.key("whoop", "me@example.com")
+    token = {"access_token": "a", "refresh_token": "r", "expires_at": 1700000000}
+
+    TokenStore(path).save(key, token)
+
+    store = TokenStore(path)
+    assert key == "whoop:me@example.com"
+    assert store.load(key) == token
+    assert store.load(TokenStore.key("whoop", "other@example.com")) is None
+    assert stat.S_IMODE(os.stat(path).st_mode) == 0o600
+
+    store.delete(key)
+    assert TokenStore(path).load(key) is None
@@ -0,0 +1,91 @@
+from datetime import datetime
+
+import fasthtml.common as fh
+import pytest
+from starlette.testclient import TestClient
+
+import fit.web.common as common
+import fit.web.progress as progress
+from fit.web.database import insert_measurement, table_version
+
+URL = "/api/progress/weight?start=2024-01-01&points=500"
+
+
+@pytest.fixture
+def db(tmp_path, monkeypatch):
+    monkeypatch.setattr(common, "DB_PATH", str(tmp_path / "nutrition.db"))
+    common.get_db.reset()
+    yield common.get_db()
+    common.get_db.reset()
+
+
+@pytest.fixture
+def client(db):
+    app = fh.FastHTML()
+    app.get("/api/progress/weight")(progress.api_weight)
+    return TestClient(app)
+
+
+def test_unchanged_series_gets_a_304(db, client):
+    insert_measurement(db, 70, 180.0, datetime(2024, 1, 10))
+    first = client.get(URL)
+
+    response = client.get(URL, headers={"If-None-Match": first.headers["etag"]})
+
+    assert response.status_code == 304
+    assert response.headers["etag"] == first.headers["etag"]
+    assert response.headers["cache-control"] == "private, no-cache"
+
+
+def test_etag_covers_the_range_and_point_count(db, client):
+    insert_measurement(db, 70, 180.0, datetime(2024, 1, 10))
+    etag = client.get(URL).headers["etag"]
+
+    for url in (
+        "/api/progress/weight?start=2024-01-02&points=500",
+        "/api/progress/weight?start=2024-01-01&end=2024-06-01&points=500",
+        "/api/progress/weight?start=2024-01-01&points=100",
+    ):
+        assert client.get(url, headers={"If-None-Match": etag}).status_code == 200
+
+
+@pytest.mark.parametrize("change", [
+    lambda db: insert_measurement(db, 70, 181.0, datetime(2024, 1, 5)),  # backdated
+    lambda db: db.execute("UPDATE measurements SET weight = 175.0"),
+    lambda db: db.execute("DELETE FROM measurements WHERE weight = 180.0"),
+])
+def test_any_change_to_measurements_sends_the_new_series(db, client, change):
+    insert_measurement(db, 70, 180.0, datetime(2024, 1, 10))
+    insert_measurement(db, 70, 179.0, datetime(2024, 1, 12))
+    etag = client.get(URL).headers["etag"]
+
+    change(db)
+    response = client.get(URL, headers={"If-None-Match": etag})
+
+    assert response.status_code == 200
+    assert response.headers["etag"] != etag
+    expected = db.execute(
+        "SELECT substr(datetime, 1, 10), weight FROM measurements ORDER BY datetime"
+    ).fetchall()
+    assert list(zip(response.json()["x"], response.json()["y"])) == expected
+
+
+def test_since_returns_only_newer_points(db, client):
+    insert_measurement(db, 70, 180.0, datetime(2024, 1, 10))
+    insert_measurement(db, 70, 179.0, datetime(2024, 1, 12))
+
+    series = client.get(URL + "&since=2024-01-10T00:00:00").json()
+
+    assert series == {"x": ["2024-01-12"], "y": [179.0], "last": "2024-01-12T00:00:00"}
+
+
+def test_measurement_version_moves_on_every_change(db):
+    versions = [table_version(db, "measurements")]
+    measurement = insert_measurement(db, 70, 181.5, datetime(2024, 11, 20, 7, 0))
+    versions.append(table_version(db, "measurements"))
+    db.execute("UPDATE measurements SET weight = 181.0 WHERE id = ?", (measurement,))
+    versions.append(table_version(db, "measurements"))
+    db.execute("DELETE FROM measurements WHERE id = ?", (measurement,))
+    versions.append(table_version(db, "measurements"))
+
+    assert versions == [0, 1, 2, 3]
@@ -0,0 +1,103 @@
+import fasthtml.common as fh
+import pytest
+from starlette.testclient import TestClient
+
+from fit.web.compression import CompressionMiddleware
+from fit.web.render_cache import RenderCache
+
+
+@pytest.fixture
+def cache():
+    return RenderCache(version="test")
+
+
+@pytest.fixture
+def client(cache):
+    renders = []
+
+    @cache.page
+    def page():
+        renders.append(1)
+        return fh.Title("Food"), fh.Div("Describe your meal " * 50, id="food")
+
+    app = fh.FastHTML()
+    app.add_middleware(CompressionMiddleware)
+    app.get("/food")(page)
+    client = TestClient(app)
+    client.renders = renders
+    return client
+
+
+def test_page_is_rendered_once(client):
+    first = client.get("/food")
+    second = client.get("/food")
+
+    assert first.text == second.text
+    assert "Describe your meal" in first.text
+    assert len(client.renders) == 1
+
+
+def test_matching_etag_gets_an_empty_304(client):
+    etag = client.get("/food", headers={"Accept-Encoding": "identity"}).headers["etag"]
+
+    response = client.get("/food", headers={"If-None-Match": etag, "Accept-Encoding": "identity"})
+
+    assert response.status_code == 304
+    assert response.content == b""
+    assert response.headers["etag"] == etag
+
+
+def test_weakened_etag_of_a_compressed_page_still_matches(client):
+    etag = client.get("/food", headers={"Accept-Encoding": "gzip"}).headers["etag"]
+    assert etag.startswith('W/"')
+
+    response = client.get("/food", headers={"If-None-Match": etag, "Accept-Encoding": "gzip"})
+
+    assert response.status_code == 304
+
+
+def test_stale_etag_gets_the_page(client):
+    response = client.get("/food", headers={"If-None-Match": '"stale-doc"'})
+
+    assert response.status_code == 200
+    assert "Describe your meal" in response.text
+
+
+def test_htmx_fragment_and_full_document_vary_on_hx_request(client):
+    document = client.get("/food", headers={"Accept-Encoding": "identity"})
+    fragment = client.get("/food", headers={"HX-Request": "true", "Accept-Encoding": "identity"})
+
+    assert document.headers["vary"] == "HX-Request"
+    assert document.headers["etag"] != fragment.headers["etag"]
+    assert "<html" in document.text and "<html" not in fragment.text
+
+    # The document's ETag must not validate the fragment, or htmx would get a 304
+    # for a body it never received.
+    response = client.get(
+        "/food", headers={"HX-Request": "true", "If-None-Match": document.headers["etag"]}
+    )
+    assert response.status_code == 200
+
+
+def test_changing_the_version_invalidates_etags(cache, client):
+    etag = client.get("/food").headers["etag"]
+
+    cache.clear(version="test-2")
+
+    assert client.get("/food", headers={"If-None-Match": etag}).status_code == 200
+    assert len(client.renders) == 2
+
+
+def test_component_is_rendered_once_per_arguments(cache):
+    calls = []
+
+    @cache.component
+    def badge(label: str):
+        calls.append(label)
+        return fh.Span(label, cls="badge")
+
+    assert fh.to_xml(badge("a")) == fh.to_xml(badge("a"))
+    badge("b")
+
+    assert calls == ["a", "b"]
+    assert (cache.hits, cache.misses) == (1, 2)
@@ -0,0 +1,165 @@
+from datetime import datetime, timedelta, timezone
+import time
+
+import pytest
+
+from fit.trackers.sync import TrackerDataStore, TrackerSync, parse_time
+
+NOW = datetime(2024, 11, 20, 12, 0, tzinfo=timezone.utc)
+SOURCE = "whoop:me@example.com"
+
+
+def iso(value: datetime) -> str:
+    return value.strftime("%Y-%m-%dT%H:%M:%S.000Z")
+
+
+class FakeTracker:
+    """Daily cycles up to `NOW`; the last one is still running and unscored."""
+    def __init__(self, days: int = 40):
+        self.calls = []
+        self.on_fetch = None
+        self.cycles, self.recoveries = [], []
+        for day in range(days):
+            start = NOW - timedelta(days=days - day, hours=-6)
+            current = day == days - 1
+            self.cycles.append({
+                "id": day, "start": iso(start), "end": None if current else iso(start + timedelta(days=1)),
+                "score_state": "PENDING_SCORE" if current else "SCORED",
+                "updated_at": iso(start), "score": {"kilojoule": 8000.0 + day},
+            })
+            self.recoveries.append({
+                "cycle_id": day, "score_state": "SCORED", "updated_at": iso(start),
+                "score": {"recovery_score": 50 + day},
+            })
+
+    def _between(self, records, start, end, cycle_start):
+        self.calls.append((start, end))
+        if self.on_fetch is not None:
+            self.on_fetch(len(self.calls))
+        return [record for record in records if start <= parse_time(cycle_start(record)) < end]
+
+    def iter_cycles(self, start, end):
+        return self._between(self.cycles, start, end, lambda record: record["start"])
+
+    def iter_recoveries(self, start, end):
+        return self._between(
+            self.recoveries, start, end, lambda record: self.cycles[record["cycle_id"]]["start"]
+        )
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / "tracker.db")
+
+
+@pytest.fixture
+def store(path):
+    store = TrackerDataStore(path)
+    yield store
+    store.close()
+
+
+def make_sync(store, tracker, **kwargs) -> TrackerSync:
+    return TrackerSync(store, tracker=tracker, source=SOURCE, clock=lambda: NOW, **kwargs)
+
+
+def test_first_sync_stores_the_history_in_windows(store):
+    tracker = FakeTracker()
+
+    changed = make_sync(store, tracker).sync_once()
+
+    assert changed == {"cycles": 40, "recoveries": 40}
+    assert len(tracker.calls) == 2 * 3  # 90 days of history in 30-day windows, per resource
+    assert store.latest_cycle(SOURCE)["kilojoule"] == 8039.0
+    assert store.latest_recovery(SOURCE)["recovery_score"] == 89
+    assert store.last_synced(SOURCE) == pytest.approx(time.time(), abs=5)
+
+
+def test_cursor_stops_at_the_record_that_can_still_change(store):
+    tracker = FakeTracker()
+    make_sync(store, tracker).sync_once()
+
+    current_start = parse_time(tracker.cycles[-1]["start"])
+    assert store.cursor(SOURCE, "cycles") == current_start
+    assert store.cursor(SOURCE, "recoveries") == NOW
+
+    # The next run re-reads from the current cycle (minus the lookback) and writes
+    # nothing that did not change.
+    tracker.calls.clear()
+    assert make_sync(store, tracker).sync_once() == {"cycles": 0, "recoveries": 0}
+    assert tracker.calls[0] == (current_start - timedelta(days=1), NOW)
+
+
+def test_rescored_record_is_updated(store):
+    tracker = FakeTracker()
+    make_sync(store, tracker).sync_once()
+
+    tracker.cycles[-1].update(score={"kilojoule": 9000.0}, updated_at=iso(NOW))
+
+    assert make_sync(store, tracker).sync_once()["cycles"] == 1
+    assert store.latest_cycle(SOURCE)["kilojoule"] == 9000.0
+
+
+def test_run_is_skipped_while_another_process_holds_the_lease(path, store):
+    other = TrackerDataStore(path)
+    assert other.acquire_lease(SOURCE, "other-process", 60)
+    tracker = FakeTracker()
+    sync = make_sync(store, tracker)
+
+    assert sync.sync_once() is None
+    assert sync.skipped == 1
+    assert tracker.calls == []
+    assert store.latest_cycle(SOURCE) is None
+
+    other.release_lease(SOURCE, "other-process")
+    assert sync.sync_once() is not None
+    other.close()
+
+
+def test_expired_lease_is_taken_over(path, store):
+    other = TrackerDataStore(path)
+    assert other.acquire_lease(SOURCE, "crashed-process", -1)
+
+    assert make_sync(store, FakeTracker()).sync_once() is not None
+    other.close()
+
+
+def test_lease_is_released_after_a_run(path, store):
+    make_sync(store, FakeTracker()).sync_once()
+
+    other = TrackerDataStore(path)
+    assert other.acquire_lease(SOURCE, "other-process", 60)
+    other.close()
+
+
+def test_run_stops_when_its_lease_is_lost(path, store):
+    other = TrackerDataStore(path)
+    tracker = FakeTracker()
+    sync = make_sync(store, tracker, lease=0.2)
+
+    def steal_lease(call):
+        if call == 2:
+            time.sleep(0.3)  # this run's lease expires while the window is fetched
+            assert other.acquire_lease(SOURCE, "other-process", 60)
+    tracker.on_fetch = steal_lease
+
+    assert sync.sync_once() is None
+    assert sync.skipped == 1 and sync.runs == 0
+
+    # Only the window saved before the takeover was written.
+    first_window_end = NOW - timedelta(days=60)
+    assert store.cursor(SOURCE, "cycles") == first_window_end
+    assert store.cursor(SOURCE, "recoveries") is None
+    assert store.cycles(SOURCE, NOW - timedelta(days=90), NOW) == []
+    other.close()
+
+
+def test_overlapping_run_in_the_same_process_is_skipped(store):
+    tracker = FakeTracker()
+    sync = make_sync(store, tracker)
+    nested = []
+    tracker.on_fetch = lambda call: nested.append(sync.sync_once()) if call == 1 else None
+
+    assert sync.sync_once() is not None
+    assert nested == [None]
+    assert sync.skipped == 1
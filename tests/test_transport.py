@@ -0,0 +1,181 @@
+from dataclasses import dataclass, field
+from datetime import datetime, timezone
+
+import pytest
+
+from fit.trackers.transport import RateLimitedTransport, TokenBucket, retry_after
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@dataclass
+class Response:
+    status_code: int
+    headers: dict[str, str] = field(default_factory=dict)
+
+
+def max_in_window(times: list[float], window: float) -> int:
+    times = sorted(times)
+    return max(
+        sum(1 for other in times[i:] if other < start + window) for i, start in enumerate(times)
+    )
+
+
+def test_burst_is_spread_so_no_window_exceeds_the_limit():
+    clock = Clock()
+    bucket = TokenBucket.for_limit(100, 60.0, clock=clock)
+
+    # 300 callers arrive at once; each sends after the wait it was given.
+    sends = [bucket.reserve() for _ in range(300)]
+
+    assert sends[:10] == [0.0] * 10  # the 10% burst goes out immediately
+    assert sends == sorted(sends)
+    assert max_in_window(sends, 60.0) <= 100
+    assert sends[-1] == pytest.approx((300 - 10) / 1.5)
+
+
+def test_sequential_caller_stays_under_the_limit():
+    clock = Clock()
+    bucket = TokenBucket.for_limit(100, 60.0, clock=clock)
+
+    sends = []
+    for _ in range(500):
+        clock.now += bucket.reserve()
+        sends.append(clock.now)
+
+    assert max_in_window(sends, 60.0) <= 100
+
+
+def test_idle_bucket_refills_up_to_capacity():
+    clock = Clock()
+    bucket = TokenBucket(rate=1.0, capacity=3, clock=clock)
+    for _ in range(3):
+        bucket.reserve()
+
+    clock.now = 100.0
+
+    assert [bucket.reserve() for _ in range(4)] == [0.0, 0.0, 0.0, 1.0]
+
+
+def test_pause_holds_every_token_then_refills_from_empty():
+    clock = Clock()
+    bucket = TokenBucket(rate=2.0, capacity=5, clock=clock)
+
+    bucket.pause(10.0)
+
+    assert bucket.reserve() == pytest.approx(10.5)
+    assert bucket.reserve() == pytest.approx(11.0)
+
+
+def test_retry_after_accepts_seconds_and_http_dates():
+    now = datetime(2024, 11, 20, 8, 0, tzinfo=timezone.utc)
+    assert retry_after({"Retry-After": "7"}) == 7.0
+    assert retry_after({"Retry-After": "Wed, 20 Nov 2024 08:00:30 GMT"}, now) == 30.0
+    assert retry_after({"Retry-After": "Wed, 20 Nov 2024 07:59:00 GMT"}, now) == 0.0
+    assert retry_after({"Retry-After": "soon"}) is None
+    assert retry_after({}) is None
+
+
+def transport(**kwargs) -> tuple[RateLimitedTransport, list[float]]:
+    sleeps = []
+    return RateLimitedTransport([], sleep=sleeps.append, **kwargs), sleeps
+
+
+def sender(*outcomes):
+    outcomes = list(outcomes)
+
+    def send():
+        outcome = outcomes.pop(0)
+        if isinstance(outcome, Exception):
+            raise outcome
+        return outcome
+    return send
+
+
+def test_get_is_retried_after_a_server_error():
+    client, sleeps = transport(backoff_base=0.5)
+
+    response = client.request("GET", sender(Response(503), Response(200)))
+
+    assert response.status_code == 200
+    assert client.retried == 1
+    assert 0.0 <= sleeps[1] <= 0.5  # after the first attempt's rate limit wait
+
+
+def test_server_error_honours_retry_after():
+    client, sleeps = transport()
+
+    client.request("GET", sender(Response(503, {"Retry-After": "3"}), Response(200)))
+
+    assert sleeps[1] == 3.0
+
+
+def test_post_is_not_retried():
+    client, _ = transport()
+
+    assert client.request("POST", sender(Response(503))).status_code == 503
+    with pytest.raises(ConnectionError):
+        RateLimitedTransport([], retry_exceptions=(ConnectionError,)).request(
+            "POST", sender(ConnectionError())
+        )
+
+
+def test_client_errors_are_retried_until_max_retries():
+    client, sleeps = transport(max_retries=2, retry_exceptions=(ConnectionError,))
+
+    assert client.request("GET", sender(ConnectionError(), Response(200))).status_code == 200
+    with pytest.raises(ConnectionError):
+        client.request("GET", sender(*[ConnectionError()] * 3))
+    assert client.retried == 3
+
+
+def test_throttled_request_pauses_every_bucket_for_retry_after():
+    clock = Clock()
+    bucket = TokenBucket(rate=10.0, capacity=10, clock=clock)
+    sleeps = []
+    client = RateLimitedTransport([bucket], sleep=sleeps.append)
+
+    response = client.request("POST", sender(Response(429, {"Retry-After": "20"}), Response(200)))
+
+    # Retried even for POST: a 429 means the request was not processed.
+    assert response.status_code == 200
+    assert client.throttled == 1
+    # The retry, and any other caller of the transport, waits out the pause.
+    assert sleeps == [0.0, 0.0, pytest.approx(20.1)]
+    assert bucket.reserve() == pytest.approx(20.2)
+
+
+def test_throttled_request_falls_back_to_rate_limit_reset():
+    clock = Clock()
+    bucket = TokenBucket(rate=10.0, capacity=10, clock=clock)
+    client = RateLimitedTransport([bucket], sleep=lambda _: None)
+
+    client.request("GET", sender(Response(429, {"X-RateLimit-Reset": "15"}), Response(200)))
+
+    assert bucket.reserve() == pytest.approx(15.2)
+
+
+def test_retry_after_beyond_the_limit_is_returned_to_the_caller():
+    client, _ = transport(max_retry_after=60.0)
+
+    response = client.request("GET", sender(Response(429, {"Retry-After": "3600"})))
+
+    assert response.status_code == 429
+    assert client.retried == 0
+
+
+def test_exhausted_rate_limit_window_pauses_until_reset():
+    clock = Clock()
+    bucket = TokenBucket(rate=10.0, capacity=10, clock=clock)
+    client = RateLimitedTransport([bucket], sleep=lambda _: None)
+
+    headers = {"X-RateLimit-Remaining": "0", "X-RateLimit-Reset": "30"}
+    assert client.request("GET", sender(Response(200, headers))).status_code == 200
+
+    assert bucket.reserve() == pytest.approx(30.1)